@@ -0,0 +1,122 @@
+"""
+ALT: A*, Landmarks and Triangle inequality
+Shortest distances from a few landmarks (entrances and stairwells) are
+precomputed into flat arrays. For any landmark L, |d(L, t) - d(L, v)| is a
+lower bound on d(v, t), so the maximum over all landmarks is an admissible,
+consistent heuristic that also accounts for stairs and building changes.
+"""
+import heapq
+import struct
+import weakref
+from array import array
+
+INF = float("inf")
+LANDMARK_TYPES = ("entrance", "stairs")
+_MAGIC = b"RNAVALT2"
+_HEADER = struct.Struct("<8sIIIQ")
+_tables = weakref.WeakKeyDictionary()
+
+def shortest_distances(graph, source_id):
+    """Single-source Dijkstra into a dense array (inf for unreachable nodes)"""
+    distances = array("d", [INF]) * graph.node_count()
+    distances[source_id] = 0.0
+    open_heap = [(0.0, source_id)]
+    neighbors = graph.neighbors
+    while open_heap:
+        distance, node_id = heapq.heappop(open_heap)
+        if distance > distances[node_id]:
+            continue
+        for edge in neighbors(node_id):
+            candidate = distance + edge.weight
+            if candidate < distances[edge.to_id]:
+                distances[edge.to_id] = candidate
+                heapq.heappush(open_heap, (candidate, edge.to_id))
+    return distances
+
+class LandmarkTable:
+    def __init__(self, landmarks, rows, edge_count=0, version=0, revision=0):
+        self.landmarks = array("I", landmarks)
+        self.rows = rows
+        self.edge_count = edge_count
+        self.version = version
+        # Change log revision of the graph the distances were computed on
+        self.revision = revision
+
+    @classmethod
+    def build(cls, graph, count=8, candidates=None):
+        """
+        Farthest-point selection: start from the first candidate, then repeatedly add
+        the candidate whose distance to the closest chosen landmark is largest.
+        """
+        if candidates is None:
+            candidates = [node.id for node in graph.nodes if node.node_type in LANDMARK_TYPES]
+        if not candidates:
+            candidates = list(range(min(count, graph.node_count())))
+        landmarks, rows = [], []
+        closest = {candidate: INF for candidate in candidates}
+        next_id = candidates[0]
+        while next_id is not None and len(landmarks) < count:
+            row = shortest_distances(graph, next_id)
+            landmarks.append(next_id)
+            rows.append(row)
+            del closest[next_id]
+            next_id, farthest = None, -1.0
+            for candidate in closest:
+                closest[candidate] = min(closest[candidate], row[candidate])
+                # Unreachable candidates sit in another component and make good landmarks there
+                if closest[candidate] > farthest:
+                    next_id, farthest = candidate, closest[candidate]
+        return cls(landmarks, rows, graph.edge_count(), graph.version, getattr(graph, "revision", 0))
+
+    def heuristic_to(self, target_id, floor=None):
+        """floor: optional consistent h(node_id) used when it beats every landmark bound"""
+        rows = [(row, row[target_id]) for row in self.rows if row[target_id] != INF]
+
+        def h(node_id):
+            best = floor(node_id) if floor is not None else 0.0
+            for row, to_target in rows:
+                diff = to_target - row[node_id]
+                if diff < 0:
+                    diff = -diff
+                if diff > best:
+                    best = diff
+            return best
+        return h
+
+    def nbytes(self):
+        return sum(row.itemsize * len(row) for row in self.rows) + self.landmarks.itemsize * len(self.landmarks)
+
+    def save(self, path):
+        node_count = len(self.rows[0]) if self.rows else 0
+        with open(path, "wb") as fp:
+            fp.write(_HEADER.pack(_MAGIC, len(self.landmarks), node_count, self.edge_count, self.revision))
+            self.landmarks.tofile(fp)
+            for row in self.rows:
+                row.tofile(fp)
+
+    @classmethod
+    def load(cls, path, graph):
+        """Load a table saved next to a graph snapshot and attach it to graph"""
+        with open(path, "rb") as fp:
+            magic, count, node_count, edge_count, revision = _HEADER.unpack(fp.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path}: not a landmark table")
+            if (node_count != graph.node_count() or edge_count != graph.edge_count()
+                    or revision != getattr(graph, "revision", 0)):
+                raise ValueError(f"{path}: landmark table does not match this graph")
+            landmarks = array("I")
+            landmarks.fromfile(fp, count)
+            rows = []
+            for _ in range(count):
+                row = array("d")
+                row.fromfile(fp, node_count)
+                rows.append(row)
+        table = _tables[graph] = cls(landmarks, rows, edge_count, graph.version, revision)
+        return table
+
+def landmark_table(graph, count=8):
+    """Landmark table for graph, built on first use and rebuilt after graph changes"""
+    table = _tables.get(graph)
+    if table is None or table.version != graph.version:
+        table = _tables[graph] = LandmarkTable.build(graph, count)
+    return table
@@ -0,0 +1,108 @@
+"""
+Alternatives: Up to k sufficiently different routes between two rooms
+Penalty method: after each search the edges of the route found get dearer and
+the search runs again, so later searches drift onto other stairwells and
+corridors. A route is kept if it is no more than max_stretch longer than the
+shortest and shares at most max_overlap of its length with every route kept
+before it. Plateau (via-node) alternatives were tried first, but they only
+deviate at one place, and campus alternatives usually differ in two (another
+stairwell in each building).
+Searches are the bidirectional A* core on a copy-on-write set of edge costs;
+penalties only raise costs, so its potentials stay consistent. The searches
+stop at the first one that finds a route already seen or one longer than
+max_stretch allows. Campus topologies seldom have more than two or three
+different routes, so k is an upper bound that is rarely reached; latency is
+bounded by max_searches, whatever k is.
+"""
+from array import array
+
+from db.compact import CompactGraph
+from db.graph_db import Edge
+from algorithms import indexed
+from algorithms.astar import find_path_bidirectional_astar, floor_scale, heuristic_scale
+from algorithms.profiles import profile_costs
+
+class PenaltyCosts:
+    """Edge costs for one alternatives query, in the shape algorithms.indexed takes"""
+
+    def __init__(self, graph, base=None):
+        # base: ProfileCosts whose costs and avoided nodes are the starting point
+        self.blocked = base.blocked if base is not None else ()
+        self.adjacency = None
+        self.weights = None
+        if isinstance(graph, CompactGraph):
+            self.weights = array("d", graph.weights if base is None else base.weights)
+        else:
+            # Rows are copied when first penalized; the rest stay shared with the graph
+            self.adjacency = list(graph.adjacency if base is None else base.adjacency)
+            self._copied = set()
+
+    def penalize(self, graph, path, factor):
+        """Multiply the cost of every edge along path, both ways, by factor"""
+        for from_id, to_id in zip(path, path[1:]):
+            for a, b in ((from_id, to_id), (to_id, from_id)):
+                if self.weights is not None:
+                    for i in graph.edge_range(a):
+                        if graph.targets[i] == b:
+                            self.weights[i] *= factor
+                    continue
+                if a not in self._copied:
+                    self.adjacency[a] = list(self.adjacency[a])
+                    self._copied.add(a)
+                row = self.adjacency[a]
+                for j, edge in enumerate(row):
+                    if edge.to_id == b:
+                        row[j] = Edge(b, edge.weight * factor, edge.bearing)
+
+def _edge_lengths(route):
+    """{(low id, high id): weight} of the edges along a route"""
+    path = route.path
+    return {(min(path[i], path[i + 1]), max(path[i], path[i + 1])): edge.weight for i, edge in enumerate(route.edges)}
+
+def find_alternative_routes(graph, start_code: str, end_code: str, k=3, max_stretch=0.3, max_overlap=0.6,
+                            penalty=0.4, max_searches=None, profile=None):
+    """
+    List of up to k routes, shortest first, each a Route like find_path_astar returns.
+    When there is no route at all the list holds the failure dict instead. k is an
+    upper bound: searching stops once a search repeats a route or exceeds max_stretch,
+    and most campus queries have only two or three different routes.
+    max_stretch: an alternative is at most (1 + max_stretch) times the shortest route.
+    max_overlap: most of an alternative's length it may share with any route kept before it.
+    penalty: edges of each route found cost this fraction more in the searches after it.
+    max_searches: searches after the first, 2 * (k - 1) by default.
+    profile: routing profile name or RoutingProfile, see algorithms.profiles.
+    """
+    first = find_path_bidirectional_astar(graph, start_code, end_code, profile=profile)
+    if not first["success"] or k <= 1 or first.step_count == 0:
+        return [first]
+    start_id, end_id = first.path[0], first.path[-1]
+    base = profile_costs(graph, profile)
+    if base is None:
+        scale, per_floor = heuristic_scale(graph), floor_scale(graph)
+    else:
+        scale, per_floor = base.heuristic_scale(graph), base.floor_scale(graph)
+    costs = PenaltyCosts(graph, base)
+    longest = sum(edge.weight for edge in first.edges) * (1 + max_stretch)
+    routes, kept, seen = [first], [_edge_lengths(first)], {tuple(first.path)}
+    costs.penalize(graph, first.path, 1 + penalty)
+    for _ in range(2 * (k - 1) if max_searches is None else max_searches):
+        route = indexed.bidirectional(graph, start_id, end_id, scale / 2, None, costs, per_floor / 2)
+        if route is None:
+            break
+        costs.penalize(graph, route.path, 1 + penalty)
+        path = tuple(route.path)
+        length = sum(edge.weight for edge in route.edges)
+        if path in seen or length > longest:
+            # Penalties only add cost, so once the cheapest detour is a route already
+            # seen or too long, further searches rarely turn up a usable one
+            break
+        seen.add(path)
+        lengths = _edge_lengths(route)
+        if any(sum(weight for key, weight in lengths.items() if key in other) > max_overlap * length
+               for other in kept):
+            continue
+        routes.append(route)
+        kept.append(lengths)
+        if len(routes) == k:
+            break
+    return routes
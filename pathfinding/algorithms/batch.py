@@ -0,0 +1,84 @@
+"""
+Batch: Many-pair routing across worker processes
+Workers memory-map the same graph snapshot read-only, so the graph is never
+pickled per task and pages are shared through the OS page cache. Pairs are
+grouped by source node; a source with several destinations gets one
+shortest-path tree that serves all of them.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, Tuple
+
+from algorithms.astar import find_path_bidirectional_astar
+from algorithms.spt import TreeStore
+
+TREE_THRESHOLD = 4
+TASK_PAIRS = 64
+
+_worker_graph = None
+
+def _init_worker(snapshot_path):
+    global _worker_graph
+    from db.graph_db import GraphDB
+    _worker_graph = GraphDB.open(snapshot_path)
+
+def _route_groups(graph, groups):
+    trees = TreeStore(graph)
+    results = []
+    for start_code, targets in groups:
+        use_tree = len(targets) >= TREE_THRESHOLD and start_code in graph.lookup
+        for index, end_code in targets:
+            if use_tree:
+                result = trees.find_path(start_code, end_code)
+            else:
+                result = find_path_bidirectional_astar(graph, start_code, end_code)
+            results.append((index, start_code, end_code, result))
+    return results
+
+def _run_task(groups):
+    return _route_groups(_worker_graph, groups)
+
+def _plan_tasks(pairs):
+    groups = {}
+    for index, (start_code, end_code) in enumerate(pairs):
+        groups.setdefault(start_code, []).append((index, end_code))
+    tasks, task, size = [], [], 0
+    # Large groups stay whole so their tree is built once; small ones are packed together
+    for start_code, targets in groups.items():
+        task.append((start_code, targets))
+        size += len(targets)
+        if size >= TASK_PAIRS:
+            tasks.append(task)
+            task, size = [], 0
+    if task:
+        tasks.append(task)
+    return tasks
+
+def find_paths_batch(graph, pairs: Iterable[Tuple[str, str]], workers=None) -> Iterator[Tuple[int, str, str, dict]]:
+    """
+    Route every (start_code, end_code) pair and yield (index, start_code, end_code, result)
+    as results become available, in completion order. workers=1 routes in-process.
+    """
+    tasks = _plan_tasks(list(pairs))
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield from _route_groups(graph, task)
+        return
+    snapshot_path = getattr(graph, "path", None)
+    tmp_dir = None
+    if snapshot_path is None or graph.version != 0:
+        tmp_dir = tempfile.mkdtemp(prefix="raspinav-batch-")
+        snapshot_path = os.path.join(tmp_dir, "graph.snap")
+        graph.save(snapshot_path)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(snapshot_path,)) as pool:
+            futures = [pool.submit(_run_task, task) for task in tasks]
+            for future in as_completed(futures):
+                yield from future.result()
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
@@ -0,0 +1,220 @@
+"""
+D* Lite: Incremental re-routing towards a fixed destination
+The search runs backwards from the goal and keeps its g/rhs values and open
+queue between calls. When the user moves somewhere unexpected, or an edge or
+node is closed or reweighted, only the affected part of the search is
+repaired, so re-route cost follows the size of the change rather than the
+size of the graph. apply_record() mirrors change log records the same way.
+Edges are treated as symmetric, as GraphDB builds them.
+With a routing profile, edges are costed by it and the node types it avoids
+are blocked everywhere but at the user's position and the goal.
+"""
+import heapq
+from typing import Dict, Optional, Set, Tuple
+
+from algorithms.astar import build_route, euclidean_to, heuristic_scale
+from algorithms.profiles import profile_costs
+from db.graph_db import Edge
+
+INF = float("inf")
+
+class DStarLite:
+    def __init__(self, graph, start_id, goal_id, profile=None):
+        self.graph = graph
+        self.start_id = start_id
+        self.goal_id = goal_id
+        self.overrides: Dict[Tuple[int, int], float] = {}
+        self.blocked: Set[int] = set()
+        self.expansions = 0
+        self.costs = profile_costs(graph, profile)
+        self.avoided: Set[int] = set()
+        if self.costs is None:
+            self._scale = heuristic_scale(graph)
+        else:
+            self._scale = self.costs.heuristic_scale(graph)
+            self.avoided = set(self.costs.blocked) - {goal_id}
+        self._reset()
+
+    def _reset(self):
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {self.goal_id: 0.0}
+        self.km = 0.0
+        self._open = []
+        self._open_key: Dict[int, Tuple[float, float]] = {}
+        self._to_start = euclidean_to(self.graph, self.start_id)
+        self._push(self.goal_id)
+
+    def _h(self, node_id):
+        return self._to_start(node_id) * self._scale
+
+    def _key(self, node_id):
+        best = min(self.g.get(node_id, INF), self.rhs.get(node_id, INF))
+        return (best + self._h(node_id) + self.km, best)
+
+    def _push(self, node_id):
+        key = self._key(node_id)
+        self._open_key[node_id] = key
+        heapq.heappush(self._open, (key, node_id))
+
+    def _top_key(self):
+        # Drop entries superseded by a later push or removal
+        while self._open:
+            key, node_id = self._open[0]
+            if self._open_key.get(node_id) == key:
+                return key
+            heapq.heappop(self._open)
+        return (INF, INF)
+
+    def weight(self, from_id, to_id, weight):
+        """Edge weight after update_edge() overrides"""
+        return self.overrides.get((min(from_id, to_id), max(from_id, to_id)), weight)
+
+    def cost(self, from_id, to_id, weight):
+        if from_id in self.blocked or to_id in self.blocked:
+            return INF
+        if self.costs is None:
+            return self.weight(from_id, to_id, weight)
+        avoided, start_id = self.avoided, self.start_id
+        if (from_id in avoided and from_id != start_id) or (to_id in avoided and to_id != start_id):
+            return INF
+        return self.costs.cost(from_id, to_id, self.weight(from_id, to_id, weight))
+
+    def _update_vertex(self, node_id):
+        if node_id != self.goal_id:
+            g = self.g
+            best = INF
+            for edge in self.graph.neighbors(node_id):
+                candidate = self.cost(node_id, edge.to_id, edge.weight) + g.get(edge.to_id, INF)
+                if candidate < best:
+                    best = candidate
+            self.rhs[node_id] = best
+        self._open_key.pop(node_id, None)
+        if self.g.get(node_id, INF) != self.rhs.get(node_id, INF):
+            self._push(node_id)
+
+    def compute(self):
+        """Repair the search until the start node is locally consistent; returns expansions"""
+        expansions = 0
+        start_id = self.start_id
+        while (self._top_key() < self._key(start_id)
+               or self.rhs.get(start_id, INF) != self.g.get(start_id, INF)):
+            old_key, node_id = heapq.heappop(self._open)
+            del self._open_key[node_id]
+            new_key = self._key(node_id)
+            if old_key < new_key:
+                self._push(node_id)
+                continue
+            expansions += 1
+            g_old = self.g.get(node_id, INF)
+            rhs = self.rhs.get(node_id, INF)
+            if g_old > rhs:
+                self.g[node_id] = rhs
+                for edge in self.graph.neighbors(node_id):
+                    self._update_vertex(edge.to_id)
+            else:
+                self.g[node_id] = INF
+                self._update_vertex(node_id)
+                for edge in self.graph.neighbors(node_id):
+                    self._update_vertex(edge.to_id)
+            if not self._open:
+                break
+        self.expansions += expansions
+        return expansions
+
+    def move_to(self, node_id):
+        """The user is now at node_id (e.g. after a wrong turn)"""
+        if node_id == self.start_id:
+            return
+        self.km += self._h(node_id)
+        previous, self.start_id = self.start_id, node_id
+        self._to_start = euclidean_to(self.graph, node_id)
+        # An avoided node is only usable while the user stands on it
+        for changed in (previous, node_id):
+            if changed in self.avoided:
+                self._touch_around(changed)
+
+    def update_edge(self, from_id, to_id, weight: Optional[float]):
+        """Reweight the edge between two nodes; INF closes it, None restores the graph weight"""
+        key = (min(from_id, to_id), max(from_id, to_id))
+        if weight is None:
+            self.overrides.pop(key, None)
+        else:
+            self.overrides[key] = weight
+            distance = euclidean_to(self.graph, to_id)(from_id)
+            if distance > 0 and weight < self._scale * distance:
+                # A shorter edge breaks the heuristic bound: start over with a smaller scale
+                self._scale = weight / distance
+                self._reset()
+                return
+        self._update_vertex(from_id)
+        self._update_vertex(to_id)
+
+    def block_node(self, node_id):
+        self.blocked.add(node_id)
+        self._touch_around(node_id)
+
+    def unblock_node(self, node_id):
+        self.blocked.discard(node_id)
+        self._touch_around(node_id)
+
+    def apply_record(self, record):
+        """
+        Mirror one change log record (db.changelog) on the planner's graph. False
+        when it cannot be mirrored, e.g. a new node or edge, and the planner has
+        to be built again on the updated graph.
+        """
+        op, lookup = record["op"], self.graph.lookup
+        try:
+            if op in ("close_node", "remove_node"):
+                self.block_node(lookup[record["node"]])
+            elif op == "reopen_node" and lookup[record["node"]] in self.blocked:
+                self.unblock_node(lookup[record["node"]])
+            elif op == "remove_edge":
+                self.update_edge(lookup[record["from"]], lookup[record["to"]], INF)
+            elif op == "set_edge_weight":
+                self.update_edge(lookup[record["from"]], lookup[record["to"]], record["weight"])
+            else:
+                return False
+        except KeyError:
+            return False
+        return True
+
+    def _touch_around(self, node_id):
+        self._update_vertex(node_id)
+        for edge in self.graph.neighbors(node_id):
+            self._update_vertex(edge.to_id)
+
+    def path(self):
+        """Current best node path from start to goal, or None when unreachable"""
+        self.compute()
+        if self.g.get(self.start_id, INF) == INF:
+            return None
+        path, edges = [self.start_id], []
+        visited = {self.start_id}
+        while path[-1] != self.goal_id:
+            node_id = path[-1]
+            best, best_edge = (INF, INF), None
+            for edge in self.graph.neighbors(node_id):
+                if edge.to_id in visited:
+                    continue
+                cost = self.cost(node_id, edge.to_id, edge.weight)
+                to_goal = self.g.get(edge.to_id, INF)
+                # Ties (zero-length edges) go to the node closer to the goal
+                candidate = (cost + to_goal, to_goal)
+                if candidate < best:
+                    best = candidate
+                    best_edge = Edge(edge.to_id, self.weight(node_id, edge.to_id, edge.weight), edge.bearing)
+            if best_edge is None or best[0] == INF:
+                return None
+            visited.add(best_edge.to_id)
+            path.append(best_edge.to_id)
+            edges.append(best_edge)
+        return path, edges
+
+    def route(self):
+        """Route from the current start in the usual result format"""
+        found = self.path()
+        if found is None:
+            return {"success": False, "error": "No path found"}
+        path, edges = found
+        return build_route(self.graph, path, edges)
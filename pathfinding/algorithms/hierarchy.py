@@ -0,0 +1,136 @@
+"""
+Hierarchy: Portal overlay routing over building/floor cells
+Every (building, floor) pair is a cell. Nodes with an edge into another cell
+(stairs, entrances, corridors joined to CENTRAL) are portals. Shortest
+portal-to-portal distances inside each cell are precomputed, so a query only
+searches the start cell, the end cell and the portal overlay.
+"""
+import heapq
+import weakref
+from typing import Dict, List, Optional, Tuple
+
+from algorithms.astar import build_route, euclidean_to, heuristic_scale
+from algorithms.route import edge_between
+
+INF = float("inf")
+
+class HierarchicalRouter:
+    def __init__(self, graph):
+        self.graph = graph
+        self.version = graph.version
+        self.cells: Dict[Tuple[int, int], int] = {}
+        self.cell_of: List[int] = []
+        for node in graph.nodes:
+            self.cell_of.append(self.cells.setdefault((node.building, node.floor), len(self.cells)))
+        # overlay[portal] -> [(to_id, weight, intra-cell path or None for a real edge)]
+        self.overlay: Dict[int, List[Tuple[int, float, Optional[tuple]]]] = {}
+        portals_by_cell: Dict[int, List[int]] = {}
+        for node_id, cell in enumerate(self.cell_of):
+            for edge in graph.neighbors(node_id):
+                if self.cell_of[edge.to_id] != cell:
+                    self.overlay.setdefault(node_id, []).append((edge.to_id, edge.weight, None))
+            if node_id in self.overlay:
+                portals_by_cell.setdefault(cell, []).append(node_id)
+        for cell, portals in portals_by_cell.items():
+            for portal in portals:
+                self._add_shortcuts(portal, cell, portals)
+
+    def _add_shortcuts(self, source, cell, portals):
+        distances, parents = self._cell_search(source, cell)
+        for target in portals:
+            if target == source or target not in distances:
+                continue
+            path = [target]
+            while path[-1] != source:
+                path.append(parents[path[-1]])
+            path.reverse()
+            self.overlay[source].append((target, distances[target], tuple(path)))
+
+    def _cell_search(self, source, cell):
+        cell_of = self.cell_of
+        distances = {source: 0.0}
+        parents = {}
+        open_heap = [(0.0, source)]
+        while open_heap:
+            distance, node_id = heapq.heappop(open_heap)
+            if distance > distances[node_id]:
+                continue
+            for edge in self.graph.neighbors(node_id):
+                neighbor_id = edge.to_id
+                if cell_of[neighbor_id] != cell:
+                    continue
+                candidate = distance + edge.weight
+                if candidate < distances.get(neighbor_id, INF):
+                    distances[neighbor_id] = candidate
+                    parents[neighbor_id] = node_id
+                    heapq.heappush(open_heap, (candidate, neighbor_id))
+        return distances, parents
+
+    def portal_count(self):
+        return len(self.overlay)
+
+    def shortcut_count(self):
+        return sum(1 for links in self.overlay.values() for link in links if link[2] is not None)
+
+    def route(self, start_id, end_id):
+        """Shortest path as (node ids, total weight), or None when unreachable"""
+        graph, cell_of, overlay = self.graph, self.cell_of, self.overlay
+        active = (cell_of[start_id], cell_of[end_id])
+        scale = heuristic_scale(graph)
+        to_end = euclidean_to(graph, end_id)
+        g_score = {start_id: 0.0}
+        came_from = {}
+        open_heap = [(to_end(start_id) * scale, start_id)]
+        closed_set = set()
+        while open_heap:
+            _, current_id = heapq.heappop(open_heap)
+            if current_id in closed_set:
+                continue
+            if current_id == end_id:
+                break
+            closed_set.add(current_id)
+            current_g = g_score[current_id]
+            current_cell = cell_of[current_id]
+            links = overlay.get(current_id, ())
+            if current_cell in active:
+                # Full detail only inside the start and end cells
+                links = [(edge.to_id, edge.weight, None) for edge in graph.neighbors(current_id)
+                         if cell_of[edge.to_id] == current_cell] + list(links)
+            for neighbor_id, weight, path in links:
+                if neighbor_id in closed_set:
+                    continue
+                tentative_g = current_g + weight
+                if tentative_g < g_score.get(neighbor_id, INF):
+                    g_score[neighbor_id] = tentative_g
+                    came_from[neighbor_id] = (current_id, path)
+                    heapq.heappush(open_heap, (tentative_g + to_end(neighbor_id) * scale, neighbor_id))
+        if end_id not in g_score or (end_id != start_id and end_id not in came_from):
+            return None
+        path = [end_id]
+        node_id = end_id
+        while node_id != start_id:
+            parent_id, shortcut = came_from[node_id]
+            # Shortcuts unpack to the intra-cell path they stand for
+            path.extend(reversed(shortcut[:-1]) if shortcut else (parent_id,))
+            node_id = parent_id
+        path.reverse()
+        return path, g_score[end_id]
+
+_routers = weakref.WeakKeyDictionary()
+
+def hierarchical_router(graph):
+    """Router for graph, built on first use and rebuilt after graph changes"""
+    router = _routers.get(graph)
+    if router is None or router.version != graph.version:
+        router = _routers[graph] = HierarchicalRouter(graph)
+    return router
+
+def find_path_hierarchical(graph, start_code: str, end_code: str):
+    if start_code not in graph.lookup or end_code not in graph.lookup:
+        return {"success": False, "error": "Room not found"}
+    found = hierarchical_router(graph).route(graph.lookup[start_code], graph.lookup[end_code])
+    if found is None:
+        return {"success": False, "error": "No path found"}
+    path, _ = found
+    edges = [edge_between(graph, path[i], path[i + 1]) for i in range(len(path) - 1)]
+    return build_route(graph, path, edges)
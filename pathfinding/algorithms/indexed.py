@@ -0,0 +1,558 @@
+"""
+Indexed: Array-based cores for A* and bidirectional A*
+Search state (g, heuristic, parent, open/closed) lives in lists indexed by node
+id that are allocated once per graph and reused. A generation stamp marks which
+entries belong to the current query, so nothing is cleared between queries.
+Heuristics are computed inline from node fields, once per node and query.
+GraphDB/GraphView adjacency is walked as Edge objects, CompactGraph edges
+straight from its CSR arrays. heapq stays the queue: entries of closed nodes
+are skipped by their stamp, which is faster on CPython than a decrease-key heap
+written in Python.
+A routing profile (algorithms.profiles) swaps in its own adjacency or weights
+array and marks the nodes it avoids as closed before the first push.
+"""
+import threading
+import weakref
+from heapq import heappop, heappush
+from time import perf_counter
+
+from db.compact import CompactGraph
+from db.graph_db import Edge, NODE_TYPES
+from algorithms.route import Route, edge_between
+
+INF = float("inf")
+_ROOM = NODE_TYPES.index("room")
+_FLOOR_PENALTY = 15
+# Landmarks per bidirectional query: more tighten p(v) little and cost a row read each
+_POTENTIAL_LANDMARKS = 3
+
+class Workspace:
+    """Per-query search lists for one graph, reused by one search at a time"""
+
+    def __init__(self, size):
+        self.size = size
+        self.stamp = 0
+        self.g = [0.0] * size
+        self.h = [0.0] * size
+        self.parent = [0] * size
+        # Edge (or CSR edge index) each node was last reached by
+        self.link = [None] * size
+        self.state = [0] * size
+        self._backward = None
+
+    def next_stamp(self):
+        """(opened, closed) stamps for a new query; anything lower is from an earlier one"""
+        self.stamp += 2
+        return self.stamp, self.stamp + 1
+
+    def backward(self):
+        """g, parent and state of the backward search, plus the stamps of h"""
+        if self._backward is None:
+            size = self.size
+            self._backward = ([0.0] * size, [0] * size, [0] * size, [0] * size)
+        return self._backward
+
+_pools = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+def _acquire(graph):
+    pool = _pools.get(graph)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(graph, [])
+    size = graph.node_count()
+    while pool:
+        try:
+            workspace = pool.pop()
+        except IndexError:
+            break
+        # Graphs that grew need bigger lists
+        if workspace.size >= size:
+            return workspace
+    return Workspace(size)
+
+def _release(graph, workspace):
+    pool = _pools.get(graph)
+    if pool is not None:
+        pool.append(workspace)
+
+def astar(graph, start_id, end_id, h=None, prune=False, stats=None, costs=None):
+    """
+    Route from start_id to end_id, or None. h: optional consistent h(node_id), by
+    default the penalty heuristic of algorithms.astar. prune: skip dead ends other
+    than the target, which is only safe with exact bounds such as ALT.
+    costs: optional ProfileCosts of a routing profile.
+    """
+    workspace = _acquire(graph)
+    try:
+        if isinstance(graph, CompactGraph):
+            return _astar_columns(graph, workspace, start_id, end_id, h, prune, stats, costs)
+        return _astar_objects(graph, workspace, start_id, end_id, h, prune, stats, costs)
+    finally:
+        _release(graph, workspace)
+
+def _block(states, costs, closed, start_id, end_id):
+    """Close the nodes a profile avoids in each state list; returns how many per list"""
+    if costs is None:
+        return 0
+    blocked = 0
+    for node_id in costs.blocked:
+        if node_id != start_id and node_id != end_id:
+            for state in states:
+                state[node_id] = closed
+            blocked += 1
+    return blocked
+
+def _astar_objects(graph, workspace, start_id, end_id, h, prune, stats, costs):
+    opened, closed = workspace.next_stamp()
+    g_score, h_score, parent, link, state = workspace.g, workspace.h, workspace.parent, workspace.link, workspace.state
+    adjacency, nodes = graph.adjacency, graph.nodes
+    floor_penalty = _FLOOR_PENALTY
+    if costs is not None:
+        adjacency, floor_penalty = costs.adjacency, costs.floor_penalty
+    blocked = _block((state,), costs, closed, start_id, end_id)
+    target = nodes[end_id]
+    tx, ty, t_floor, t_building = target.x, target.y, target.floor, target.building
+    if stats is None:
+        push, pop = heappush, heappop
+    else:
+        push, pop = stats.heap_ops()
+        began = perf_counter()
+    g_score[start_id] = 0
+    state[start_id] = opened
+    open_heap = []
+    push(open_heap, (0, start_id))
+    while open_heap:
+        _, current_id = pop(open_heap)
+        if state[current_id] == closed:
+            continue
+        if current_id == end_id:
+            if stats is None:
+                return _walk_objects(graph, parent, link, start_id, end_id, costs)
+            # The target is popped but never expanded
+            expanded = state.count(closed) - blocked
+            stats.searched(began, expanded, stats.pops - expanded - 1)
+            return stats.reconstruct(_walk_objects, graph, parent, link, start_id, end_id, costs)
+        state[current_id] = closed
+        current_g = g_score[current_id]
+        for edge in adjacency[current_id]:
+            neighbor_id = edge.to_id
+            seen = state[neighbor_id]
+            if seen == closed:
+                continue
+            if prune and neighbor_id != end_id and len(adjacency[neighbor_id]) <= 1:
+                continue
+            tentative_g = current_g + edge.weight
+            if seen != opened:
+                if h is None:
+                    node = nodes[neighbor_id]
+                    estimate = (((node.x - tx)**2 + (node.y - ty)**2) ** 0.5
+                                + (50 if node.building != t_building else 0)
+                                + abs(node.floor - t_floor) * floor_penalty
+                                + (5 if node.node_type == "room" else 0))
+                else:
+                    estimate = h(neighbor_id)
+                h_score[neighbor_id] = estimate
+                state[neighbor_id] = opened
+            elif tentative_g < g_score[neighbor_id]:
+                estimate = h_score[neighbor_id]
+            else:
+                continue
+            g_score[neighbor_id] = tentative_g
+            parent[neighbor_id] = current_id
+            link[neighbor_id] = edge
+            push(open_heap, (tentative_g + estimate, neighbor_id))
+    if stats is not None:
+        expanded = state.count(closed) - blocked
+        stats.searched(began, expanded, stats.pops - expanded)
+    return None
+
+def _walk_objects(graph, parent, link, start_id, end_id, costs=None):
+    path, edges = [end_id], []
+    node_id = end_id
+    while node_id != start_id:
+        edges.append(link[node_id])
+        node_id = parent[node_id]
+        path.append(node_id)
+    path.reverse()
+    edges.reverse()
+    if costs is not None:
+        # Profile costs are for the search; the route reports real distances
+        edges = costs.original_edges(graph, path, edges)
+    return Route(graph, path, edges)
+
+def _astar_columns(graph, workspace, start_id, end_id, h, prune, stats, costs):
+    opened, closed = workspace.next_stamp()
+    g_score, h_score, parent, link, state = workspace.g, workspace.h, workspace.parent, workspace.link, workspace.state
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    floor_penalty = _FLOOR_PENALTY
+    if costs is not None:
+        weights, floor_penalty = costs.weights, costs.floor_penalty
+    blocked = _block((state,), costs, closed, start_id, end_id)
+    xs, ys, floors, buildings, types = graph.x, graph.y, graph.floor, graph.building, graph.node_type
+    tx, ty, t_floor, t_building = xs[end_id], ys[end_id], floors[end_id], buildings[end_id]
+    if stats is None:
+        push, pop = heappush, heappop
+    else:
+        push, pop = stats.heap_ops()
+        began = perf_counter()
+    g_score[start_id] = 0
+    state[start_id] = opened
+    open_heap = []
+    push(open_heap, (0, start_id))
+    while open_heap:
+        _, current_id = pop(open_heap)
+        if state[current_id] == closed:
+            continue
+        if current_id == end_id:
+            if stats is None:
+                return _walk_columns(graph, parent, link, start_id, end_id)
+            expanded = state.count(closed) - blocked
+            stats.searched(began, expanded, stats.pops - expanded - 1)
+            return stats.reconstruct(_walk_columns, graph, parent, link, start_id, end_id)
+        state[current_id] = closed
+        current_g = g_score[current_id]
+        for i in range(offsets[current_id], offsets[current_id + 1]):
+            neighbor_id = targets[i]
+            seen = state[neighbor_id]
+            if seen == closed:
+                continue
+            if prune and neighbor_id != end_id and offsets[neighbor_id + 1] - offsets[neighbor_id] <= 1:
+                continue
+            tentative_g = current_g + weights[i]
+            if seen != opened:
+                if h is None:
+                    estimate = (((xs[neighbor_id] - tx)**2 + (ys[neighbor_id] - ty)**2) ** 0.5
+                                + (50 if buildings[neighbor_id] != t_building else 0)
+                                + abs(floors[neighbor_id] - t_floor) * floor_penalty
+                                + (5 if types[neighbor_id] == _ROOM else 0))
+                else:
+                    estimate = h(neighbor_id)
+                h_score[neighbor_id] = estimate
+                state[neighbor_id] = opened
+            elif tentative_g < g_score[neighbor_id]:
+                estimate = h_score[neighbor_id]
+            else:
+                continue
+            g_score[neighbor_id] = tentative_g
+            parent[neighbor_id] = current_id
+            link[neighbor_id] = i
+            push(open_heap, (tentative_g + estimate, neighbor_id))
+    if stats is not None:
+        expanded = state.count(closed) - blocked
+        stats.searched(began, expanded, stats.pops - expanded)
+    return None
+
+def _walk_columns(graph, parent, link, start_id, end_id):
+    targets, weights, bearings = graph.targets, graph.weights, graph.bearings
+    path, edges = [end_id], []
+    node_id = end_id
+    while node_id != start_id:
+        i = link[node_id]
+        edges.append(Edge(targets[i], weights[i], bearings[i]))
+        node_id = parent[node_id]
+        path.append(node_id)
+    path.reverse()
+    edges.reverse()
+    return Route(graph, path, edges)
+
+def bidirectional(graph, start_id, end_id, scale, stats=None, costs=None, floor_scale=0.0, landmarks=None):
+    """
+    Bidirectional A* with balanced potentials p(v) = (d(v, end) - d(v, start)) * scale
+    + (|floor(v) - floor(end)| - |floor(v) - floor(start)|) * floor_scale,
+    see algorithms.astar.find_path_bidirectional_astar. Returns a Route or None.
+    costs: optional ProfileCosts; both scales must then come from it.
+    landmarks: optional LandmarkTable; each half of p(v) becomes the larger of the
+    term above and half the landmark bound, which only holds for edge costs at
+    least those the table was built on. Dead ends other than start and end are
+    never queued either way.
+    """
+    workspace = _acquire(graph)
+    try:
+        if isinstance(graph, CompactGraph):
+            xs, ys, floors = graph.x, graph.y, graph.floor
+            position = lambda node_id: (xs[node_id], ys[node_id], floors[node_id])
+            expand = _bidirectional_columns
+        else:
+            nodes = graph.nodes
+            position = lambda node_id: (nodes[node_id].x, nodes[node_id].y, nodes[node_id].floor)
+            expand = _bidirectional_objects
+        (sx, sy, s_floor), (ex, ey, e_floor) = position(start_id), position(end_id)
+        potential_of = None
+        if landmarks is not None:
+            potential_of = _landmark_potential(landmarks, start_id, end_id, position, scale, floor_scale)
+        if stats is None:
+            push, pop = heappush, heappop
+        else:
+            push, pop = stats.heap_ops()
+            began = perf_counter()
+        opened, closed = workspace.next_stamp()
+        fwd_g, fwd_parent, fwd_state = workspace.g, workspace.parent, workspace.state
+        bwd_g, bwd_parent, bwd_state, h_stamp = workspace.backward()
+        blocked = _block((fwd_state, bwd_state), costs, closed, start_id, end_id)
+        potentials = workspace.h
+        for node_id in (start_id, end_id):
+            x, y, floor = position(node_id)
+            potentials[node_id] = ((((x - ex)**2 + (y - ey)**2) ** 0.5 - ((x - sx)**2 + (y - sy)**2) ** 0.5) * scale
+                                   + (abs(floor - e_floor) - abs(floor - s_floor)) * floor_scale
+                                   if potential_of is None else potential_of(node_id))
+            h_stamp[node_id] = opened
+        fwd_g[start_id], fwd_state[start_id] = 0.0, opened
+        bwd_g[end_id], bwd_state[end_id] = 0.0, opened
+        # Per direction: open heap, g scores, parents, states, potential sign, then the other side's g and states
+        fwd_heap, bwd_heap = [], []
+        push(fwd_heap, (potentials[start_id], start_id))
+        push(bwd_heap, (-potentials[end_id], end_id))
+        fwd = (fwd_heap, fwd_g, fwd_parent, fwd_state, 1.0, bwd_g, bwd_state)
+        bwd = (bwd_heap, bwd_g, bwd_parent, bwd_state, -1.0, fwd_g, fwd_state)
+        meeting_node = expand(graph, fwd, bwd, potentials, h_stamp, opened, closed,
+                              (sx, sy, s_floor, ex, ey, e_floor, scale, floor_scale, potential_of, start_id, end_id),
+                              push, pop, costs)
+        if stats is not None:
+            expanded = fwd_state.count(closed) + bwd_state.count(closed) - 2 * blocked
+            stats.searched(began, expanded, stats.pops - expanded)
+        if meeting_node is None:
+            return None
+        if stats is not None:
+            return stats.reconstruct(_join_paths, graph, fwd_parent, bwd_parent, start_id, meeting_node, end_id)
+        return _join_paths(graph, fwd_parent, bwd_parent, start_id, meeting_node, end_id)
+    finally:
+        _release(graph, workspace)
+
+def _landmark_potential(table, start_id, end_id, position, scale, floor_scale):
+    """p(v) of bidirectional with each half raised to half the ALT bound where that is larger"""
+    (sx, sy, s_floor), (ex, ey, e_floor) = position(start_id), position(end_id)
+    # Landmarks that cannot reach both ends bound nothing here; of the rest, those that
+    # bound d(start, end) best are usually best along the way too
+    rows = [(row, row[end_id], row[start_id]) for row in table.rows if row[end_id] != INF and row[start_id] != INF]
+    rows.sort(key=lambda row: abs(row[1] - row[2]), reverse=True)
+    del rows[_POTENTIAL_LANDMARKS:]
+
+    def potential(node_id):
+        x, y, floor = position(node_id)
+        to_end = ((x - ex)**2 + (y - ey)**2) ** 0.5 * scale + abs(floor - e_floor) * floor_scale
+        to_start = ((x - sx)**2 + (y - sy)**2) ** 0.5 * scale + abs(floor - s_floor) * floor_scale
+        far_end = far_start = 0.0
+        for row, at_end, at_start in rows:
+            distance = row[node_id]
+            diff = at_end - distance
+            if diff < 0:
+                diff = -diff
+            if diff > far_end:
+                far_end = diff
+            diff = at_start - distance
+            if diff < 0:
+                diff = -diff
+            if diff > far_start:
+                far_start = diff
+        far_end *= 0.5
+        far_start *= 0.5
+        return (far_end if far_end > to_end else to_end) - (far_start if far_start > to_start else to_start)
+    return potential
+
+def _bidirectional_objects(graph, fwd, bwd, potentials, h_stamp, opened, closed, frame, push, pop, costs):
+    sx, sy, s_floor, ex, ey, e_floor, scale, floor_scale, potential_of, start_id, end_id = frame
+    # A node with one edge is never between start and end
+    dead = dead_ends(graph)
+    adjacency, nodes = graph.adjacency if costs is None else costs.adjacency, graph.nodes
+    fwd_heap, bwd_heap = fwd[0], bwd[0]
+    best_cost = INF
+    meeting_node = None
+    while fwd_heap and bwd_heap:
+        if fwd_heap[0][0] + bwd_heap[0][0] >= best_cost:
+            break
+        # Expand the side with the smaller frontier
+        open_heap, g_score, parent, state, sign, other_g, other_state = fwd if len(fwd_heap) <= len(bwd_heap) else bwd
+        _, current_id = pop(open_heap)
+        if state[current_id] == closed:
+            continue
+        state[current_id] = closed
+        current_g = g_score[current_id]
+        for edge in adjacency[current_id]:
+            neighbor_id = edge.to_id
+            seen = state[neighbor_id]
+            if seen == closed or dead[neighbor_id] and neighbor_id != end_id and neighbor_id != start_id:
+                continue
+            tentative_g = current_g + edge.weight
+            if tentative_g < (g_score[neighbor_id] if seen == opened else INF):
+                g_score[neighbor_id] = tentative_g
+                parent[neighbor_id] = current_id
+                state[neighbor_id] = opened
+                if h_stamp[neighbor_id] == opened:
+                    potential = potentials[neighbor_id]
+                elif potential_of is None:
+                    node = nodes[neighbor_id]
+                    x, y, floor = node.x, node.y, node.floor
+                    potential = potentials[neighbor_id] = (
+                        (((x - ex)**2 + (y - ey)**2) ** 0.5 - ((x - sx)**2 + (y - sy)**2) ** 0.5) * scale
+                        + (abs(floor - e_floor) - abs(floor - s_floor)) * floor_scale)
+                    h_stamp[neighbor_id] = opened
+                else:
+                    potential = potentials[neighbor_id] = potential_of(neighbor_id)
+                    h_stamp[neighbor_id] = opened
+                push(open_heap, (tentative_g + sign * potential, neighbor_id))
+                # Seen by the other side in this query (opened or closed)
+                if other_state[neighbor_id] >= opened:
+                    total_cost = tentative_g + other_g[neighbor_id]
+                    if total_cost < best_cost:
+                        best_cost = total_cost
+                        meeting_node = neighbor_id
+    return meeting_node
+
+def _bidirectional_columns(graph, fwd, bwd, potentials, h_stamp, opened, closed, frame, push, pop, costs):
+    sx, sy, s_floor, ex, ey, e_floor, scale, floor_scale, potential_of, start_id, end_id = frame
+    # A node with one edge is never between start and end
+    dead = dead_ends(graph)
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights if costs is None else costs.weights
+    xs, ys, floors = graph.x, graph.y, graph.floor
+    fwd_heap, bwd_heap = fwd[0], bwd[0]
+    best_cost = INF
+    meeting_node = None
+    while fwd_heap and bwd_heap:
+        if fwd_heap[0][0] + bwd_heap[0][0] >= best_cost:
+            break
+        open_heap, g_score, parent, state, sign, other_g, other_state = fwd if len(fwd_heap) <= len(bwd_heap) else bwd
+        _, current_id = pop(open_heap)
+        if state[current_id] == closed:
+            continue
+        state[current_id] = closed
+        current_g = g_score[current_id]
+        for i in range(offsets[current_id], offsets[current_id + 1]):
+            neighbor_id = targets[i]
+            seen = state[neighbor_id]
+            if seen == closed or dead[neighbor_id] and neighbor_id != end_id and neighbor_id != start_id:
+                continue
+            tentative_g = current_g + weights[i]
+            if tentative_g < (g_score[neighbor_id] if seen == opened else INF):
+                g_score[neighbor_id] = tentative_g
+                parent[neighbor_id] = current_id
+                state[neighbor_id] = opened
+                if h_stamp[neighbor_id] == opened:
+                    potential = potentials[neighbor_id]
+                elif potential_of is None:
+                    x, y, floor = xs[neighbor_id], ys[neighbor_id], floors[neighbor_id]
+                    potential = potentials[neighbor_id] = (
+                        (((x - ex)**2 + (y - ey)**2) ** 0.5 - ((x - sx)**2 + (y - sy)**2) ** 0.5) * scale
+                        + (abs(floor - e_floor) - abs(floor - s_floor)) * floor_scale)
+                    h_stamp[neighbor_id] = opened
+                else:
+                    potential = potentials[neighbor_id] = potential_of(neighbor_id)
+                    h_stamp[neighbor_id] = opened
+                push(open_heap, (tentative_g + sign * potential, neighbor_id))
+                if other_state[neighbor_id] >= opened:
+                    total_cost = tentative_g + other_g[neighbor_id]
+                    if total_cost < best_cost:
+                        best_cost = total_cost
+                        meeting_node = neighbor_id
+    return meeting_node
+
+def _join_paths(graph, fwd_parent, bwd_parent, start_id, meeting_node, end_id):
+    path = [meeting_node]
+    while path[-1] != start_id:
+        path.append(fwd_parent[path[-1]])
+    path.reverse()
+    while path[-1] != end_id:
+        path.append(bwd_parent[path[-1]])
+    edges = [edge_between(graph, path[i], path[i + 1]) for i in range(len(path) - 1)]
+    return Route(graph, path, edges)
+
+_dead_ends = weakref.WeakKeyDictionary()
+
+def dead_ends(graph):
+    """bytearray with 1 for every node with at most one edge, cached per graph version"""
+    cached = _dead_ends.get(graph)
+    if cached is not None and cached[0] == graph.version:
+        return cached[1]
+    if isinstance(graph, CompactGraph):
+        offsets = graph.offsets
+        mask = bytearray(offsets[i + 1] - offsets[i] <= 1 for i in range(graph.node_count()))
+    else:
+        mask = bytearray(len(edges) <= 1 for edges in graph.adjacency)
+    _dead_ends[graph] = (graph.version, mask)
+    return mask
+
+def one_to_many(graph, source_id, target_ids, costs=None, blocked=()):
+    """
+    {target id: (cost, node id path from source_id)} for the targets reachable
+    from source_id, by a Dijkstra that stops once all of them are settled.
+    Dead ends other than targets are never queued. blocked: node ids not to
+    pass through, e.g. those a profile avoids; costs: ProfileCosts or None.
+    """
+    waiting = set(target_ids)
+    waiting.discard(source_id)
+    found = {source_id: (0.0, [source_id])} if source_id in target_ids else {}
+    if not waiting:
+        return found
+    workspace = _acquire(graph)
+    try:
+        opened, closed = workspace.next_stamp()
+        g_score, parent, state = workspace.g, workspace.parent, workspace.state
+        for node_id in blocked:
+            state[node_id] = closed
+        g_score[source_id] = 0.0
+        state[source_id] = opened
+        search = _one_to_many_columns if isinstance(graph, CompactGraph) else _one_to_many_objects
+        search(graph, source_id, waiting, costs, dead_ends(graph), g_score, parent, state, opened, closed)
+        for target_id in target_ids:
+            if target_id != source_id and state[target_id] == closed:
+                path = [target_id]
+                while path[-1] != source_id:
+                    path.append(parent[path[-1]])
+                path.reverse()
+                found[target_id] = (g_score[target_id], path)
+        return found
+    finally:
+        _release(graph, workspace)
+
+def _one_to_many_objects(graph, source_id, waiting, costs, dead, g_score, parent, state, opened, closed):
+    adjacency = graph.adjacency if costs is None else costs.adjacency
+    open_heap = [(0.0, source_id)]
+    while open_heap:
+        current_g, current_id = heappop(open_heap)
+        if state[current_id] == closed:
+            continue
+        state[current_id] = closed
+        if current_id in waiting:
+            waiting.discard(current_id)
+            if not waiting:
+                return
+        for edge in adjacency[current_id]:
+            neighbor_id = edge.to_id
+            seen = state[neighbor_id]
+            if seen == closed:
+                continue
+            if dead[neighbor_id] and neighbor_id not in waiting:
+                continue
+            tentative_g = current_g + edge.weight
+            if seen != opened or tentative_g < g_score[neighbor_id]:
+                g_score[neighbor_id] = tentative_g
+                parent[neighbor_id] = current_id
+                state[neighbor_id] = opened
+                heappush(open_heap, (tentative_g, neighbor_id))
+
+def _one_to_many_columns(graph, source_id, waiting, costs, dead, g_score, parent, state, opened, closed):
+    offsets, targets = graph.offsets, graph.targets
+    weights = graph.weights if costs is None else costs.weights
+    open_heap = [(0.0, source_id)]
+    while open_heap:
+        current_g, current_id = heappop(open_heap)
+        if state[current_id] == closed:
+            continue
+        state[current_id] = closed
+        if current_id in waiting:
+            waiting.discard(current_id)
+            if not waiting:
+                return
+        for i in range(offsets[current_id], offsets[current_id + 1]):
+            neighbor_id = targets[i]
+            seen = state[neighbor_id]
+            if seen == closed:
+                continue
+            if dead[neighbor_id] and neighbor_id not in waiting:
+                continue
+            tentative_g = current_g + weights[i]
+            if seen != opened or tentative_g < g_score[neighbor_id]:
+                g_score[neighbor_id] = tentative_g
+                parent[neighbor_id] = current_id
+                state[neighbor_id] = opened
+                heappush(open_heap, (tentative_g, neighbor_id))
@@ -0,0 +1,229 @@
+"""
+MultiStop: One route through several rooms, visited in a short order
+Distances between all stops come from one Dijkstra per stop (indexed.one_to_many)
+that ends once the stops it still needs are settled. Edges are symmetric, so the
+search from the i-th stop only waits for the stops after it and later searches
+stop sooner. A kiosk stop with a loaded shortest-path tree is not searched.
+The order is exact (Held-Karp) up to EXACT_STOPS stops; beyond that a
+nearest-neighbour tour is improved by 2-opt and Or-opt moves until neither
+finds a gain. The legs are joined into one Route, which marks where each stop
+is reached.
+"""
+from algorithms import indexed
+from algorithms.profiles import profile_costs
+from algorithms.route import Route, edge_between
+
+INF = float("inf")
+# Held-Karp takes 2^n * n^2 steps: 10 ms at 10 stops on a desktop, each extra stop about doubles it
+EXACT_STOPS = 10
+
+class MultiStopRoute(Route):
+    """A Route through several stops; stops are node ids in visiting order"""
+
+    def __init__(self, graph, path, edges, stops, arrivals, fixed_end=False):
+        super().__init__(graph, path, edges)
+        self.stops = stops
+        # Whether the last node was asked for, rather than just the last stop
+        self.fixed_end = fixed_end
+        # Index of the edge that reaches each stop
+        self.arrivals = arrivals
+        self._stop_steps = None
+
+    @property
+    def stop_steps(self):
+        """{step index: stop number (1-based)} for the steps that end at a stop"""
+        if self._stop_steps is None:
+            legs = self.legs
+            steps, i = {}, 0
+            for number, arrival in enumerate(self.arrivals, 1):
+                while i + 1 < len(legs) and legs[i + 1] <= arrival:
+                    i += 1
+                steps[i] = number
+            self._stop_steps = steps
+        return self._stop_steps
+
+    def step(self, i):
+        step = super().step(i)
+        step["stop"] = self.stop_steps.get(i)
+        return step
+
+    def stops_after(self, i):
+        """Codes of the stops not yet reached once step i is walked"""
+        reached = max((number for step, number in self.stop_steps.items() if step <= i), default=0)
+        return [self.graph.get_node(node_id).code for node_id in self.stops[reached:]]
+
+def _distance_matrix(graph, node_ids, costs=None, blocked=(), trees=None):
+    """
+    (matrix of costs between node_ids, {i: {j: (cost, path)}} for every j > i).
+    trees: optional TreeStore whose loaded trees (kiosks) stand in for a search.
+    """
+    n = len(node_ids)
+    legs = {}
+    for i in range(n):
+        later = node_ids[i + 1:]
+        code = graph.get_node(node_ids[i]).code if trees is not None else None
+        if code is not None and trees.loaded(code, graph):
+            tree = trees.tree(code, graph)
+            legs[i] = {}
+            for target_id in later:
+                path = tree.path_to(target_id)
+                if path is not None:
+                    legs[i][target_id] = (tree.distances[target_id], path)
+        else:
+            legs[i] = indexed.one_to_many(graph, node_ids[i], later, costs, blocked)
+    distance = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        found = legs[i]
+        for j in range(i + 1, n):
+            leg = found.get(node_ids[j])
+            distance[i][j] = distance[j][i] = leg[0] if leg is not None else INF
+    return distance, legs
+
+def _held_karp(matrix, n):
+    """Exact shortest order of stops 1..n-2 between fixed ends 0 and n-1"""
+    inner = n - 2
+    full = (1 << inner) - 1
+    # best[mask][j]: cost from 0 through the stops in mask, ending at stop j + 1
+    best = [[INF] * inner for _ in range(full + 1)]
+    came = [[-1] * inner for _ in range(full + 1)]
+    for j in range(inner):
+        best[1 << j][j] = matrix[0][j + 1]
+    for mask in range(1, full + 1):
+        row = best[mask]
+        for j in range(inner):
+            cost = row[j]
+            if cost == INF or not mask >> j & 1:
+                continue
+            distances = matrix[j + 1]
+            for k in range(inner):
+                if mask >> k & 1:
+                    continue
+                candidate = cost + distances[k + 1]
+                next_mask = mask | 1 << k
+                if candidate < best[next_mask][k]:
+                    best[next_mask][k] = candidate
+                    came[next_mask][k] = j
+    last = min(range(inner), key=lambda j: best[full][j] + matrix[j + 1][n - 1])
+    order, mask = [], full
+    while last != -1:
+        order.append(last + 1)
+        last, mask = came[mask][last], mask & ~(1 << last)
+    order.reverse()
+    return [0] + order + [n - 1]
+
+def _nearest_neighbour(matrix, n):
+    order, left = [0], set(range(1, n - 1))
+    while left:
+        distances = matrix[order[-1]]
+        nearest = min(left, key=lambda j: distances[j])
+        order.append(nearest)
+        left.discard(nearest)
+    return order + [n - 1]
+
+def _two_opt(matrix, order):
+    """Reverse inner segments while that shortens the tour; True if anything changed"""
+    improved = False
+    changed = True
+    while changed:
+        changed = False
+        for i in range(1, len(order) - 2):
+            a, b = order[i - 1], order[i]
+            for j in range(i + 1, len(order) - 1):
+                c, e = order[j], order[j + 1]
+                if matrix[a][c] + matrix[b][e] < matrix[a][b] + matrix[c][e] - 1e-9:
+                    order[i:j + 1] = order[i:j + 1][::-1]
+                    b = order[i]
+                    changed = improved = True
+    return improved
+
+def _or_opt(matrix, order):
+    """Move runs of up to three stops (either way round) to a cheaper place; True if anything moved"""
+    improved = False
+    changed = True
+    while changed:
+        changed = False
+        for length in (1, 2, 3):
+            for i in range(1, len(order) - length):
+                first, last = order[i], order[i + length - 1]
+                before, after = order[i - 1], order[i + length]
+                gain = matrix[before][first] + matrix[last][after] - matrix[before][after]
+                rest = order[:i] + order[i + length:]
+                best, best_k, best_reversed = gain - 1e-9, None, False
+                for k in range(len(rest) - 1):
+                    x, y = rest[k], rest[k + 1]
+                    forward = matrix[x][first] + matrix[last][y] - matrix[x][y]
+                    backward = matrix[x][last] + matrix[first][y] - matrix[x][y]
+                    if forward < best:
+                        best, best_k, best_reversed = forward, k, False
+                    if backward < best:
+                        best, best_k, best_reversed = backward, k, True
+                if best_k is not None:
+                    run = order[i:i + length]
+                    order[:] = rest[:best_k + 1] + (run[::-1] if best_reversed else run) + rest[best_k + 1:]
+                    changed = improved = True
+    return improved
+
+def visiting_order(matrix, exact_stops=EXACT_STOPS):
+    """
+    Order of matrix rows 0..n-1 that starts at 0, ends at n-1 and is short.
+    matrix[i][j] is the cost from i to j; the end row is never left, so an open
+    route ends wherever it likes if its column is all zeros.
+    """
+    n = len(matrix)
+    if n <= 3:
+        return list(range(n))
+    if n - 2 <= exact_stops:
+        return _held_karp(matrix, n)
+    order = _nearest_neighbour(matrix, n)
+    # Each move can undo the other's local optimum, so alternate until both are stuck
+    while _two_opt(matrix, order) | _or_opt(matrix, order):
+        pass
+    return order
+
+def find_multi_stop_route(graph, start_code: str, stop_codes, end_code=None, profile=None, exact_stops=EXACT_STOPS,
+                          trees=None):
+    """
+    MultiStopRoute from start_code through every room in stop_codes, in the
+    shortest order found, or a failure dict. Repeated stops and stops equal to
+    the start or end are dropped. end_code: where the route finishes (start_code
+    for a round trip); None ends at whichever stop is last in the best order.
+    profile: routing profile name or RoutingProfile, see algorithms.profiles.
+    trees: TreeStore of kiosk trees; a stop (usually the start) with a loaded
+    tree is read off it instead of searched. Trees hold default-profile costs.
+    """
+    stops = list(dict.fromkeys(code for code in stop_codes if code not in (start_code, end_code)))
+    codes = [start_code] + stops
+    if end_code is not None and end_code != start_code:
+        codes.append(end_code)
+    if any(code not in graph.lookup for code in codes):
+        return {"success": False, "error": "Room not found"}
+    node_ids = [graph.lookup[code] for code in codes]
+    costs = profile_costs(graph, profile)
+    # Avoided nodes stay usable as stops, like the start and end of a search
+    blocked = set(costs.blocked) - set(node_ids) if costs is not None else ()
+    distance, legs = _distance_matrix(graph, node_ids, costs, blocked, trees if costs is None else None)
+    n = len(node_ids)
+    if any(distance[0][j] == INF for j in range(1, n)):
+        return {"success": False, "error": "No path found"}
+    end = None if end_code is None else codes.index(end_code)
+    # Start and stops, then a last column for the finish: the end room, or anywhere at no cost
+    size = len(stops) + 1
+    matrix = [row[:size] + [0.0 if end is None else row[end]] for row in distance[:size]]
+    matrix.append([0.0] * (size + 1))
+    order = visiting_order(matrix, exact_stops)[:-1]
+    if end is not None:
+        order.append(end)
+    path, arrivals = [node_ids[0]], []
+    for a, b in zip(order, order[1:]):
+        if a == b:
+            continue
+        # A leg is read off the tree of whichever end was searched from
+        source, target = (a, b) if a < b else (b, a)
+        leg = legs[source][node_ids[target]][1]
+        path.extend(leg[1:] if source == a else leg[-2::-1])
+        arrivals.append(len(path) - 2)
+    edges = [edge_between(graph, path[i], path[i + 1]) for i in range(len(path) - 1)]
+    if end is not None:
+        # The finish is where the route ends, not a stop
+        order, arrivals = order[:-1], arrivals[:len(order) - 2]
+    return MultiStopRoute(graph, path, edges, [node_ids[i] for i in order[1:]], arrivals, end is not None)
@@ -0,0 +1,177 @@
+"""
+Profiles: Routing profiles that re-cost edges without rebuilding the graph
+A profile multiplies edge weights by the type of the nodes an edge touches,
+adds a cost per floor changed, and can rule out node types altogether. Its
+edge costs are derived once per graph version and cached beside the graph:
+CompactGraph gets a replacement weights array, GraphDB/GraphView a parallel
+adjacency list that shares every Edge whose cost is unchanged. Avoided nodes
+are closed before a search starts, so the search loops are the same as for
+the default profile.
+"""
+import threading
+import weakref
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+from db.compact import CompactGraph
+from db.graph_db import Edge, NODE_TYPES
+
+# Floor term of the default A* heuristic, see algorithms.astar.heuristic
+FLOOR_PENALTY = 15
+
+@dataclass(frozen=True)
+class RoutingProfile:
+    name: str
+    # Multiplier for edges into or out of a node of this type; the larger one wins
+    type_factors: Dict[str, float] = field(default_factory=dict)
+    # Added to an edge per floor between its endpoints
+    floor_change_cost: float = 0.0
+    # Node types a route never passes through (its own start and end excepted)
+    avoid: Tuple[str, ...] = ()
+
+    @property
+    def is_default(self):
+        return not self.type_factors and not self.floor_change_cost and not self.avoid
+
+PROFILES = {
+    "default": RoutingProfile("default"),
+    # No stairs; floors are changed by elevator only
+    "accessible": RoutingProfile("accessible", avoid=("stairs",)),
+    # Elevator rides count double for the wait, so stairs win unless much longer
+    "fastest": RoutingProfile("fastest", type_factors={"elevator": 2.0}),
+    # A floor change costs as much as a long walk on the same floor
+    "fewest_floor_changes": RoutingProfile("fewest_floor_changes", floor_change_cost=100.0),
+}
+
+def get_profile(profile):
+    """RoutingProfile for a name or profile (None is the default profile)"""
+    if profile is None:
+        return PROFILES["default"]
+    if isinstance(profile, RoutingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown routing profile {profile!r}, expected one of {', '.join(PROFILES)}") from None
+
+class ProfileCosts:
+    """Edge costs, avoided nodes and heuristic constants of one profile on one graph version"""
+
+    def __init__(self, graph, profile):
+        self.profile = profile
+        self.version = graph.version
+        # The A* heuristic keeps pace with the extra cost of changing floors
+        self.floor_penalty = FLOOR_PENALTY + profile.floor_change_cost
+        self.adjacency = None
+        self.weights = None
+        if isinstance(graph, CompactGraph):
+            types = [NODE_TYPES[code] for code in graph.node_type]
+            self.floors = graph.floor
+        else:
+            types = [node.node_type for node in graph.nodes]
+            self.floors = [node.floor for node in graph.nodes]
+        self.factors = [profile.type_factors.get(node_type, 1.0) for node_type in types]
+        avoid = set(profile.avoid)
+        self.blocked = tuple(node_id for node_id, node_type in enumerate(types) if node_type in avoid)
+        if isinstance(graph, CompactGraph):
+            self.weights = self._weights(graph)
+        else:
+            self.adjacency = self._adjacency(graph)
+        self.scale = self.per_floor = None
+
+    def cost(self, from_id, to_id, weight):
+        """Profile cost of an edge of the given weight"""
+        factors, floors = self.factors, self.floors
+        factor = factors[from_id] if factors[from_id] > factors[to_id] else factors[to_id]
+        return weight * factor + self.profile.floor_change_cost * abs(floors[from_id] - floors[to_id])
+
+    def _weights(self, graph):
+        offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+        costs = array("d", weights)
+        for node_id in range(graph.node_count()):
+            for i in range(offsets[node_id], offsets[node_id + 1]):
+                costs[i] = self.cost(node_id, targets[i], weights[i])
+        return costs
+
+    def _adjacency(self, graph):
+        if not self.profile.type_factors and not self.profile.floor_change_cost:
+            return graph.adjacency
+        adjacency = []
+        for node_id, edges in enumerate(graph.adjacency):
+            row = None
+            for k, edge in enumerate(edges):
+                to_id = edge.to_id
+                cost = self.cost(node_id, to_id, edge.weight)
+                if cost != edge.weight:
+                    if row is None:
+                        row = list(edges)
+                    row[k] = Edge(to_id, cost, edge.bearing)
+            # Unchanged rows are the graph's own lists
+            adjacency.append(edges if row is None else row)
+        return adjacency
+
+    def original_edges(self, graph, path, edges):
+        """The graph's own edges for a path found on this profile's adjacency"""
+        if self.adjacency is None or self.adjacency is graph.adjacency:
+            return edges
+        originals = []
+        for node_id, edge in zip(path, edges):
+            row = self.adjacency[node_id]
+            k = next(k for k, candidate in enumerate(row) if candidate is edge)
+            originals.append(graph.adjacency[node_id][k])
+        return originals
+
+    def heuristic_scale(self, graph):
+        """Like algorithms.astar.heuristic_scale, on this profile's costs"""
+        if self.scale is None:
+            self._bounds(graph)
+        return self.scale
+
+    def floor_scale(self, graph):
+        """Like algorithms.astar.floor_scale, on this profile's costs"""
+        if self.scale is None:
+            self._bounds(graph)
+        return self.per_floor
+
+    def _bounds(self, graph):
+        if self.weights is not None:
+            xs, ys = graph.x, graph.y
+            offsets, targets, weights = graph.offsets, graph.targets, self.weights
+            costs_from = lambda node_id: ((targets[i], weights[i]) for i in range(offsets[node_id], offsets[node_id + 1]))
+        else:
+            xs, ys = [node.x for node in graph.nodes], [node.y for node in graph.nodes]
+            adjacency = self.adjacency
+            costs_from = lambda node_id: ((edge.to_id, edge.weight) for edge in adjacency[node_id])
+        floors = self.floors
+        scale = 1.0
+        # (cost, distance, floors) of every floor-changing edge, bounded once scale is known
+        climbs = []
+        for node_id in range(graph.node_count()):
+            x, y, floor = xs[node_id], ys[node_id], floors[node_id]
+            for to_id, cost in costs_from(node_id):
+                distance = ((x - xs[to_id])**2 + (y - ys[to_id])**2) ** 0.5
+                if distance > 0 and cost < scale * distance:
+                    scale = max(cost, 0.0) / distance
+                if floors[to_id] != floor:
+                    climbs.append((cost, distance, abs(floors[to_id] - floor)))
+        per_floor = min(((cost - scale * distance) / floor_diff for cost, distance, floor_diff in climbs), default=0.0)
+        self.per_floor = max(per_floor, 0.0)
+        self.scale = scale
+
+_costs = weakref.WeakKeyDictionary()
+_costs_lock = threading.Lock()
+
+def profile_costs(graph, profile):
+    """Cached ProfileCosts for graph, or None for the default profile"""
+    profile = get_profile(profile)
+    if profile.is_default:
+        return None
+    with _costs_lock:
+        per_graph = _costs.get(graph)
+        if per_graph is None:
+            per_graph = _costs[graph] = {}
+        costs = per_graph.get(profile.name)
+        if costs is None or costs.version != graph.version or costs.profile != profile:
+            costs = per_graph[profile.name] = ProfileCosts(graph, profile)
+        return costs
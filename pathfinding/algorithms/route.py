@@ -0,0 +1,170 @@
+"""
+Route: Lightweight route result with lazily generated instructions
+A search only records the node id path, the traversed edges and cumulative
+distance/time; each instruction step is built when a caller asks for it.
+Routes still read like the original result dict (route["instructions"] etc.)
+A ride through several floors of a shaft is one step, not one per landing.
+"""
+from array import array
+from collections.abc import Mapping
+
+from db.graph_db import VERTICAL_TYPES
+
+_KEYS = ("success", "start_room", "end_room", "total_distance", "total_time", "instructions")
+
+def step_time(weight):
+    return max(3, int(weight / 1.4))
+
+class Route(Mapping):
+    def __init__(self, graph, path, edges):
+        self.graph = graph
+        self.path = array("I", path)
+        self.edges = edges
+        self.cumulative_distance = array("d")
+        self.cumulative_time = array("I")
+        total_distance = 0
+        total_time = 0
+        for edge in edges:
+            total_distance += edge.weight
+            total_time += step_time(edge.weight)
+            self.cumulative_distance.append(total_distance)
+            self.cumulative_time.append(total_time)
+        self._legs = None
+        self._instructions = None
+
+    @property
+    def legs(self):
+        """Index of the first edge of every step, found on first use"""
+        if self._legs is None:
+            legs = array("I")
+            previous = self.graph.get_node(self.path[0])
+            riding = False
+            for i in range(len(self.edges)):
+                node = self.graph.get_node(self.path[i + 1])
+                ride = (previous.node_type in VERTICAL_TYPES and node.node_type in VERTICAL_TYPES
+                        and previous.floor != node.floor)
+                if not (ride and riding):
+                    legs.append(i)
+                previous, riding = node, ride
+            self._legs = legs
+        return self._legs
+
+    @property
+    def step_count(self):
+        return len(self.legs)
+
+    @property
+    def total_distance(self):
+        return int(self.cumulative_distance[-1]) if self.edges else 0
+
+    @property
+    def total_time(self):
+        return self.cumulative_time[-1] if self.edges else 0
+
+    def step(self, i):
+        edges, legs = self.edges, self.legs
+        first = legs[i]
+        last = legs[i + 1] - 1 if i + 1 < len(legs) else len(edges) - 1
+        edge = edges[last]
+        if first == last:
+            distance, time = edge.weight, step_time(edge.weight)
+        else:
+            distance = self.cumulative_distance[last] - self.cumulative_distance[first - 1] if first else self.cumulative_distance[last]
+            time = self.cumulative_time[last] - self.cumulative_time[first - 1] if first else self.cumulative_time[last]
+        from_node = self.graph.get_node(self.path[first])
+        to_node = self.graph.get_node(self.path[last + 1])
+        turn_direction = calculate_turn_direction(edges[first-1].bearing if first > 0 else 0, edge.bearing)
+        return {
+            "step": i + 1,
+            "from_node": from_node,
+            "to_node": to_node,
+            "distance": int(distance),
+            "bearing": edge.bearing,
+            "turn_direction": turn_direction,
+            "instruction": generate_instruction(from_node, to_node, turn_direction, distance),
+            "time": time
+        }
+
+    def steps(self, start=0):
+        for i in range(start, self.step_count):
+            yield self.step(i)
+
+    def to_dict(self):
+        return {key: self[key] for key in _KEYS}
+
+    def nbytes(self):
+        return (self.path.itemsize * len(self.path) + 8 * len(self.edges)
+                + self.cumulative_distance.itemsize * len(self.cumulative_distance)
+                + self.cumulative_time.itemsize * len(self.cumulative_time))
+
+    def __reduce__(self):
+        # Pickle as the plain result dict rather than dragging the graph along
+        return (dict, (self.to_dict(),))
+
+    def __getitem__(self, key):
+        if key == "success":
+            return True
+        if key == "start_room":
+            return self.graph.get_node(self.path[0])
+        if key == "end_room":
+            return self.graph.get_node(self.path[-1])
+        if key == "total_distance":
+            return self.total_distance
+        if key == "total_time":
+            return self.total_time
+        if key == "instructions":
+            # Full list only for callers that still want everything at once
+            if self._instructions is None:
+                self._instructions = list(self.steps())
+            return self._instructions
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(_KEYS)
+
+    def __len__(self):
+        return len(_KEYS)
+
+def edge_between(graph, from_id, to_id):
+    return min((edge for edge in graph.neighbors(from_id) if edge.to_id == to_id), key=lambda edge: edge.weight)
+
+def calculate_turn_direction(prev_bearing, current_bearing):
+    angle_diff = (current_bearing - prev_bearing + 360) % 360
+    if angle_diff < 30 or angle_diff > 330:
+        return "straight"
+    elif 30 <= angle_diff <= 150:
+        return "right"
+    elif 210 <= angle_diff <= 330:
+        return "left"
+    else:
+        return "u_turn"
+
+def generate_instruction(from_node, to_node, turn_direction, distance):
+    if to_node.node_type == "stairs":
+        if to_node.floor > from_node.floor:
+            return f"Take stairs up to floor {to_node.floor}"
+        elif to_node.floor < from_node.floor:
+            return f"Take stairs down to floor {to_node.floor}"
+        else:
+            return "Take stairs"
+    if to_node.node_type == "elevator":
+        if to_node.floor > from_node.floor:
+            return f"Take elevator up to floor {to_node.floor}"
+        elif to_node.floor < from_node.floor:
+            return f"Take elevator down to floor {to_node.floor}"
+        else:
+            return "Go to elevator"
+    action_map = {
+        "straight": "Continue straight",
+        "left": "Turn left",
+        "right": "Turn right",
+        "u_turn": "Turn around"
+    }
+    action = action_map.get(turn_direction, "Walk")
+    if to_node.node_type == "room":
+        return f"{action} to {to_node.name}"
+    elif to_node.node_type == "corridor":
+        return f"{action} along corridor"
+    elif to_node.node_type == "entrance":
+        return f"{action} to {to_node.name}"
+    return f"{action} toward {to_node.name}"
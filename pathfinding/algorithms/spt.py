@@ -0,0 +1,161 @@
+"""
+SPT: One-to-many routing from fixed kiosk nodes
+A single Dijkstra from the kiosk node stores a shortest-path tree as a
+predecessor array and a distance array. Any route from (or, on the symmetric
+campus graph, to) that node is then read off the tree in O(path length).
+Trees are written next to the graph and memory-mapped on first use.
+"""
+import heapq
+import mmap
+import os
+import struct
+from array import array
+
+from algorithms.astar import build_route
+from algorithms.route import edge_between
+
+INF = float("inf")
+_MAGIC = b"RNAVSPT2"
+_HEADER = struct.Struct("<8sIIIQ")
+_PRED_TYPE = next(code for code in "ilq" if array(code).itemsize == 4)
+
+class ShortestPathTree:
+    def __init__(self, source_id, distances, predecessors, edge_count, source=None, revision=0):
+        self.source_id = source_id
+        self.distances = distances
+        self.predecessors = predecessors
+        self.edge_count = edge_count
+        # Change log revision of the graph the tree was built on
+        self.revision = revision
+        self._source = source
+
+    @classmethod
+    def build(cls, graph, source_id):
+        distances = array("d", [INF]) * graph.node_count()
+        predecessors = array(_PRED_TYPE, [-1]) * graph.node_count()
+        distances[source_id] = 0.0
+        open_heap = [(0.0, source_id)]
+        while open_heap:
+            distance, node_id = heapq.heappop(open_heap)
+            if distance > distances[node_id]:
+                continue
+            for edge in graph.neighbors(node_id):
+                candidate = distance + edge.weight
+                if candidate < distances[edge.to_id]:
+                    distances[edge.to_id] = candidate
+                    predecessors[edge.to_id] = node_id
+                    heapq.heappush(open_heap, (candidate, edge.to_id))
+        return cls(source_id, distances, predecessors, graph.edge_count(), revision=getattr(graph, "revision", 0))
+
+    def path_to(self, node_id):
+        """Node ids from the tree source to node_id, or None when unreachable"""
+        if self.distances[node_id] == INF:
+            return None
+        path = [node_id]
+        while path[-1] != self.source_id:
+            path.append(self.predecessors[path[-1]])
+        path.reverse()
+        return path
+
+    def close(self):
+        source, self._source = self._source, None
+        if source is not None:
+            mm, view = source
+            self.distances.release()
+            self.predecessors.release()
+            view.release()
+            mm.close()
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(_HEADER.pack(_MAGIC, self.source_id, len(self.distances), self.edge_count, self.revision))
+            self.distances.tofile(fp)
+            self.predecessors.tofile(fp)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path, graph):
+        with open(path, "rb") as fp:
+            mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, source_id, node_count, edge_count, revision = _HEADER.unpack_from(mm, 0)
+        if (magic != _MAGIC or node_count != graph.node_count() or edge_count != graph.edge_count()
+                or revision != getattr(graph, "revision", 0)):
+            mm.close()
+            raise ValueError(f"{path}: tree does not match this graph")
+        view = memoryview(mm)
+        distances_end = _HEADER.size + node_count * 8
+        distances = view[_HEADER.size:distances_end].cast("d")
+        predecessors = view[distances_end:distances_end + node_count * 4].cast(_PRED_TYPE)
+        return cls(source_id, distances, predecessors, edge_count, source=(mm, view), revision=revision)
+
+class TreeStore:
+    """Shortest-path trees per source node, loaded from or saved to directory on demand"""
+
+    def __init__(self, graph, directory=None):
+        self.graph = graph
+        self.directory = directory
+        self.version = graph.version
+        self._trees = {}
+        self._trust_disk = True
+
+    def _path(self, source_code):
+        return os.path.join(self.directory, f"{source_code.encode('utf-8').hex()}.spt")
+
+    def loaded(self, code, graph=None):
+        """Whether a tree for code is in memory for graph (a view; the live graph by default)"""
+        return (graph or self.graph).version == self.version and code in self._trees
+
+    def tree(self, source_code, graph=None):
+        """Tree rooted at source_code on graph, a view of self.graph taken now by default"""
+        graph = self.graph.view() if graph is None else graph
+        if graph.version != self.version:
+            if graph.version != self.graph.version:
+                # A view the live graph has moved on from: its tree is not worth keeping
+                return ShortestPathTree.build(graph, graph.lookup[source_code])
+            # Trees on disk or in memory describe an older graph
+            for old in self._trees.values():
+                old.close()
+            self._trees.clear()
+            self.version = graph.version
+            self._trust_disk = False
+        tree = self._trees.get(source_code)
+        if tree is not None:
+            return tree
+        source_id = graph.lookup[source_code]
+        path = self._path(source_code) if self.directory else None
+        if path and self._trust_disk and os.path.exists(path):
+            try:
+                tree = ShortestPathTree.open(path, graph)
+            except ValueError:
+                tree = None
+            if tree is not None and tree.source_id != source_id:
+                tree.close()
+                tree = None
+        if tree is None:
+            tree = ShortestPathTree.build(graph, source_id)
+            if path:
+                os.makedirs(self.directory, exist_ok=True)
+                tree.save(path)
+        self._trees[source_code] = tree
+        return tree
+
+    def find_path(self, start_code, end_code, graph=None):
+        """
+        Route via a loaded tree rooted at either end, building one for start_code
+        otherwise. graph: the view to route on, taken now by default.
+        """
+        graph = self.graph.view() if graph is None else graph
+        if start_code not in graph.lookup or end_code not in graph.lookup:
+            return {"success": False, "error": "Room not found"}
+        if self.loaded(end_code, graph) and not self.loaded(start_code, graph):
+            # Edges are symmetric, so the tree of the destination works in reverse
+            path = self.tree(end_code, graph).path_to(graph.lookup[start_code])
+            if path is not None:
+                path.reverse()
+        else:
+            path = self.tree(start_code, graph).path_to(graph.lookup[end_code])
+        if path is None:
+            return {"success": False, "error": "No path found"}
+        edges = [edge_between(graph, path[i], path[i + 1]) for i in range(len(path) - 1)]
+        return build_route(graph, path, edges)
@@ -0,0 +1,190 @@
+"""
+Stats: Optional per-query search counters and timings, exported as metrics
+Searches take stats=None. Given a SearchStats they bind counting versions of
+heappush/heappop and time each phase; with None they bind the plain heapq
+functions, so turning instrumentation off leaves the search loops untouched.
+MetricsRecorder folds queries into counters and latency histograms and writes
+them as a Prometheus text file (for node_exporter's textfile collector) and/or
+one JSON line per query, so percentiles can be taken across devices.
+"""
+import heapq
+import json
+import os
+import socket
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Tuple
+
+# Upper bounds in seconds; a Pi answers most queries in a few milliseconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+PHASES = ("search", "reconstruct", "instructions")
+COUNTERS = ("expanded", "pushes", "pops", "stale_pops")
+METRIC_PREFIX = "raspinav_route"
+
+@dataclass
+class SearchStats:
+    algorithm: str = ""
+    success: bool = False
+    expanded: int = 0
+    pushes: int = 0
+    pops: int = 0
+    stale_pops: int = 0
+    # Largest number of entries (stale ones included) queued at once, over all heaps
+    peak_open: int = 0
+    open_size: int = 0
+    search_time: float = 0.0
+    reconstruct_time: float = 0.0
+    instructions_time: float = 0.0
+
+    def heap_ops(self):
+        """(heappush, heappop) that count into these stats"""
+        push, pop = heapq.heappush, heapq.heappop
+
+        def counting_push(heap, item):
+            push(heap, item)
+            self.pushes += 1
+            self.open_size += 1
+            if self.open_size > self.peak_open:
+                self.peak_open = self.open_size
+
+        def counting_pop(heap):
+            item = pop(heap)
+            self.pops += 1
+            self.open_size -= 1
+            return item
+
+        return counting_push, counting_pop
+
+    def searched(self, began, expanded, stale_pops):
+        """End the search phase that started at perf_counter() == began"""
+        self.search_time = time.perf_counter() - began
+        self.expanded = expanded
+        self.stale_pops = stale_pops
+
+    def reconstruct(self, build, *args):
+        """Run build(*args), which returns a Route, as the reconstruction phase"""
+        began = time.perf_counter()
+        route = build(*args)
+        self.reconstruct_time = time.perf_counter() - began
+        self.success = True
+        return self.watch(route)
+
+    def watch(self, route):
+        """Time instruction generation on route as its steps are built"""
+        step = route.step
+
+        def timed_step(i):
+            began = time.perf_counter()
+            try:
+                return step(i)
+            finally:
+                self.instructions_time += time.perf_counter() - began
+
+        # An instance attribute, so unwatched routes keep the plain method
+        route.step = timed_step
+        return route
+
+    def as_dict(self):
+        record = asdict(self)
+        del record["open_size"]
+        return record
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+class MetricsRecorder:
+    """
+    Aggregates SearchStats per algorithm. Record a query once its instructions
+    have been generated (or are no longer wanted) so that phase is included.
+    """
+
+    def __init__(self, prometheus_path=None, jsonl_path=None, buckets=LATENCY_BUCKETS):
+        self.prometheus_path = prometheus_path
+        self.jsonl_path = jsonl_path
+        self.buckets = tuple(buckets)
+        self.queries: Dict[Tuple[str, str], int] = {}
+        self.totals: Dict[str, Dict[str, int]] = {}
+        self.peak_open: Dict[str, int] = {}
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+
+    def record(self, stats: SearchStats):
+        algorithm = stats.algorithm or "unknown"
+        outcome = "found" if stats.success else "not_found"
+        with self._lock:
+            key = (algorithm, outcome)
+            self.queries[key] = self.queries.get(key, 0) + 1
+            totals = self.totals.setdefault(algorithm, dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                totals[name] += getattr(stats, name)
+            self.peak_open[algorithm] = max(self.peak_open.get(algorithm, 0), stats.peak_open)
+            for phase in PHASES:
+                histogram = self.latency.get((algorithm, phase))
+                if histogram is None:
+                    histogram = self.latency[(algorithm, phase)] = _Histogram(self.buckets)
+                histogram.observe(getattr(stats, f"{phase}_time"))
+            if self.jsonl_path:
+                line = json.dumps({"ts": round(time.time(), 3), "host": self.host, **stats.as_dict()},
+                                  separators=(",", ":"))
+                with open(self.jsonl_path, "a", encoding="utf-8") as fp:
+                    fp.write(line + "\n")
+
+    def prometheus(self):
+        """Everything recorded so far in the Prometheus text exposition format"""
+        lines = []
+
+        def header(name, kind, text):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+
+        with self._lock:
+            header("queries_total", "counter", "Route searches by algorithm and outcome")
+            for (algorithm, outcome), count in sorted(self.queries.items()):
+                lines.append(f'{METRIC_PREFIX}_queries_total{{algorithm="{algorithm}",outcome="{outcome}"}} {count}')
+            for name, text in (("expanded", "Nodes expanded"), ("pushes", "Heap pushes"),
+                               ("pops", "Heap pops"), ("stale_pops", "Heap pops of already closed nodes")):
+                header(f"{name}_total", "counter", text)
+                for algorithm, totals in sorted(self.totals.items()):
+                    lines.append(f'{METRIC_PREFIX}_{name}_total{{algorithm="{algorithm}"}} {totals[name]}')
+            header("peak_open", "gauge", "Largest open set seen by a single search")
+            for algorithm, peak in sorted(self.peak_open.items()):
+                lines.append(f'{METRIC_PREFIX}_peak_open{{algorithm="{algorithm}"}} {peak}')
+            header("phase_seconds", "histogram", "Time per query spent searching, rebuilding the path and generating instructions")
+            for (algorithm, phase), histogram in sorted(self.latency.items()):
+                labels = f'algorithm="{algorithm}",phase="{phase}"'
+                for bound, count in histogram.cumulative():
+                    lines.append(f'{METRIC_PREFIX}_phase_seconds_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'{METRIC_PREFIX}_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{METRIC_PREFIX}_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{METRIC_PREFIX}_phase_seconds_count{{{labels}}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Rewrite the Prometheus text file, if one is configured"""
+        if not self.prometheus_path:
+            return
+        tmp_path = f"{self.prometheus_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            fp.write(self.prometheus())
+        # The collector must never scrape a half-written file
+        os.replace(tmp_path, self.prometheus_path)
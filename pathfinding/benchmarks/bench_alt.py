@@ -0,0 +1,46 @@
+"""
+ALT benchmark: expansions and latency of find_path_astar with and without landmarks
+Run from the repository root: python pathfinding/benchmarks/bench_alt.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.alt import landmark_table
+from algorithms.astar import find_path_astar, find_path_bidirectional_astar
+from benchmarks.bench_bidirectional import LAYOUT, measure
+from db.synthetic import build_campus, campus_size
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--landmarks", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    per_building = campus_size(buildings=1, **LAYOUT) - 1
+    print(f"{'nodes':>8} {'search':>14} {'expanded':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for size in args.sizes:
+        graph = build_campus(buildings=max(1, round(size / per_building)), **LAYOUT)
+        begin = time.perf_counter()
+        table = landmark_table(graph, args.landmarks)
+        build_ms = (time.perf_counter() - begin) * 1000
+        rng = random.Random(args.seed)
+        rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+        pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+        searches = (
+            ("astar", find_path_astar),
+            ("astar+alt", lambda g, s, e, stats=None: find_path_astar(g, s, e, landmarks=table, stats=stats)),
+            ("bidirectional", find_path_bidirectional_astar),
+        )
+        for name, search in searches:
+            stats = measure(search, graph, pairs)
+            print(f"{graph.node_count():>8} {name:>14} {stats['expansions']:>9.0f} {stats['p50']:>8.2f} {stats['p95']:>8.2f}")
+        print(f"{'':>8} landmarks: {len(table.landmarks)} built in {build_ms:.0f} ms, {table.nbytes() / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Alternative routes benchmark: latency and quality of find_alternative_routes
+Builds a synthetic campus and runs the same random queries for several k on the
+GraphDB and on its CompactGraph. Latencies are per-query minimums over --repeat
+rounds; "vs single" divides the p50 by that of one bidirectional A* search.
+Quality columns are the average number of routes found, and over the
+alternatives found, the average length relative to the shortest route and the
+average share of length overlapping an earlier route.
+Run from the repository root: python pathfinding/benchmarks/bench_alternatives.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.synthetic import build_campus
+from algorithms.alternatives import _edge_lengths, find_alternative_routes
+from algorithms.astar import find_path_bidirectional_astar, heuristic_scale
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def timed(function, *args):
+    began = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - began
+
+def quality(graph, pairs, k):
+    found, stretch, overlap, alternatives = 0, 0.0, 0.0, 0
+    for start, end in pairs:
+        routes = find_alternative_routes(graph, start, end, k)
+        found += len(routes)
+        if not routes[0]["success"]:
+            continue
+        shortest = sum(edge.weight for edge in routes[0].edges)
+        earlier = [_edge_lengths(routes[0])]
+        for route in routes[1:]:
+            lengths = _edge_lengths(route)
+            length = sum(lengths.values())
+            stretch += length / shortest
+            overlap += max(sum(w for key, w in lengths.items() if key in other) for other in earlier) / length
+            earlier.append(lengths)
+            alternatives += 1
+    alternatives = max(1, alternatives)
+    return found / len(pairs), stretch / alternatives, overlap / alternatives
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=8)
+    parser.add_argument("--floors", type=int, default=6)
+    parser.add_argument("--rooms-per-floor", type=int, default=60)
+    parser.add_argument("--corridors-per-floor", type=int, default=2)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--k", type=int, nargs="+", default=[2, 3, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    graph = build_campus(buildings=args.buildings, floors=args.floors, rooms_per_floor=args.rooms_per_floor,
+                         stairwells=2, corridors_per_floor=args.corridors_per_floor, seed=args.seed)
+    rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+    rng = random.Random(args.seed)
+    pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+    print(f"{graph.node_count()} nodes, {graph.edge_count()} edges, {len(pairs)} queries")
+    for label, target in (("GraphDB", graph), ("CompactGraph", graph.compact())):
+        heuristic_scale(target)
+        single = percentile([min(timed(find_path_bidirectional_astar, target, start, end) for _ in range(args.repeat))
+                             for start, end in pairs], 0.5)
+        print(f"\n{label}: single search p50 {single * 1000:.3f} ms")
+        print(f"  {'k':<4}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'vs single':>11}{'routes':>8}{'stretch':>9}{'overlap':>9}")
+        for k in args.k:
+            latencies = [min(timed(find_alternative_routes, target, start, end, k) for _ in range(args.repeat))
+                         for start, end in pairs]
+            p50 = percentile(latencies, 0.5)
+            found, stretch, overlap = quality(target, pairs, k)
+            print(f"  {k:<4}{p50 * 1000:>9.3f}{percentile(latencies, 0.95) * 1000:>9.3f}{max(latencies) * 1000:>9.3f}"
+                  f"{p50 / single:>10.1f}x{found:>8.2f}{stretch:>9.2f}{overlap:>9.2f}")
+
+if __name__ == "__main__":
+    main()
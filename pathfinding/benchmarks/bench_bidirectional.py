@@ -0,0 +1,93 @@
+"""
+Bidirectional A* benchmark: node expansions and latency against admissible A*
+Unidirectional A* runs with the same scaled Euclidean + per-floor bound as the
+bidirectional potentials and with ALT landmarks; both return optimal routes.
+The default find_path_astar heuristic adds building, floor and room penalties
+that can overestimate, so it is listed for reference with the number of routes
+longer than optimal. "+alt" rows pass landmarks=True.
+Run from the repository root: python pathfinding/benchmarks/bench_bidirectional.py
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms import indexed
+from algorithms.alt import landmark_table
+from algorithms.astar import euclidean_to, find_path_astar, find_path_bidirectional_astar, floor_scale, heuristic_scale
+from algorithms.stats import SearchStats
+from db.synthetic import build_campus, campus_size
+
+LAYOUT = dict(floors=5, rooms_per_floor=50, stairwells=2, corridors_per_floor=2, entrances=1)
+
+def admissible_astar(graph, start_code, end_code, stats=None):
+    """indexed.astar with h(v) = c * d(v, end) + k * |floor(v) - floor(end)|, the bidirectional bound"""
+    end_id = graph.lookup[end_code]
+    scale, per_floor = heuristic_scale(graph), floor_scale(graph)
+    to_end, e_floor, nodes = euclidean_to(graph, end_id), graph.nodes[end_id].floor, graph.nodes
+    h = lambda node_id: to_end(node_id) * scale + abs(nodes[node_id].floor - e_floor) * per_floor
+    route = indexed.astar(graph, graph.lookup[start_code], end_id, h, stats=stats)
+    return route if route is not None else {"success": False, "error": "No path found"}
+
+SEARCHES = {
+    "astar": admissible_astar,
+    "alt": lambda graph, start, end, stats=None: find_path_astar(graph, start, end, landmarks=True, stats=stats),
+    "bidirectional": find_path_bidirectional_astar,
+    "bidirectional+alt": lambda graph, start, end, stats=None: find_path_bidirectional_astar(
+        graph, start, end, stats=stats, landmarks=True),
+    "penalty astar": find_path_astar,
+}
+
+def measure(search, graph, pairs, counted=True):
+    """counted: search takes stats=SearchStats(), which supplies the expansion count"""
+    latencies, expansions, distances = [], [], []
+    for start, end in pairs:
+        if counted:
+            stats = SearchStats()
+            result = search(graph, start, end, stats=stats)
+            expansions.append(stats.expanded)
+        else:
+            result = search(graph, start, end)
+            expansions.append(0)
+        begin = time.perf_counter()
+        search(graph, start, end)
+        latencies.append((time.perf_counter() - begin) * 1000)
+        distances.append(sum(step["distance"] for step in result["instructions"]) if result["success"] else None)
+    latencies.sort()
+    return {
+        "expansions": statistics.mean(expansions),
+        "p50": latencies[len(latencies) // 2],
+        "p95": latencies[int(len(latencies) * 0.95)],
+        "distances": distances,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    per_building = campus_size(buildings=1, **LAYOUT) - 1
+    print(f"{'nodes':>8} {'search':>18} {'expanded':>9} {'p50 ms':>8} {'p95 ms':>8} {'longer':>7}")
+    for size in args.sizes:
+        graph = build_campus(buildings=max(1, round(size / per_building)), **LAYOUT)
+        heuristic_scale(graph)
+        floor_scale(graph)
+        landmark_table(graph)
+        rng = random.Random(args.seed)
+        rooms = [code for code in graph.lookup if graph.get_node(graph.lookup[code]).node_type == "room"]
+        pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+        results = {name: measure(search, graph, pairs) for name, search in SEARCHES.items()}
+        optimal = results["astar"]["distances"]
+        for name, stats in results.items():
+            # Routes longer than the optimal ones admissible A* found
+            longer = sum(1 for a, b in zip(stats["distances"], optimal) if a is not None and b is not None and a > b)
+            print(f"{graph.node_count():>8} {name:>18} {stats['expansions']:>9.0f} "
+                  f"{stats['p50']:>8.2f} {stats['p95']:>8.2f} {longer:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Graph build benchmark: GraphDB connection generation from 1k to 100k nodes
+Run from the repository root: python pathfinding/benchmarks/bench_build.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.graph_db import GraphDB
+from db.synthetic import generate_campus, campus_size
+
+LAYOUT = dict(floors=5, rooms_per_floor=50, stairwells=2, corridors_per_floor=2, entrances=1)
+
+def build(buildings):
+    graph = GraphDB(build_campus=False)
+    for record in generate_campus(buildings=buildings, **LAYOUT):
+        graph.add_node(*record)
+    start = time.perf_counter()
+    graph._generate_connections()
+    return graph, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000, 50000, 100000])
+    args = parser.parse_args()
+    per_building = campus_size(buildings=1, **LAYOUT) - 1
+    print(f"{'nodes':>8} {'edges':>9} {'build ms':>10} {'us/node':>8}")
+    for size in args.sizes:
+        buildings = max(1, round(size / per_building))
+        graph, elapsed = build(buildings)
+        edges = sum(len(adj) for adj in graph.adjacency)
+        print(f"{len(graph.nodes):>8} {edges:>9} {elapsed * 1000:>10.1f} {elapsed * 1e6 / len(graph.nodes):>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Hierarchical routing benchmark: portal overlay against flat bidirectional A*
+Run from the repository root: python pathfinding/benchmarks/bench_hierarchy.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from algorithms.astar import find_path_bidirectional_astar
+from algorithms.hierarchy import find_path_hierarchical, hierarchical_router
+from benchmarks.bench_bidirectional import measure
+from db.synthetic import build_campus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--floors", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--rooms-per-floor", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'floors':>6} {'nodes':>8} {'search':>14} {'expanded':>9} {'p50 ms':>8} {'p95 ms':>8} {'mismatch':>8}")
+    for floors in args.floors:
+        graph = build_campus(buildings=args.buildings, floors=floors, rooms_per_floor=args.rooms_per_floor,
+                             corridors_per_floor=2, stairwells=2)
+        begin = time.perf_counter()
+        router = hierarchical_router(graph)
+        build_ms = (time.perf_counter() - begin) * 1000
+        rng = random.Random(args.seed)
+        rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+        pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+        flat = measure(find_path_bidirectional_astar, graph, pairs)
+        overlay = measure(find_path_hierarchical, graph, pairs, counted=False)
+        mismatch = sum(1 for a, b in zip(flat["distances"], overlay["distances"]) if a != b)
+        # The overlay search keeps no stats, so only the flat search has an expansion count
+        print(f"{floors:>6} {graph.node_count():>8} {'bidirectional':>14} {flat['expansions']:>9.0f} "
+              f"{flat['p50']:>8.2f} {flat['p95']:>8.2f} {mismatch:>8}")
+        print(f"{floors:>6} {graph.node_count():>8} {'hierarchical':>14} {'-':>9} "
+              f"{overlay['p50']:>8.2f} {overlay['p95']:>8.2f} {mismatch:>8}")
+        print(f"{'':>6} overlay: {router.portal_count()} portals, {router.shortcut_count()} shortcuts, built in {build_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+LED matrix benchmark: frame composition and pixels sent per navigation step
+Replays the steps of random routes on a synthetic campus through LEDMatrix with
+a backend that only counts, and compares the pixels sent against pushing the
+whole frame on every step.
+Run from the repository root: python pathfinding/benchmarks/bench_led.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.synthetic import build_campus
+from algorithms.astar import find_path_bidirectional_astar
+from display.led_matrix import LEDMatrix
+
+class CountingBackend:
+    def __init__(self):
+        self.writes = 0
+        self.pixels = 0
+        self.rows = 0
+
+    def write(self, changes):
+        self.writes += 1
+        self.pixels += len(changes)
+        self.rows += len({y for _, y, _ in changes})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    graph = build_campus(buildings=2, floors=5, rooms_per_floor=50, stairwells=2)
+    rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+    rng = random.Random(args.seed)
+    steps = []
+    while len(steps) < args.routes * 4:
+        result = find_path_bidirectional_astar(graph, rng.choice(rooms), rng.choice(rooms))
+        if result["success"]:
+            steps.extend(result["instructions"])
+    backend = CountingBackend()
+    display = LEDMatrix(backend)
+    began = time.perf_counter()
+    for instruction in steps:
+        display.display_step(instruction)
+    elapsed = time.perf_counter() - began
+    full = len(steps) * display.size * display.size
+    print(f"{len(steps)} steps in {elapsed * 1000:.1f} ms ({elapsed / len(steps) * 1e6:.1f} us per step)")
+    print(f"  pixels sent {backend.pixels} of {full} ({backend.pixels / full:.1%}), "
+          f"{backend.pixels / len(steps):.1f} per step")
+    print(f"  rows sent   {backend.rows} of {len(steps) * display.size} "
+          f"({backend.rows / (len(steps) * display.size):.1%})")
+
+if __name__ == "__main__":
+    main()
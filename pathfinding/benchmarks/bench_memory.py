@@ -0,0 +1,41 @@
+"""
+Memory benchmark: object-based GraphDB against the columnar CompactGraph
+Run from the repository root: python pathfinding/benchmarks/bench_memory.py
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.synthetic import build_campus, campus_size
+
+LAYOUT = dict(floors=5, rooms_per_floor=50, stairwells=2, corridors_per_floor=2, entrances=1)
+
+def traced(factory):
+    gc.collect()
+    tracemalloc.start()
+    result = factory()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    args = parser.parse_args()
+    per_building = campus_size(buildings=1, **LAYOUT) - 1
+    print(f"{'nodes':>8} {'edges':>9} {'GraphDB MiB':>12} {'compact MiB':>12} {'saved':>7}")
+    for size in args.sizes:
+        buildings = max(1, round(size / per_building))
+        graph, graph_bytes, _ = traced(lambda: build_campus(buildings=buildings, **LAYOUT))
+        compact, compact_bytes, _ = traced(graph.compact)
+        print(f"{graph.node_count():>8} {graph.edge_count():>9} {graph_bytes / 2**20:>12.1f} "
+              f"{compact_bytes / 2**20:>12.1f} {1 - compact_bytes / graph_bytes:>7.0%}")
+        del graph, compact
+
+if __name__ == "__main__":
+    main()
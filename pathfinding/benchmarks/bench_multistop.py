@@ -0,0 +1,92 @@
+"""
+Multi-stop benchmark: planning time and route length against the typed order
+Builds synthetic campuses (--layout, a 3k- and a 15k-node one by default) and
+plans visits to random rooms with find_multi_stop_route on the GraphDB and on
+its CompactGraph. Planning time is
+split into the distance matrix (one-to-many searches) and the visiting order,
+and compared with chaining one bidirectional A* per leg in the order typed.
+"nn" is the length of the nearest-neighbour order alone, before 2-opt/Or-opt.
+Figures are the median of --repeat random stop lists. The run exits non-zero
+when planning --budget-stops stops takes longer than --budget-ms on any layout.
+Run from the repository root: python pathfinding/benchmarks/bench_multistop.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.synthetic import build_campus
+from algorithms.astar import find_path_bidirectional_astar, heuristic_scale
+from algorithms.multistop import _distance_matrix, _nearest_neighbour, find_multi_stop_route, visiting_order
+from bench_suite import parse_layout
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def plan(graph, stops):
+    """(matrix seconds, order seconds, planned m, nearest-neighbour m) for one visit"""
+    began = time.perf_counter()
+    route = find_multi_stop_route(graph, stops[0], stops[1:])
+    total = time.perf_counter() - began
+    # The two phases again on their own, for the split; the route above is the timed one
+    distance, _ = _distance_matrix(graph, [graph.lookup[code] for code in stops])
+    matrix = [row + [0.0] for row in distance] + [[0.0] * (len(stops) + 1)]
+    began = time.perf_counter()
+    visiting_order(matrix)
+    ordering = time.perf_counter() - began
+    nn = _nearest_neighbour(matrix, len(matrix))
+    nn_length = sum(matrix[a][b] for a, b in zip(nn, nn[1:]))
+    return total - ordering, ordering, sum(edge.weight for edge in route.edges), nn_length
+
+def chained(graph, stops):
+    """(seconds, m) of one search per leg in the typed order"""
+    began = time.perf_counter()
+    length = sum(sum(edge.weight for edge in find_path_bidirectional_astar(graph, a, b).edges)
+                 for a, b in zip(stops, stops[1:]))
+    return time.perf_counter() - began, length
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--layout", type=parse_layout, action="append", metavar="BxFxRxS",
+                        help="campus to plan on, e.g. 40x6x60x2; may be repeated (default 8x6x60x2 and 40x6x60x2)")
+    parser.add_argument("--stops", type=int, nargs="+", default=[5, 10, 20, 50, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-stops", type=int, default=50)
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="most planning --budget-stops stops may take before the run counts as a regression")
+    args = parser.parse_args()
+    layouts = args.layout or [parse_layout("8x6x60x2"), parse_layout("40x6x60x2")]
+    over = []
+    for name, layout in layouts:
+        graph = build_campus(corridors_per_floor=2, seed=args.seed, **layout)
+        rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+        print(f"\n{name}: {graph.node_count()} nodes, {graph.edge_count()} edges")
+        for label, target in (("GraphDB", graph), ("CompactGraph", graph.compact())):
+            heuristic_scale(target)
+            print(f"\n{label}")
+            print(f"  {'stops':<7}{'matrix ms':>10}{'order ms':>10}{'total ms':>10}{'chain ms':>10}"
+                  f"{'planned m':>11}{'nn m':>9}{'typed m':>10}")
+            for count in args.stops:
+                rng = random.Random(args.seed + count)
+                runs = []
+                for _ in range(args.repeat):
+                    stops = rng.sample(rooms, count + 1)
+                    runs.append(plan(target, stops) + chained(target, stops))
+                matrix, ordering, planned, nn, chain, typed = (median(column) for column in zip(*runs))
+                total = (matrix + ordering) * 1000
+                print(f"  {count:<7}{matrix * 1000:>10.1f}{ordering * 1000:>10.1f}{total:>10.1f}{chain * 1000:>10.1f}"
+                      f"{planned:>11.0f}{nn:>9.0f}{typed:>10.0f}")
+                if count == args.budget_stops and total > args.budget_ms:
+                    over.append(f"{name} {label} {count} stops: {total:.0f} ms")
+    if over:
+        print(f"\nOver budget ({args.budget_ms:.0f} ms): {', '.join(over)}")
+        sys.exit(1)
+    print(f"\nWithin budget: {args.budget_stops} stops in <= {args.budget_ms:.0f} ms on every layout")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Routing profile benchmark: query latency per profile against the default
+Builds a synthetic campus with stairwells and an elevator per building, then
+runs the same random queries with bidirectional A* under each profile on the
+GraphDB and on its CompactGraph. Latencies are per-query minimums over --repeat
+rounds. The one-off cost of deriving a profile's edge costs is reported
+separately from the per-query figures.
+Run from the repository root: python pathfinding/benchmarks/bench_profiles.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.synthetic import build_campus
+from algorithms.astar import find_path_bidirectional_astar, heuristic_scale
+from algorithms.profiles import PROFILES, profile_costs
+from algorithms.stats import SearchStats
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run(graph, pairs, profile, repeat):
+    latencies = [min(timed(graph, start, end, profile) for _ in range(repeat)) for start, end in pairs]
+    expanded, distance, failed = 0, 0, 0
+    for start, end in pairs:
+        stats = SearchStats()
+        result = find_path_bidirectional_astar(graph, start, end, stats=stats, profile=profile)
+        expanded += stats.expanded
+        if result["success"]:
+            distance += result["total_distance"]
+        else:
+            failed += 1
+    return latencies, expanded, distance, failed
+
+def timed(graph, start, end, profile):
+    began = time.perf_counter()
+    find_path_bidirectional_astar(graph, start, end, profile=profile)
+    return time.perf_counter() - began
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=8)
+    parser.add_argument("--floors", type=int, default=6)
+    parser.add_argument("--rooms-per-floor", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    graph = build_campus(buildings=args.buildings, floors=args.floors, rooms_per_floor=args.rooms_per_floor,
+                         stairwells=2, elevators=1, seed=args.seed)
+    rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+    rng = random.Random(args.seed)
+    pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+    print(f"{graph.node_count()} nodes, {graph.edge_count()} edges, {len(pairs)} queries")
+    for label, target in (("GraphDB", graph), ("CompactGraph", graph.compact())):
+        heuristic_scale(target)
+        baseline = None
+        print(f"\n{label}")
+        print(f"  {'profile':<22}{'setup ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'vs default':>12}"
+              f"{'expanded':>10}{'avg m':>8}{'failed':>8}")
+        for name in PROFILES:
+            began = time.perf_counter()
+            costs = profile_costs(target, name)
+            if costs is not None:
+                costs.heuristic_scale(target)
+            setup = time.perf_counter() - began
+            latencies, expanded, distance, failed = run(target, pairs, name, args.repeat)
+            p50 = percentile(latencies, 0.5)
+            if baseline is None:
+                baseline = p50
+            found = max(1, len(pairs) - failed)
+            print(f"  {name:<22}{setup * 1000:>10.1f}{p50 * 1000:>9.3f}{percentile(latencies, 0.95) * 1000:>9.3f}"
+                  f"{p50 / baseline:>11.2f}x{expanded / len(pairs):>10.0f}{distance / found:>8.0f}{failed:>8}")
+
+if __name__ == "__main__":
+    main()
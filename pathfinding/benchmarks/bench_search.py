@@ -0,0 +1,61 @@
+"""
+Room search benchmark: prefix and fuzzy lookups on a large synthetic campus
+Room names are drawn from a small vocabulary so many rooms share words, as on
+a real campus. Run from the repository root: python pathfinding/benchmarks/bench_search.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.graph_db import GraphDB
+from db.synthetic import generate_campus
+from navigation.search import RoomSearch
+
+KINDS = ("Library", "Lecture Hall", "Classroom", "Group Room", "Office", "Lab", "Server Room",
+         "Meeting Room", "Kitchen", "Study Area", "Workshop", "Storage", "Seminar Room", "Lounge")
+QUERIES = ("lib", "server", "meeting room", "classrom", "grup room 12", "offce", "lab 3", "kitch", "1-2-00", "seminr")
+
+def build(rooms, seed):
+    rng = random.Random(seed)
+    buildings = max(1, rooms // 5000)
+    graph = GraphDB(build_campus=False)
+    for code, name, building, floor, x, y, node_type in generate_campus(
+            buildings=buildings, floors=10, rooms_per_floor=rooms // (buildings * 10), seed=seed):
+        if node_type == "room":
+            name = f"{rng.choice(KINDS)} {rng.randint(1, 400)}"
+        graph.add_node(code, name, building, floor, x, y, node_type)
+    return graph
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for rooms in args.rooms:
+        graph = build(rooms, args.seed)
+        begin = time.perf_counter()
+        index = RoomSearch(graph)
+        build_ms = (time.perf_counter() - begin) * 1000
+        print(f"\n{graph.node_count()} nodes, index built in {build_ms:.0f} ms")
+        print(f"{'query':>14} {'p50 us':>8} {'p95 us':>8}  top match")
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.repeat):
+                begin = time.perf_counter()
+                matches = index.search(query, args.k)
+                samples.append((time.perf_counter() - begin) * 1e6)
+            top = f"{matches[0][1].name} ({matches[0][0]})" if matches else "-"
+            print(f"{query:>14} {percentile(samples, 0.5):>8.0f} {percentile(samples, 0.95):>8.0f}  {top}")
+
+if __name__ == "__main__":
+    main()
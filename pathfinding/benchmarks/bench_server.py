@@ -0,0 +1,119 @@
+"""
+Routing server load test: concurrent keep-alive clients against navigation.server
+Starts a server on a synthetic campus (or targets a running one with --port/--unix),
+fetches the room list, then has each client send random /route requests back to
+back. Reports throughput, latency percentiles and the status mix (429/503 show
+backpressure at work).
+Run from the repository root: python pathfinding/benchmarks/bench_server.py --clients 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+PATHFINDING = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PATHFINDING)
+
+from db.synthetic import build_campus, campus_size
+
+LAYOUT = dict(floors=5, rooms_per_floor=50, stairwells=2, corridors_per_floor=2, entrances=1)
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+async def get(reader, writer, target):
+    """(status, parsed JSON body) of one request on a keep-alive connection"""
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+async def client(args, rooms, seed, latencies, statuses):
+    rng = random.Random(seed)
+    reader, writer = await connect(args)
+    try:
+        for _ in range(args.requests):
+            start, end = rng.choice(rooms), rng.choice(rooms)
+            began = time.perf_counter()
+            status, _ = await get(reader, writer, f"/route?from={start}&to={end}&steps={int(args.steps)}")
+            latencies.append((time.perf_counter() - began) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status in (429, 503):
+                # Honour Retry-After loosely so a rejected client does not spin
+                await asyncio.sleep(args.backoff)
+    finally:
+        writer.close()
+
+async def run(args):
+    reader, writer = await connect(args)
+    _, listing = await get(reader, writer, "/rooms")
+    writer.close()
+    rooms = [room["code"] for entries in listing["buildings"].values() for room in entries]
+    latencies, statuses = [], {}
+    began = time.perf_counter()
+    await asyncio.gather(*(client(args, rooms, args.seed + i, latencies, statuses) for i in range(args.clients)))
+    elapsed = time.perf_counter() - began
+    latencies.sort()
+    pick = lambda fraction: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+    print(f"{args.clients} clients x {args.requests} requests over {len(rooms)} rooms in {elapsed:.2f} s")
+    print(f"  throughput {len(latencies) / elapsed:.0f} req/s")
+    print(f"  latency ms  p50 {pick(0.5):.2f}  p95 {pick(0.95):.2f}  p99 {pick(0.99):.2f}  max {latencies[-1]:.2f}")
+    print(f"  statuses    {', '.join(f'{status}: {count}' for status, count in sorted(statuses.items()))}")
+
+def spawn(args, directory):
+    """Start navigation.server on a synthetic campus snapshot and point args at its Unix socket"""
+    snapshot = os.path.join(directory, "campus.snap")
+    per_building = campus_size(buildings=1, **LAYOUT) - 1
+    build_campus(buildings=max(1, round(args.nodes / per_building)), **LAYOUT).save(snapshot)
+    args.unix = os.path.join(directory, "server.sock")
+    command = [sys.executable, "-m", "navigation.server", "--snapshot", snapshot, "--unix", args.unix,
+               "--workers", str(args.workers), "--queue-limit", str(args.queue_limit),
+               "--client-limit", str(args.client_limit)]
+    server = subprocess.Popen(command, cwd=PATHFINDING, stdout=subprocess.PIPE, text=True)
+    # The server prints one line once it is listening
+    print(server.stdout.readline().strip())
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--steps", action="store_true", help="ask for instruction steps in every response")
+    parser.add_argument("--backoff", type=float, default=0.05, help="seconds a client waits after 429/503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="target a running server over TCP")
+    parser.add_argument("--unix", help="target a running server over its Unix socket")
+    parser.add_argument("--nodes", type=int, default=10000, help="campus size when starting a server")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--queue-limit", type=int, default=32)
+    parser.add_argument("--client-limit", type=int, default=4)
+    args = parser.parse_args()
+    if args.port or args.unix:
+        asyncio.run(run(args))
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        server = spawn(args, directory)
+        try:
+            asyncio.run(run(args))
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Shaft benchmark: build and query cost as buildings get taller
+Builds the same synthetic campus with per-floor shaft chains and with the old
+wiring, where every stairwell node linked to every corridor on every other floor
+of its building, then compares edges, build time and bidirectional A* queries
+between random rooms for a growing floor count. --every-floor gives each
+stairwell a node on every floor, as surveyed buildings usually have.
+Run from the repository root: python pathfinding/benchmarks/bench_shafts.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.graph_db import Edge, GraphDB
+from db.synthetic import generate_campus
+from algorithms.astar import find_path_bidirectional_astar, heuristic_scale
+from algorithms.stats import SearchStats
+
+class CliqueGraphDB(GraphDB):
+    """Stairwells wired the way graphs were before shafts"""
+
+    def _connect_stairs(self, stairs):
+        for corridor in self._groups.get(("corridor", stairs.building, None), ()):
+            if corridor.floor == stairs.floor:
+                continue
+            distance = 5 + abs(stairs.floor - corridor.floor) * 10
+            bearing = 0 if corridor.floor > stairs.floor else 180
+            self.adjacency[stairs.id].append(Edge(corridor.id, distance, bearing))
+            self.adjacency[corridor.id].append(Edge(stairs.id, distance, (bearing + 180) % 360))
+
+def build(cls, records):
+    graph = cls(build_campus=False)
+    for record in records:
+        graph.add_node(*record)
+    graph._generate_connections()
+    return graph
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run(graph, pairs, repeat):
+    heuristic_scale(graph)
+    latencies, expanded, distance = [], 0, 0
+    for start, end in pairs:
+        best = None
+        for _ in range(repeat):
+            began = time.perf_counter()
+            find_path_bidirectional_astar(graph, start, end)
+            elapsed = time.perf_counter() - began
+            best = elapsed if best is None else min(best, elapsed)
+        latencies.append(best)
+        stats = SearchStats()
+        distance += find_path_bidirectional_astar(graph, start, end, stats=stats)["total_distance"]
+        expanded += stats.expanded
+    return latencies, expanded, distance
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--floors", type=int, nargs="+", default=[3, 6, 12, 24, 48])
+    parser.add_argument("--buildings", type=int, default=2)
+    parser.add_argument("--rooms-per-floor", type=int, default=20)
+    parser.add_argument("--corridors-per-floor", type=int, default=2)
+    parser.add_argument("--every-floor", action="store_true", help="a stairwell node on every floor, not just the ground floor")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'floors':>6} {'model':<7}{'nodes':>8}{'edges':>9}{'build ms':>10}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'expanded':>10}{'avg m':>8}")
+    for floors in args.floors:
+        records = list(generate_campus(buildings=args.buildings, floors=floors, rooms_per_floor=args.rooms_per_floor,
+                                       stairwells=2, corridors_per_floor=args.corridors_per_floor, seed=args.seed))
+        if args.every_floor:
+            records += [(f"{code}-F{floor}", f"{name} Floor {floor}", building, floor, x, y, node_type)
+                        for code, name, building, _, x, y, node_type in records if node_type == "stairs"
+                        for floor in range(1, floors)]
+        rooms = [record[0] for record in records if record[6] == "room"]
+        rng = random.Random(args.seed)
+        pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+        for label, cls in (("clique", CliqueGraphDB), ("shaft", GraphDB)):
+            began = time.perf_counter()
+            graph = build(cls, records)
+            built = time.perf_counter() - began
+            latencies, expanded, distance = run(graph, pairs, args.repeat)
+            print(f"{floors:>6} {label:<7}{graph.node_count():>8}{graph.edge_count():>9}{built * 1000:>10.1f}"
+                  f"{percentile(latencies, 0.5) * 1000:>9.3f}{percentile(latencies, 0.95) * 1000:>9.3f}"
+                  f"{expanded / len(pairs):>10.0f}{distance / len(pairs):>8.0f}")
+
+if __name__ == "__main__":
+    main()
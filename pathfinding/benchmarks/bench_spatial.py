@@ -0,0 +1,69 @@
+"""
+Spatial index benchmark: nearest-node and radius queries on one large floor
+Compares SpatialIndex against a linear scan over the floor's nodes.
+Run from the repository root: python pathfinding/benchmarks/bench_spatial.py
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.spatial import spatial_index
+from db.synthetic import FLOOR_DEPTH, FLOOR_WIDTH, build_campus
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def timed(query, positions):
+    samples, results = [], []
+    for position in positions:
+        begin = time.perf_counter()
+        results.append(query(*position))
+        samples.append((time.perf_counter() - begin) * 1e6)
+    return samples, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--radius", type=float, nargs="+", default=[2.0, 10.0])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(f"{'nodes':>8} {'query':>12} {'build ms':>9} {'p50 us':>9} {'p95 us':>9} {'scan us':>9} {'hits':>7} {'mismatch':>8}")
+    for rooms in args.rooms:
+        graph = build_campus(buildings=1, floors=1, rooms_per_floor=rooms, corridors_per_floor=max(1, rooms // 50))
+        begin = time.perf_counter()
+        index = spatial_index(graph)
+        build_ms = (time.perf_counter() - begin) * 1000
+        floor_nodes = [(node.id, node.x, node.y) for node in graph.nodes if node.building == 1 and node.floor == 0]
+        rng = random.Random(args.seed)
+        positions = [(rng.uniform(0, FLOOR_WIDTH), rng.uniform(0, FLOOR_DEPTH)) for _ in range(args.queries)]
+
+        def scan_nearest(x, y):
+            return min((math.sqrt((x - px)**2 + (y - py)**2), node_id) for node_id, px, py in floor_nodes)
+
+        # The linear scan is slow on big floors, so it only checks a sample
+        checked = positions[:50]
+        samples, found = timed(lambda x, y: index.nearest(x, y, 1, 0), positions)
+        scan_samples, expected = timed(scan_nearest, checked)
+        mismatch = sum(1 for a, b in zip(found, expected) if a != b)
+        print(f"{graph.node_count():>8} {'nearest':>12} {build_ms:>9.1f} {percentile(samples, 0.5):>9.1f} "
+              f"{percentile(samples, 0.95):>9.1f} {percentile(scan_samples, 0.5):>9.0f} {len(found):>7} {mismatch:>8}")
+        for radius in args.radius:
+            def scan_within(x, y):
+                return sorted((d, node_id) for node_id, px, py in floor_nodes
+                              if (d := math.sqrt((x - px)**2 + (y - py)**2)) <= radius)
+            samples, found = timed(lambda x, y: index.within(x, y, radius, 1, 0), positions)
+            scan_samples, expected = timed(scan_within, checked)
+            mismatch = sum(1 for a, b in zip(found, expected) if a != b)
+            hits = sum(len(result) for result in found) / len(found)
+            print(f"{'':>8} {f'within {radius:g}m':>12} {'':>9} {percentile(samples, 0.5):>9.1f} "
+                  f"{percentile(samples, 0.95):>9.1f} {percentile(scan_samples, 0.5):>9.0f} {hits:>7.1f} {mismatch:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Startup benchmark: time to the menu, to a room list and to a first route
+Drives pathfinder.py in fresh processes through its menu, on the built-in
+campus and on a synthetic snapshot, timing each prompt from the input that led
+to it. The snapshot's room catalogue is written by a first, untimed run.
+Figures are the best of --repeat processes. The run exits non-zero when the
+menu or the room list takes longer than --budget-ms.
+Run from the repository root: python pathfinding/benchmarks/bench_startup.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PATHFINDING = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PATHFINDING)
+
+from db.synthetic import build_campus
+
+PATHFINDER = os.path.join(PATHFINDING, "pathfinder.py")
+MENU = "Choose: "
+
+class Session:
+    """One pathfinder.py process, answered prompt by prompt"""
+
+    def __init__(self, snapshot):
+        command = [sys.executable, PATHFINDER] + (["--snapshot", snapshot] if snapshot else [])
+        self.began = time.perf_counter()
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self.output = ""
+
+    def expect(self, prompt):
+        """Seconds from the last send (or the start) until prompt is shown"""
+        fd = self.process.stdout.fileno()
+        while prompt not in self.output:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise RuntimeError(f"pathfinder.py exited before {prompt!r}:\n{self.output}")
+            self.output += chunk.decode("utf-8", "replace")
+        self.output = self.output[self.output.index(prompt) + len(prompt):]
+        return time.perf_counter() - self.began
+
+    def send(self, line):
+        self.process.stdin.write(f"{line}\n".encode())
+        self.began = time.perf_counter()
+
+    def close(self):
+        self.send("4")
+        self.process.stdin.close()
+        self.process.stdout.read()
+        self.process.wait()
+
+def list_rooms(snapshot):
+    session = Session(snapshot)
+    menu = session.expect(MENU)
+    session.send("2")
+    rooms = session.expect(MENU)
+    session.close()
+    return menu, rooms
+
+def first_route(snapshot, start, end):
+    session = Session(snapshot)
+    session.expect(MENU)
+    session.send("1")
+    session.expect("Start room")
+    began = time.perf_counter()
+    session.send(start)
+    session.expect("End room: ")
+    session.send(end)
+    session.expect("Start navigation?")
+    route = time.perf_counter() - began
+    session.send("n")
+    session.expect(MENU)
+    session.close()
+    return route
+
+def measure(label, snapshot, start, end, args):
+    menu, rooms = zip(*(list_rooms(snapshot) for _ in range(args.repeat)))
+    route = min(first_route(snapshot, start, end) for _ in range(args.repeat))
+    print(f"  {label:<34}{min(menu) * 1000:>8.0f}{min(rooms) * 1000:>10.0f}{route * 1000:>10.0f}")
+    return min(menu), min(rooms)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buildings", type=int, default=10)
+    parser.add_argument("--floors", type=int, default=5)
+    parser.add_argument("--rooms-per-floor", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="most the menu or the room list may take before the run counts as a regression")
+    args = parser.parse_args()
+    print(f"  {'':<34}{'menu ms':>8}{'rooms ms':>10}{'route ms':>10}")
+    slowest = [measure("built-in campus", None, "101101", "102105", args)]
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot = os.path.join(directory, "campus.snap")
+        graph = build_campus(buildings=args.buildings, floors=args.floors, rooms_per_floor=args.rooms_per_floor,
+                             stairwells=2, corridors_per_floor=2)
+        graph.save(snapshot)
+        rooms = [node.code for node in graph.nodes if node.node_type == "room"]
+        # Writes the room catalogue, which the timed runs then read
+        list_rooms(snapshot)
+        label = f"snapshot, {graph.node_count()} nodes"
+        slowest.append(measure(label, snapshot, rooms[0], rooms[-1], args))
+    worst = max(max(figures) for figures in slowest) * 1000
+    if worst > args.budget_ms:
+        print(f"\nOver budget: {worst:.0f} ms > {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\nWithin budget: {worst:.0f} ms <= {args.budget_ms:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Benchmark suite: build, memory, startup and query latency on synthetic campuses
+Each case is a buildings x floors x rooms-per-floor x stairwells layout from
+db.synthetic with a fixed seed, so node, edge and expansion counts repeat
+exactly. --save writes the results as a baseline JSON file; --compare checks a
+run against one and exits non-zero when a time or memory figure got worse by
+more than --tolerance, or a count changed.
+Run from the repository root: python pathfinding/benchmarks/bench_suite.py --save baseline.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PATHFINDING = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PATHFINDING)
+
+from algorithms.alt import landmark_table
+from algorithms.astar import find_path_astar, find_path_bidirectional_astar, heuristic_scale
+from algorithms.stats import SearchStats
+from db.graph_db import GraphDB
+from db.synthetic import campus_size, generate_campus
+
+CASES = {
+    "small": dict(buildings=2, floors=3, rooms_per_floor=20, stairwells=2),
+    "medium": dict(buildings=10, floors=5, rooms_per_floor=50, stairwells=2),
+    "large": dict(buildings=40, floors=5, rooms_per_floor=50, stairwells=2),
+}
+LAYOUT_DEFAULTS = dict(corridors_per_floor=2, entrances=1)
+SEARCHES = {
+    "astar": find_path_astar,
+    "bidirectional": find_path_bidirectional_astar,
+    "alt": lambda graph, start, end, stats=None: find_path_astar(graph, start, end, landmarks=True, stats=stats),
+}
+# Figures where lower is better and some run-to-run noise is expected
+TIMED = ("build_s", "connect_s", "peak_build_mib", "graph_mib", "startup_s", "open_s", "first_query_s",
+         "p50_ms", "p95_ms", "p99_ms")
+# Differences below these are noise however large they are relative to the baseline
+NOISE_FLOOR = {"_s": 0.002, "_ms": 0.05, "_mib": 0.25}
+# Figures that are deterministic for a given layout and seed
+COUNTED = ("nodes", "edges", "expanded_mean", "pushes_mean", "peak_open_max", "found")
+
+STARTUP = """
+import sys, time
+began = time.perf_counter()
+sys.path.insert(0, {root!r})
+from db.graph_db import GraphDB
+from algorithms.astar import find_path_bidirectional_astar
+graph = GraphDB.open({path!r})
+opened = time.perf_counter()
+find_path_bidirectional_astar(graph, {start!r}, {end!r})
+print(opened - began, time.perf_counter() - opened)
+"""
+
+def parse_layout(text):
+    """'BxFxRxS' (buildings x floors x rooms per floor x stairwells) as a layout dict"""
+    try:
+        buildings, floors, rooms, stairwells = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected BxFxRxS, e.g. 20x5x50x2, got {text!r}") from None
+    return text, dict(buildings=buildings, floors=floors, rooms_per_floor=rooms, stairwells=stairwells)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def build(layout, seed):
+    graph = GraphDB(build_campus=False)
+    began = time.perf_counter()
+    for record in generate_campus(seed=seed, **layout):
+        graph.add_node(*record)
+    connect_began = time.perf_counter()
+    graph._generate_connections()
+    done = time.perf_counter()
+    return graph, done - began, done - connect_began
+
+def traced_build(layout, seed):
+    # Traced separately: tracemalloc slows allocation down several times over
+    gc.collect()
+    tracemalloc.start()
+    graph, _, _ = build(layout, seed)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    return current, peak
+
+def startup(path, start, end, repeat):
+    """Best of repeat fresh processes: (process wall time, snapshot open, first query)"""
+    script = STARTUP.format(root=PATHFINDING, path=path, start=start, end=end)
+    best = None
+    for _ in range(repeat):
+        began = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+        wall = time.perf_counter() - began
+        opened, first_query = (float(value) for value in output.split())
+        if best is None or wall < best[0]:
+            best = (wall, opened, first_query)
+    return best
+
+def measure_queries(search, graph, pairs):
+    latencies, expanded, pushes, peak_open, found = [], [], [], [], 0
+    for start, end in pairs:
+        stats = SearchStats()
+        began = time.perf_counter()
+        result = search(graph, start, end, stats=stats)
+        latencies.append((time.perf_counter() - began) * 1000)
+        expanded.append(stats.expanded)
+        pushes.append(stats.pushes)
+        peak_open.append(stats.peak_open)
+        found += result["success"]
+    return {
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "expanded_mean": round(sum(expanded) / len(expanded), 2),
+        "pushes_mean": round(sum(pushes) / len(pushes), 2),
+        "peak_open_max": max(peak_open),
+        "found": found,
+    }
+
+def run_case(layout, args):
+    layout = {**LAYOUT_DEFAULTS, **layout}
+    builds = [build(layout, args.seed) for _ in range(args.repeat)]
+    graph = builds[0][0]
+    result = {
+        "layout": layout,
+        "nodes": graph.node_count(),
+        "edges": graph.edge_count(),
+        "build_s": min(elapsed for _, elapsed, _ in builds),
+        "connect_s": min(connect for _, _, connect in builds),
+    }
+    del builds
+    current, peak = traced_build(layout, args.seed)
+    result["graph_mib"] = current / 2**20
+    result["peak_build_mib"] = peak / 2**20
+
+    rng = random.Random(args.seed)
+    rooms = sorted(code for code, node_id in graph.lookup.items() if graph.get_node(node_id).node_type == "room")
+    pairs = [(rng.choice(rooms), rng.choice(rooms)) for _ in range(args.queries)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "campus.snap")
+        graph.save(path)
+        result["startup_s"], result["open_s"], result["first_query_s"] = startup(path, *pairs[0], args.repeat)
+
+    # Per-graph tables are built up front so they do not land in the first query
+    heuristic_scale(graph)
+    landmark_table(graph)
+    result["queries"] = {name: measure_queries(SEARCHES[name], graph, pairs) for name in args.searches}
+    return result
+
+def flatten(result):
+    """(path, name, value) for every figure of one case, e.g. ("queries.astar.p50_ms", "p50_ms", 0.41)"""
+    for key, value in result.items():
+        if key == "queries":
+            for search, figures in value.items():
+                for name, figure in figures.items():
+                    yield f"queries.{search}.{name}", name, figure
+        elif key != "layout":
+            yield key, key, value
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions against baseline; empty when there are none"""
+    problems = []
+    for case, result in results.items():
+        old = baseline.get("cases", {}).get(case)
+        if old is None:
+            continue
+        if old["layout"] != result["layout"]:
+            problems.append(f"{case}: layout differs from the baseline, skipped")
+            continue
+        old_figures = {path: value for path, _, value in flatten(old)}
+        for path, name, value in flatten(result):
+            before = old_figures.get(path)
+            if before is None:
+                continue
+            if name in COUNTED and value != before:
+                problems.append(f"{case}: {path} changed {before} -> {value}")
+            elif (name in TIMED and value > before * (1 + tolerance)
+                  and value - before > NOISE_FLOOR[name[name.rindex("_"):]]):
+                problems.append(f"{case}: {path} {before:.4g} -> {value:.4g} (+{value / before - 1:.0%})")
+    return problems
+
+def report(case, result):
+    print(f"\n{case}: {result['nodes']} nodes, {result['edges']} edges "
+          f"({'x'.join(str(result['layout'][key]) for key in ('buildings', 'floors', 'rooms_per_floor', 'stairwells'))})")
+    print(f"  build {result['build_s'] * 1000:.1f} ms (connections {result['connect_s'] * 1000:.1f} ms), "
+          f"peak {result['peak_build_mib']:.1f} MiB, graph {result['graph_mib']:.1f} MiB")
+    print(f"  startup {result['startup_s'] * 1000:.0f} ms (open {result['open_s'] * 1000:.1f} ms, "
+          f"first query {result['first_query_s'] * 1000:.1f} ms)")
+    print(f"  {'search':>14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'expanded':>9} {'peak open':>10}")
+    for name, figures in result["queries"].items():
+        print(f"  {name:>14} {figures['p50_ms']:>8.3f} {figures['p95_ms']:>8.3f} {figures['p99_ms']:>8.3f} "
+              f"{figures['expanded_mean']:>9.1f} {figures['peak_open_max']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=["small", "medium"])
+    parser.add_argument("--layout", type=parse_layout, action="append", default=[], metavar="BxFxRxS",
+                        help="extra case, e.g. 20x5x50x2; may be repeated")
+    parser.add_argument("--searches", nargs="+", choices=sorted(SEARCHES), default=["astar", "bidirectional", "alt"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="builds and startups per case; the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", metavar="PATH", help="write the results as baseline JSON")
+    parser.add_argument("--compare", metavar="PATH", help="baseline JSON to check this run against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a time counts as a regression")
+    args = parser.parse_args()
+
+    cases = [(name, CASES[name]) for name in args.cases] + args.layout
+    results = {}
+    for case, layout in cases:
+        print(f"Running {case} (~{campus_size(**{**LAYOUT_DEFAULTS, **layout})} nodes)...", flush=True)
+        results[case] = run_case(layout, args)
+        report(case, results[case])
+
+    if args.save:
+        document = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "queries": args.queries,
+            "seed": args.seed,
+            "cases": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as fp:
+            json.dump(document, fp, indent=2, sort_keys=True)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        if (baseline.get("queries"), baseline.get("seed")) != (args.queries, args.seed):
+            print("\nWarning: baseline used different --queries/--seed, counts will not match")
+        problems = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} ({baseline.get('created')}, {baseline.get('machine')}):")
+        for line in problems:
+            print(f"  {line}")
+        if problems:
+            sys.exit(1)
+        print("  no regressions")
+
+if __name__ == "__main__":
+    main()
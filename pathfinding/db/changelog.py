@@ -0,0 +1,268 @@
+"""
+ChangeLog: Append-only log of live graph edits, replayed on top of a snapshot
+Each line is a JSON record with a sequence number, an operation and node codes
+(ids are not stable across rebuilds). A record is flushed and fsynced before
+GraphDB applies the edit, so a restart replays exactly what was accepted; a torn
+last line left by a crash is ignored. The snapshot header stores the last
+sequence number folded into it, so replay only applies newer records.
+checkpoint() writes a new snapshot and starts the log again with a marker.
+One process writes a log; any number of devices can follow it with read().
+
+CLI (from pathfinding/): python -m db.changelog campus.snap close-node H10-S1
+"""
+import argparse
+import json
+import os
+
+from db.graph_db import GraphDB, NODE_TYPES
+
+OPS = ("add_node", "add_edge", "remove_edge", "set_edge_weight",
+       "remove_node", "close_node", "reopen_node", "checkpoint")
+
+class ChangeLogError(ValueError):
+    pass
+
+class StaleGraphError(ChangeLogError):
+    """The log was checkpointed past this graph; reopen the snapshot"""
+
+class ChangeLog:
+    def __init__(self, path, sync=True):
+        self.path = os.fspath(path)
+        self.sync = sync
+        # Highest sequence number written or read so far
+        self.seq = 0
+        self._offset = 0
+        self._inode = None
+
+    @classmethod
+    def beside(cls, snapshot_path, sync=True):
+        """The log that belongs to a snapshot file"""
+        return cls(f"{snapshot_path}.changes", sync)
+
+    def read(self):
+        """Complete records added since the last call, as dicts"""
+        try:
+            fp = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        with fp:
+            stat = os.fstat(fp.fileno())
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Rewritten by a checkpoint: start from the top
+                self._inode, self._offset = stat.st_ino, 0
+            fp.seek(self._offset)
+            data = fp.read()
+        # A line without its newline is still being written (or was torn by a crash)
+        end = data.rfind(b"\n") + 1
+        records = []
+        position = self._offset
+        for line in data[:end].split(b"\n"):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                    seq, op = record["seq"], record["op"]
+                except (ValueError, KeyError, TypeError):
+                    raise ChangeLogError(f"{self.path}: bad record at byte {position}") from None
+                if op not in OPS:
+                    raise ChangeLogError(f"{self.path}: unknown operation {op!r} at byte {position}")
+                self.seq = max(self.seq, seq)
+                records.append(record)
+            position += len(line) + 1
+        self._offset += end
+        return records
+
+    def append(self, op, fields):
+        """Durably append one record; returns its sequence number"""
+        self.read()
+        self.seq += 1
+        line = json.dumps({"seq": self.seq, "op": op, **fields}, separators=(",", ":")).encode("utf-8") + b"\n"
+        with open(self.path, "ab") as fp:
+            if fp.tell() > self._offset:
+                # Drop a torn tail so the new record starts on its own line
+                fp.truncate(self._offset)
+            fp.write(line)
+            fp.flush()
+            if self.sync:
+                os.fsync(fp.fileno())
+            self._inode = os.fstat(fp.fileno()).st_ino
+        self._offset += len(line)
+        return self.seq
+
+    def restart(self, seq, records=()):
+        """
+        Replace the log with a checkpoint marker for a snapshot that includes seq,
+        followed by records (op, fields) numbered on from seq, in one step
+        """
+        lines = [{"seq": seq, "op": "checkpoint"}]
+        lines += [{"seq": seq + number, "op": op, **fields} for number, (op, fields) in enumerate(records, 1)]
+        data = b"".join(json.dumps(line, separators=(",", ":")).encode("utf-8") + b"\n" for line in lines)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+            self._inode = os.fstat(fp.fileno()).st_ino
+        os.replace(tmp_path, self.path)
+        self._offset = len(data)
+        self.seq = max(self.seq, lines[-1]["seq"])
+
+def _node_id(graph, record, key):
+    try:
+        return graph.lookup[record[key]]
+    except KeyError:
+        raise ChangeLogError(f"record {record['seq']}: unknown node {record.get(key)!r}") from None
+
+def apply_record(graph, record):
+    """Apply one record to a mutable graph without logging it again"""
+    op = record["op"]
+    if op == "add_node":
+        graph.add_node(record["code"], record["name"], record["building"], record["floor"],
+                       record["x"], record["y"], record["node_type"])
+    elif op == "add_edge":
+        graph.add_edge(_node_id(graph, record, "from"), _node_id(graph, record, "to"),
+                       record["weight"], record["bearing"])
+    elif op == "remove_edge":
+        graph.remove_edge(_node_id(graph, record, "from"), _node_id(graph, record, "to"))
+    elif op == "set_edge_weight":
+        graph.set_edge_weight(_node_id(graph, record, "from"), _node_id(graph, record, "to"), record["weight"])
+    elif op == "remove_node":
+        graph.remove_node(_node_id(graph, record, "node"))
+    elif op == "close_node":
+        graph.close_node(_node_id(graph, record, "node"))
+    elif op == "reopen_node":
+        graph.reopen_node(_node_id(graph, record, "node"))
+    graph.revision = record["seq"]
+
+def replay(graph, records):
+    """
+    Apply records newer than graph.revision; returns how many were applied.
+    All or nothing: on a ChangeLogError the graph is back where it started.
+    """
+    pending = [record for record in records if record["seq"] > graph.revision]
+    if not pending:
+        return 0
+    if pending[0]["op"] == "checkpoint":
+        raise StaleGraphError(f"log was checkpointed at {pending[0]['seq']}, graph is at {graph.revision}")
+    changelog, graph.changelog = graph.changelog, None
+    try:
+        with graph._lock:
+            before = graph.view()
+            for record in pending:
+                try:
+                    apply_record(graph, record)
+                except (KeyError, ValueError) as exc:
+                    graph.restore(before)
+                    raise ChangeLogError(f"record {record['seq']} ({record['op']}): {exc}") from None
+    finally:
+        graph.changelog = changelog
+    return len(pending)
+
+def open_graph(snapshot_path, log=None):
+    """
+    Open a snapshot with its change log applied. Returns the memory-mapped
+    CompactGraph when nothing is pending, otherwise a mutable GraphDB copy.
+    """
+    graph = GraphDB.open(snapshot_path)
+    log = log or ChangeLog.beside(snapshot_path)
+    records = log.read()
+    if any(record["seq"] > graph.revision for record in records):
+        compact, graph = graph, GraphDB.from_graph(graph)
+        compact.close()
+        replay(graph, records)
+    return graph
+
+def checkpoint(graph, snapshot_path, log):
+    """
+    Fold everything applied to graph into a new snapshot and restart the log.
+    Snapshots hold open nodes only, so closures are logged again after the
+    snapshot's revision: first in the old log (a no-op for graphs that already
+    have them), then in the new one. A crash at any point leaves a snapshot
+    and log that reopen with the closures in place.
+    """
+    with graph._lock:
+        changelog, graph.changelog = graph.changelog, None
+        try:
+            closed = sorted(graph.closed)
+            reclose = [("close_node", {"node": graph.get_node(node_id).code}) for node_id in closed]
+            revision = graph.revision
+            for op, fields in reclose:
+                log.append(op, fields)
+            for node_id in closed:
+                graph.reopen_node(node_id)
+            try:
+                graph.save(snapshot_path)
+            finally:
+                for node_id in closed:
+                    graph.close_node(node_id)
+            log.restart(revision, reclose)
+            graph.revision = revision + len(reclose)
+        finally:
+            graph.changelog = changelog
+
+def _edit(graph, args):
+    lookup = graph.lookup
+    for code in args.nodes:
+        if code not in lookup:
+            raise SystemExit(f"unknown node {code!r}")
+    ids = [lookup[code] for code in args.nodes]
+    if args.command == "close-node":
+        graph.close_node(*ids)
+    elif args.command == "reopen-node":
+        graph.reopen_node(*ids)
+    elif args.command == "remove-node":
+        graph.remove_node(*ids)
+    elif args.command == "remove-edge":
+        graph.remove_edge(*ids)
+    elif args.command == "set-weight":
+        graph.set_edge_weight(*ids, args.weight)
+    elif args.command == "add-edge":
+        graph.add_edge(*ids, args.weight)
+
+def main():
+    parser = argparse.ArgumentParser(description="Edit a graph snapshot through its change log")
+    parser.add_argument("snapshot")
+    parser.add_argument("--log", help="change log path (default: SNAPSHOT.changes)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("close-node", "reopen-node", "remove-node"):
+        commands.add_parser(name).add_argument("nodes", nargs=1, metavar="CODE")
+    commands.add_parser("remove-edge").add_argument("nodes", nargs=2, metavar="CODE")
+    for name in ("set-weight", "add-edge"):
+        command = commands.add_parser(name)
+        command.add_argument("nodes", nargs=2, metavar="CODE")
+        command.add_argument("weight", type=float, nargs=None if name == "set-weight" else "?")
+    add_node = commands.add_parser("add-node")
+    add_node.add_argument("code")
+    add_node.add_argument("name")
+    for field in ("building", "floor"):
+        add_node.add_argument(field, type=int)
+    for field in ("x", "y"):
+        add_node.add_argument(field, type=float)
+    add_node.add_argument("node_type", choices=NODE_TYPES)
+    commands.add_parser("checkpoint")
+    commands.add_parser("show")
+    args = parser.parse_args()
+
+    log = ChangeLog(args.log) if args.log else ChangeLog.beside(args.snapshot)
+    if args.command == "show":
+        for record in log.read():
+            print(json.dumps(record))
+        return
+    graph = open_graph(args.snapshot, log)
+    if not isinstance(graph, GraphDB):
+        compact, graph = graph, GraphDB.from_graph(graph)
+        compact.close()
+    try:
+        if args.command == "checkpoint":
+            checkpoint(graph, args.snapshot, log)
+        else:
+            graph.changelog = log
+            if args.command == "add-node":
+                graph.add_node(args.code, args.name, args.building, args.floor, args.x, args.y, args.node_type)
+            else:
+                _edit(graph, args)
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}")
+    print(f"{args.command}: log at revision {log.seq}")
+
+if __name__ == "__main__":
+    main()
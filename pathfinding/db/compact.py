@@ -0,0 +1,226 @@
+"""
+CompactGraph: Read-only columnar graph backed by flat arrays
+Node attributes live in parallel columns and edges in CSR form
+(offsets/targets/weights/bearings). Columns may be array.array objects or
+memoryviews over a mapped snapshot file; Node and Edge objects are only
+created when a caller asks for them.
+"""
+from array import array
+from typing import Iterator, Mapping
+
+from db.graph_db import Node, Edge, NODE_TYPES
+from db.spatial import nearest_node, nodes_within
+
+def _typecode(kind, size):
+    candidates = {"int": "ilq", "uint": "ILQ", "float": "d", "byte": "B"}[kind]
+    for code in candidates:
+        if array(code).itemsize == size:
+            return code
+    raise RuntimeError(f"no {size}-byte {kind} array type on this platform")
+
+# Fixed-width column types, shared with the snapshot file layout
+COLUMN_TYPES = {
+    "x": _typecode("float", 8),
+    "y": _typecode("float", 8),
+    "floor": _typecode("int", 4),
+    "building": _typecode("int", 4),
+    "node_type": _typecode("byte", 1),
+    "offsets": _typecode("uint", 4),
+    "targets": _typecode("uint", 4),
+    "weights": _typecode("float", 8),
+    "bearings": _typecode("float", 8),
+    "code_offsets": _typecode("uint", 4),
+    "code_blob": _typecode("byte", 1),
+    "name_offsets": _typecode("uint", 4),
+    "name_blob": _typecode("byte", 1),
+    "code_order": _typecode("uint", 4),
+}
+COLUMN_ORDER = tuple(COLUMN_TYPES)
+
+def _string_table(strings):
+    offsets = array(COLUMN_TYPES["code_offsets"], [0])
+    blob = bytearray()
+    for value in strings:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, array("B", blob)
+
+def build_columns(graph):
+    """Flatten any graph exposing nodes/neighbors into column arrays"""
+    columns = {name: array(code) for name, code in COLUMN_TYPES.items()}
+    type_codes = {node_type: i for i, node_type in enumerate(NODE_TYPES)}
+    codes, names = [], []
+    columns["offsets"].append(0)
+    for node in graph.nodes:
+        columns["x"].append(node.x)
+        columns["y"].append(node.y)
+        columns["floor"].append(node.floor)
+        columns["building"].append(node.building)
+        columns["node_type"].append(type_codes[node.node_type])
+        codes.append(node.code)
+        names.append(node.name)
+        for edge in graph.neighbors(node.id):
+            columns["targets"].append(edge.to_id)
+            columns["weights"].append(edge.weight)
+            columns["bearings"].append(edge.bearing)
+        columns["offsets"].append(len(columns["targets"]))
+    columns["code_offsets"], columns["code_blob"] = _string_table(codes)
+    columns["name_offsets"], columns["name_blob"] = _string_table(names)
+    # Removed nodes keep their id but are left out of the code index
+    lookup = graph.lookup
+    live = [node_id for node_id, code in enumerate(codes) if lookup.get(code) == node_id]
+    columns["code_order"] = array(COLUMN_TYPES["code_order"], sorted(live, key=codes.__getitem__))
+    return columns
+
+class StringTable:
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+class CodeIndex(Mapping):
+    """code -> node id via binary search over ids sorted by code"""
+
+    def __init__(self, codes: StringTable, order):
+        self._codes = codes
+        self._order = order
+
+    def __getitem__(self, code):
+        order = self._order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._codes[order[mid]] < code:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(order) and self._codes[order[lo]] == code:
+            return order[lo]
+        raise KeyError(code)
+
+    def __iter__(self) -> Iterator[str]:
+        for node_id in self._order:
+            yield self._codes[node_id]
+
+    def __len__(self):
+        return len(self._order)
+
+class _NodeView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.x)
+
+    def __getitem__(self, node_id):
+        return self._graph.get_node(node_id)
+
+    def __iter__(self):
+        for node_id in range(len(self)):
+            yield self._graph.get_node(node_id)
+
+class _AdjacencyView:
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __len__(self):
+        return len(self._graph.x)
+
+    def __getitem__(self, node_id):
+        return self._graph.neighbors(node_id)
+
+    def __iter__(self):
+        for node_id in range(len(self)):
+            yield self._graph.neighbors(node_id)
+
+class CompactGraph:
+    def __init__(self, x, y, floor, building, node_type, offsets, targets, weights, bearings,
+                 codes: StringTable, names: StringTable, code_order, source=None):
+        self.x = x
+        self.y = y
+        self.floor = floor
+        self.building = building
+        self.node_type = node_type
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.bearings = bearings
+        self.codes = codes
+        self.names = names
+        self.lookup = CodeIndex(codes, code_order)
+        self.nodes = _NodeView(self)
+        self.adjacency = _AdjacencyView(self)
+        # Read-only, so derived data never expires
+        self.version = 0
+        # Last change log record folded into the snapshot, see db.changelog
+        self.revision = 0
+        # Keeps the backing buffer (e.g. an mmap) alive as long as the graph
+        self._source = source
+        # Snapshot file the columns are mapped from, if any
+        self.path = None
+
+    @classmethod
+    def from_columns(cls, columns, source=None):
+        return cls(
+            columns["x"], columns["y"], columns["floor"], columns["building"], columns["node_type"],
+            columns["offsets"], columns["targets"], columns["weights"], columns["bearings"],
+            StringTable(columns["code_offsets"], columns["code_blob"]),
+            StringTable(columns["name_offsets"], columns["name_blob"]),
+            columns["code_order"], source=source,
+        )
+
+    @classmethod
+    def from_graph(cls, graph):
+        compact = cls.from_columns(build_columns(graph))
+        compact.revision = getattr(graph, "revision", 0)
+        return compact
+
+    def view(self):
+        return self
+
+    def nearest_node(self, x, y, building, floor, types=None):
+        return nearest_node(self, x, y, building, floor, types)
+
+    def nodes_within(self, x, y, radius, building, floor, types=None):
+        return nodes_within(self, x, y, radius, building, floor, types)
+
+    def save(self, path):
+        from db.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    def node_count(self):
+        return len(self.x)
+
+    def edge_count(self):
+        return len(self.targets)
+
+    def neighbors(self, node_id):
+        targets, weights, bearings = self.targets, self.weights, self.bearings
+        return [Edge(targets[i], weights[i], bearings[i])
+                for i in range(self.offsets[node_id], self.offsets[node_id + 1])]
+
+    def degree(self, node_id):
+        return self.offsets[node_id + 1] - self.offsets[node_id]
+
+    def edge_range(self, node_id):
+        return range(self.offsets[node_id], self.offsets[node_id + 1])
+
+    def get_node(self, node_id):
+        return Node(node_id, self.codes[node_id], self.names[node_id], self.building[node_id],
+                    self.floor[node_id], self.x[node_id], self.y[node_id], NODE_TYPES[self.node_type[node_id]])
+
+    def all_nodes(self):
+        return self.nodes
+
+    def all_edges(self):
+        return self.adjacency
+
+    def close(self):
+        source, self._source = self._source, None
+        if source is not None:
+            source.close()
@@ -1,12 +1,20 @@
 """
 GraphDB: Lightweight graph database for edge devices
 Includes Node, Edge dataclasses and campus graph construction
+Once a view() has been taken, live edits (add/remove/reweight, closing nodes)
+replace adjacency lists instead of mutating them, so the view never changes
+underneath its reader; before that, new edges are appended in place.
+Stairwells and elevators are shafts: a chain of one node per floor, so the
+edges a stairwell needs grow with the floors of its building, not their square.
 """
 import math
+import threading
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
-@dataclass
+from db.spatial import GridIndex, nearest_node, nodes_within
+
+@dataclass(slots=True)
 class Node:
     id: int
     code: str
@@ -17,21 +25,216 @@ class Node:
     y: float
     node_type: str
 
-@dataclass
+@dataclass(slots=True)
 class Edge:
     to_id: int
     weight: float
     bearing: float
 
+NODE_TYPES = ("room", "corridor", "stairs", "entrance", "elevator")
+# Node types that link floors; elevators are wired like stairwells
+VERTICAL_TYPES = ("stairs", "elevator")
+# Cost of one floor travelled inside a shaft
+FLOOR_COST = 10
+# Stepping from a generated landing onto a corridor of its floor
+LANDING_COST = 5
+
+def _check_node(code, name, building, floor, x, y, node_type):
+    """ValueError for fields a snapshot cannot hold, raised before anything is logged"""
+    if not isinstance(code, str) or not code.strip():
+        raise ValueError(f"node code must be a non-empty string, got {code!r}")
+    if not isinstance(name, str):
+        raise ValueError(f"node name must be a string, got {name!r}")
+    for field, value in (("building", building), ("floor", floor)):
+        # Snapshot columns hold them as 32-bit integers
+        if not isinstance(value, int) or isinstance(value, bool) or not -2**31 <= value < 2**31:
+            raise ValueError(f"node {field} must be a 32-bit integer, got {value!r}")
+    for field, value in (("x", x), ("y", y)):
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or not math.isfinite(value):
+            raise ValueError(f"node {field} must be a finite number, got {value!r}")
+    if node_type not in NODE_TYPES:
+        raise ValueError(f"unknown node type {node_type!r}, expected one of {', '.join(NODE_TYPES)}")
+
 class GraphDB:
-    def __init__(self):
+    def __init__(self, build_campus: bool = True):
         self.nodes: List[Node] = []
         self.adjacency: List[List[Edge]] = []
         self.lookup: Dict[str, int] = {}
-        self.spatial_index: Dict[Tuple[int, int], List[int]] = {}
-        self._build_realistic_campus()
-        self._generate_connections()
-        self._build_spatial_index()
+        # Bumped on every structural change so derived data (heuristics, caches) can expire
+        self.version = 0
+        # Sequence number of the last change log record applied, see db.changelog
+        self.revision = 0
+        self.changelog = None
+        # Edges of closed nodes as (to_id, weight, bearing), restored by reopen_node
+        self.closed: Dict[int, List[Tuple[int, float, float]]] = {}
+        self._lock = threading.RLock()
+        self._view = None
+        if build_campus:
+            self._build_realistic_campus()
+            self._generate_connections()
+
+    @classmethod
+    def from_files(cls, nodes_path, edges_path=None, chunk_size=65536):
+        """Stream a graph from CSV/JSON/GeoJSON files, see db.loader"""
+        from db.loader import load_graph
+        return load_graph(nodes_path, edges_path, chunk_size=chunk_size)
+
+    def save(self, path):
+        """Write a versioned binary snapshot, see db.snapshot"""
+        from db.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    @classmethod
+    def open(cls, path):
+        """Memory-map a snapshot written by save(); returns a read-only CompactGraph"""
+        from db.snapshot import open_snapshot
+        return open_snapshot(path)
+
+    @classmethod
+    def from_graph(cls, source):
+        """Mutable copy of any graph, e.g. a CompactGraph opened from a snapshot"""
+        graph = cls(build_campus=False)
+        graph.nodes = list(source.nodes)
+        graph.adjacency = [list(source.neighbors(node_id)) for node_id in range(source.node_count())]
+        graph.lookup = dict(source.lookup)
+        graph.revision = getattr(source, "revision", 0)
+        graph.version = 1
+        return graph
+
+    def compact(self):
+        """Columnar copy with CSR adjacency, see db.compact"""
+        from db.compact import CompactGraph
+        return CompactGraph.from_graph(self)
+
+    def view(self):
+        """Read-only GraphView of the current version; later edits do not affect it"""
+        with self._lock:
+            if self._view is None or self._view.version != self.version:
+                self._view = GraphView(self)
+            return self._view
+
+    def restore(self, view):
+        """Go back to the state a view() of this graph was taken at, e.g. after a failed batch of edits"""
+        with self._lock:
+            self.nodes = list(view.nodes)
+            self.adjacency = list(view.adjacency)
+            self.lookup = dict(view.lookup)
+            self.closed = {node_id: list(stash) for node_id, stash in view.closed.items()}
+            self.revision = view.revision
+            # A new version, not the view's: derived data may have seen the undone edits
+            self.version += 1
+
+    def _log(self, op, **fields):
+        # Write-ahead: the record is durable before the edit is applied
+        if self.changelog is not None:
+            self.revision = self.changelog.append(op, fields)
+
+    def _append_edge(self, node_id, edge):
+        if self._view is None:
+            self.adjacency[node_id].append(edge)
+        else:
+            # A view shares the list
+            self.adjacency[node_id] = self.adjacency[node_id] + [edge]
+
+    def add_node(self, code, name, building, floor, x, y, node_type) -> int:
+        _check_node(code, name, building, floor, x, y, node_type)
+        with self._lock:
+            if code in self.lookup:
+                raise ValueError(f"duplicate node code {code!r}")
+            if self.changelog is not None:
+                self._log("add_node", code=code, name=name, building=building, floor=floor,
+                          x=x, y=y, node_type=node_type)
+            node_id = len(self.nodes)
+            self.nodes.append(Node(node_id, code, name, building, floor, x, y, node_type))
+            self.lookup[code] = node_id
+            self.adjacency.append([])
+            self.version += 1
+            return node_id
+
+    def add_edge(self, from_id, to_id, weight=None, bearing=None):
+        from_node, to_node = self.nodes[from_id], self.nodes[to_id]
+        if weight is None:
+            weight = self._euclidean_distance(from_node, to_node)
+        if bearing is None:
+            bearing = self._calculate_bearing(from_node, to_node)
+        if not weight >= 0:
+            raise ValueError(f"edge weight must be non-negative, got {weight!r}")
+        with self._lock:
+            if self.changelog is not None:
+                self._log("add_edge", **{"from": from_node.code, "to": to_node.code, "weight": weight, "bearing": bearing})
+            self._append_edge(from_id, Edge(to_id, weight, bearing))
+            self._append_edge(to_id, Edge(from_id, weight, (bearing + 180) % 360))
+            self.version += 1
+
+    def _edge_pair(self, from_id, to_id):
+        if not any(edge.to_id == to_id for edge in self.adjacency[from_id]):
+            raise ValueError(f"no edge between {self.nodes[from_id].code} and {self.nodes[to_id].code}")
+        return {"from": self.nodes[from_id].code, "to": self.nodes[to_id].code}
+
+    def remove_edge(self, from_id, to_id):
+        """Remove the edge between two nodes in both directions"""
+        with self._lock:
+            self._log("remove_edge", **self._edge_pair(from_id, to_id))
+            self.adjacency[from_id] = [edge for edge in self.adjacency[from_id] if edge.to_id != to_id]
+            self.adjacency[to_id] = [edge for edge in self.adjacency[to_id] if edge.to_id != from_id]
+            self.version += 1
+
+    def set_edge_weight(self, from_id, to_id, weight):
+        """Change the cost of the edge between two nodes in both directions"""
+        if not weight >= 0:
+            raise ValueError(f"edge weight must be non-negative, got {weight!r}")
+        with self._lock:
+            self._log("set_edge_weight", weight=weight, **self._edge_pair(from_id, to_id))
+            for a, b in ((from_id, to_id), (to_id, from_id)):
+                self.adjacency[a] = [Edge(b, weight, edge.bearing) if edge.to_id == b else edge
+                                     for edge in self.adjacency[a]]
+            self.version += 1
+
+    def close_node(self, node_id):
+        """Take a node out of routing (e.g. a stairwell during a drill) until reopen_node"""
+        with self._lock:
+            if node_id in self.closed:
+                return
+            self._log("close_node", node=self.nodes[node_id].code)
+            self.closed[node_id] = [(edge.to_id, edge.weight, edge.bearing) for edge in self.adjacency[node_id]]
+            self._detach(node_id)
+            self.version += 1
+
+    def reopen_node(self, node_id):
+        with self._lock:
+            if node_id not in self.closed:
+                return
+            self._log("reopen_node", node=self.nodes[node_id].code)
+            restored = []
+            for to_id, weight, bearing in self.closed.pop(node_id):
+                reverse = (node_id, weight, (bearing + 180) % 360)
+                if to_id in self.closed:
+                    # Comes back when the other end is reopened
+                    self.closed[to_id].append(reverse)
+                else:
+                    restored.append(Edge(to_id, weight, bearing))
+                    self._append_edge(to_id, Edge(*reverse))
+            self.adjacency[node_id] = restored
+            self.version += 1
+
+    def remove_node(self, node_id):
+        """Drop a node's edges and its code; the id stays allocated so other ids are stable"""
+        with self._lock:
+            code = self.nodes[node_id].code
+            if self.lookup.get(code) != node_id:
+                raise ValueError(f"node {code!r} was already removed")
+            self._log("remove_node", node=code)
+            self._detach(node_id)
+            self.closed.pop(node_id, None)
+            for stash in self.closed.values():
+                stash[:] = [entry for entry in stash if entry[0] != node_id]
+            del self.lookup[code]
+            self.version += 1
+
+    def _detach(self, node_id):
+        for edge in self.adjacency[node_id]:
+            self.adjacency[edge.to_id] = [back for back in self.adjacency[edge.to_id] if back.to_id != node_id]
+        self.adjacency[node_id] = []
 
     def _build_realistic_campus(self):
         campus_data = [
@@ -97,44 +300,69 @@ class GraphDB:
             ("H10-E3", "Garden Entrance Hus 10", 10, 0, 20.0, 70.0, "entrance"),
             ("H4-E1", "Main Entrance Hus 4", 4, 0, 10.0, 70.0, "entrance"),
         ]
-        for i, (code, name, building, floor, x, y, node_type) in enumerate(campus_data):
-            node = Node(i, code, name, building, floor, x, y, node_type)
-            self.nodes.append(node)
-            self.lookup[code] = i
-            self.adjacency.append([])
+        for record in campus_data:
+            self.add_node(*record)
 
     def _generate_connections(self):
-        for node in self.nodes:
+        self._index_nodes()
+        # Landings added for shafts are wired by _connect_stairs itself
+        for node in list(self.nodes):
             if node.node_type == "room":
                 self._connect_room_to_corridor(node)
             elif node.node_type == "corridor":
                 self._connect_corridor_network(node)
-            elif node.node_type == "stairs":
+            elif node.node_type in VERTICAL_TYPES:
                 self._connect_stairs(node)
             elif node.node_type == "entrance":
                 self._connect_entrance(node)
+        self.version += 1
+        self._groups = self._corridor_grids = self._central_by_floor = self._shafts = None
+
+    def _index_nodes(self):
+        # Group nodes once so each connection rule only looks at its candidates
+        self._groups: Dict[Tuple[str, int, int], List[Node]] = {}
+        self._central_by_floor: Dict[int, Node] = {}
+        self._corridor_grids: Dict[Tuple, GridIndex] = {}
+        # Vertical nodes at the same spot of a building are one shaft, lowest floor first
+        self._shafts: Dict[Tuple, List[Node]] = {}
+        for node in self.nodes:
+            self._groups.setdefault((node.node_type, node.building, node.floor), []).append(node)
+            if node.node_type in VERTICAL_TYPES:
+                self._shafts.setdefault((node.node_type, node.building, node.x, node.y), []).append(node)
+            if node.node_type == "corridor":
+                self._groups.setdefault(("corridor", node.building, None), []).append(node)
+            if node.code == "CENTRAL":
+                self._central_by_floor.setdefault(node.floor, node)
+
+    def _nearest_corridor(self, node, floor):
+        key = ("corridor", node.building, floor)
+        grid = self._corridor_grids.get(key)
+        if grid is None:
+            grid = GridIndex((c.id, c.x, c.y) for c in self._groups.get(key, ()))
+            self._corridor_grids[key] = grid
+        found = grid.nearest(node.x, node.y)
+        return self.nodes[found[1]] if found else None
 
     def _connect_room_to_corridor(self, room):
-        corridors = [n for n in self.nodes if n.node_type == "corridor" and n.building == room.building and n.floor == room.floor]
-        if corridors:
-            nearest = min(corridors, key=lambda c: self._euclidean_distance(room, c))
+        nearest = self._nearest_corridor(room, room.floor)
+        if nearest:
             distance = self._euclidean_distance(room, nearest)
             bearing = self._calculate_bearing(room, nearest)
             self.adjacency[room.id].append(Edge(nearest.id, distance, bearing))
             self.adjacency[nearest.id].append(Edge(room.id, distance, (bearing + 180) % 360))
 
     def _connect_corridor_network(self, corridor):
-        # Connect to stairs on the same floor
-        stairs = [n for n in self.nodes if n.node_type == "stairs" and n.building == corridor.building and n.floor == corridor.floor]
-        for stair in stairs:
-            distance = self._euclidean_distance(corridor, stair)
-            if distance < 50:
-                bearing = self._calculate_bearing(corridor, stair)
-                self.adjacency[corridor.id].append(Edge(stair.id, distance, bearing))
-                self.adjacency[stair.id].append(Edge(corridor.id, distance, (bearing + 180) % 360))
+        # Connect to stairs and elevators on the same floor
+        for node_type in VERTICAL_TYPES:
+            for stair in self._groups.get((node_type, corridor.building, corridor.floor), ()):
+                distance = self._euclidean_distance(corridor, stair)
+                if distance < 50:
+                    bearing = self._calculate_bearing(corridor, stair)
+                    self.adjacency[corridor.id].append(Edge(stair.id, distance, bearing))
+                    self.adjacency[stair.id].append(Edge(corridor.id, distance, (bearing + 180) % 360))
         # Only connect to central corridor if on the same floor
         if corridor.building != 0:
-            central = next((n for n in self.nodes if n.code == "CENTRAL" and n.floor == corridor.floor), None)
+            central = self._central_by_floor.get(corridor.floor)
             if central:
                 distance = self._euclidean_distance(corridor, central) + 20
                 bearing = self._calculate_bearing(corridor, central)
@@ -142,21 +370,33 @@ class GraphDB:
                 self.adjacency[central.id].append(Edge(corridor.id, distance, (bearing + 180) % 360))
 
     def _connect_stairs(self, stairs):
-        same_building_corridors = [n for n in self.nodes if n.node_type == "corridor" and n.building == stairs.building and n.floor != stairs.floor]
-        for corridor in same_building_corridors:
-            floor_diff = abs(stairs.floor - corridor.floor)
-            distance = 5 + floor_diff * 10
-            bearing = 0 if corridor.floor > stairs.floor else 180
-            # Connect stairs to corridor
-            self.adjacency[stairs.id].append(Edge(corridor.id, distance, bearing))
-            # Connect corridor back to stairs (bidirectional)
-            reverse_bearing = (bearing + 180) % 360
-            self.adjacency[corridor.id].append(Edge(stairs.id, distance, reverse_bearing))
+        """Build the shaft stairs belongs to, once, from its first node"""
+        shaft = self._shafts[(stairs.node_type, stairs.building, stairs.x, stairs.y)]
+        if shaft[0] is not stairs:
+            return
+        corridors = self._groups.get(("corridor", stairs.building, None), ())
+        by_floor = {node.floor: node for node in shaft}
+        floors = set(by_floor).union(corridor.floor for corridor in corridors)
+        below = None
+        for floor in range(min(floors), max(floors) + 1):
+            landing = by_floor.get(floor)
+            if landing is None:
+                # Nodes in the data get the same-floor corridor rule; generated ones
+                # open onto every corridor of their floor, as the stairwell node used to
+                landing = self.nodes[self.add_node(f"{stairs.code}-F{floor}", f"{stairs.name} Floor {floor}",
+                                                   stairs.building, floor, stairs.x, stairs.y, stairs.node_type)]
+                for corridor in self._groups.get(("corridor", stairs.building, floor), ()):
+                    bearing = self._calculate_bearing(landing, corridor)
+                    self.adjacency[landing.id].append(Edge(corridor.id, LANDING_COST, bearing))
+                    self.adjacency[corridor.id].append(Edge(landing.id, LANDING_COST, (bearing + 180) % 360))
+            if below is not None:
+                self.adjacency[below.id].append(Edge(landing.id, FLOOR_COST, 0))
+                self.adjacency[landing.id].append(Edge(below.id, FLOOR_COST, 180))
+            below = landing
 
     def _connect_entrance(self, entrance):
-        corridors = [n for n in self.nodes if n.node_type == "corridor" and n.building == entrance.building]
-        if corridors:
-            nearest = min(corridors, key=lambda c: self._euclidean_distance(entrance, c))
+        nearest = self._nearest_corridor(entrance, None)
+        if nearest:
             distance = self._euclidean_distance(entrance, nearest)
             bearing = self._calculate_bearing(entrance, nearest)
             self.adjacency[entrance.id].append(Edge(nearest.id, distance, bearing))
@@ -171,21 +411,75 @@ class GraphDB:
         bearing = math.degrees(math.atan2(dx, dy))
         return (bearing + 360) % 360
 
-    def _build_spatial_index(self):
-        for node in self.nodes:
-            grid_x = int(node.x // 10)
-            grid_y = int(node.y // 10)
-            key = (grid_x, grid_y)
-            if key not in self.spatial_index:
-                self.spatial_index[key] = []
-            self.spatial_index[key].append(node.id)
+    def nearest_node(self, x, y, building, floor, types=None):
+        """Closest node to a raw position on a floor (building=None: any building), see db.spatial"""
+        return nearest_node(self, x, y, building, floor, types)
+
+    def nodes_within(self, x, y, radius, building, floor, types=None):
+        """[(distance, Node)] within radius of a raw position, closest first"""
+        return nodes_within(self, x, y, radius, building, floor, types)
+
+    def neighbors(self, node_id):
+        return self.adjacency[node_id]
+
+    def degree(self, node_id):
+        return len(self.adjacency[node_id])
+
+    def get_node(self, node_id):
+        return self.nodes[node_id]
+
+    def node_count(self):
+        return len(self.nodes)
+
+    def edge_count(self):
+        return sum(len(adj) for adj in self.adjacency)
+
+    def all_nodes(self):
+        return self.nodes
+
+    def all_edges(self):
+        return self.adjacency
+
+class GraphView:
+    """State of a GraphDB at one version; shares Node/Edge objects and never changes"""
+
+    def __init__(self, graph):
+        self.nodes = list(graph.nodes)
+        self.adjacency = list(graph.adjacency)
+        self.lookup = dict(graph.lookup)
+        # Spatial queries leave closed nodes out; reopen_node edits the stashes in place
+        self.closed = {node_id: list(stash) for node_id, stash in graph.closed.items()}
+        self.version = graph.version
+        self.revision = graph.revision
+
+    def view(self):
+        return self
+
+    def save(self, path):
+        from db.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    def nearest_node(self, x, y, building, floor, types=None):
+        return nearest_node(self, x, y, building, floor, types)
+
+    def nodes_within(self, x, y, radius, building, floor, types=None):
+        return nodes_within(self, x, y, radius, building, floor, types)
 
     def neighbors(self, node_id):
         return self.adjacency[node_id]
 
+    def degree(self, node_id):
+        return len(self.adjacency[node_id])
+
     def get_node(self, node_id):
         return self.nodes[node_id]
 
+    def node_count(self):
+        return len(self.nodes)
+
+    def edge_count(self):
+        return sum(len(adj) for adj in self.adjacency)
+
     def all_nodes(self):
         return self.nodes
 
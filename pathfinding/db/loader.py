@@ -0,0 +1,252 @@
+"""
+Loader: Streaming graph import from CSV, JSON and GeoJSON files
+Records are parsed chunk by chunk and validated as they arrive, so only the
+current read buffer of the raw input is ever held in memory
+"""
+import csv
+import json
+import math
+import os
+from typing import Iterator, Optional, Tuple
+
+from db.graph_db import GraphDB, NODE_TYPES
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+class GraphLoadError(ValueError):
+    def __init__(self, source, position, message):
+        super().__init__(f"{source}:{position}: {message}")
+        self.source = source
+        self.position = position
+
+class _JSONStream:
+    """Incremental reader for a JSON document whose top level holds arrays"""
+
+    def __init__(self, fp, source, chunk_size):
+        self._fp = fp
+        self._source = source
+        self._chunk_size = chunk_size
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop the consumed prefix so the buffer never grows past one record
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def _error(self, message):
+        return GraphLoadError(self._source, "json", message)
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"expected '{char}'")
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as exc:
+                if self._fill():
+                    continue
+                raise self._error(str(exc)) from None
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def items(self):
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self.value()
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self._error("expected ',' or ']' in array")
+
+    def sections(self) -> Iterator[Tuple[Optional[str], object]]:
+        """Yield (member, item) for every item of every array-valued top-level member"""
+        if self.peek() == "[":
+            for item in self.items():
+                yield None, item
+            return
+        self.expect("{")
+        if self.peek() == "}":
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            if self.peek() == "[":
+                for item in self.items():
+                    yield key, item
+            else:
+                self.value()
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self._error("expected ',' or '}' in object")
+
+class _GraphBuilder:
+    def __init__(self, graph: GraphDB):
+        self.graph = graph
+        self.edge_count = 0
+        self._pending = []
+
+    def add_node(self, record, source, position):
+        try:
+            code = str(record["code"]).strip()
+            name = str(record.get("name") or code)
+            building = int(record["building"])
+            floor = int(record["floor"])
+            x = float(record["x"])
+            y = float(record["y"])
+            node_type = str(record.get("node_type") or record.get("type") or "").strip()
+        except (KeyError, TypeError, ValueError) as exc:
+            raise GraphLoadError(source, position, f"invalid node record ({exc!r})") from None
+        if not code:
+            raise GraphLoadError(source, position, "empty node code")
+        if not (math.isfinite(x) and math.isfinite(y)):
+            raise GraphLoadError(source, position, f"non-finite coordinates ({x}, {y}) for {code!r}")
+        if code in self.graph.lookup:
+            raise GraphLoadError(source, position, f"duplicate node code {code!r}")
+        if node_type not in NODE_TYPES:
+            raise GraphLoadError(source, position, f"unknown node type {node_type!r} for {code!r}")
+        try:
+            self.graph.add_node(code, name, building, floor, x, y, node_type)
+        except ValueError as exc:
+            # Anything else GraphDB refuses, e.g. a floor out of range
+            raise GraphLoadError(source, position, str(exc)) from None
+
+    def add_edge(self, record, source, position, defer=False):
+        try:
+            from_code = str(record["from"]).strip()
+            to_code = str(record["to"]).strip()
+            weight = record.get("weight")
+            weight = float(weight) if weight not in (None, "") else None
+        except (KeyError, TypeError, ValueError) as exc:
+            raise GraphLoadError(source, position, f"invalid edge record ({exc!r})") from None
+        if weight is not None and not (math.isfinite(weight) and weight >= 0):
+            raise GraphLoadError(source, position, f"edge weight must be finite and non-negative, got {weight}")
+        lookup = self.graph.lookup
+        if from_code not in lookup or to_code not in lookup:
+            if defer:
+                self._pending.append((from_code, to_code, weight, source, position))
+                return
+            missing = from_code if from_code not in lookup else to_code
+            raise GraphLoadError(source, position, f"edge references unknown node {missing!r}")
+        self.graph.add_edge(lookup[from_code], lookup[to_code], weight)
+        self.edge_count += 1
+
+    def finish(self):
+        pending, self._pending = self._pending, []
+        for from_code, to_code, weight, source, position in pending:
+            self.add_edge({"from": from_code, "to": to_code, "weight": weight}, source, position)
+        if self.edge_count == 0:
+            self.graph._generate_connections()
+        return self.graph
+
+def _detect_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext == ".geojson":
+        return "geojson"
+    if ext == ".json":
+        return "json"
+    raise GraphLoadError(path, 0, f"unsupported file type {ext!r}")
+
+def _load_csv(builder, path, kind):
+    with open(path, newline="", encoding="utf-8") as fp:
+        reader = csv.DictReader(fp)
+        for record in reader:
+            if kind == "edges":
+                builder.add_edge(record, path, reader.line_num)
+            else:
+                builder.add_node(record, path, reader.line_num)
+
+def _load_json(builder, path, kind, chunk_size):
+    with open(path, encoding="utf-8") as fp:
+        counts = {}
+        for section, record in _JSONStream(fp, path, chunk_size).sections():
+            section = section or kind
+            counts[section] = counts.get(section, 0) + 1
+            position = f"{section}[{counts[section] - 1}]"
+            if not isinstance(record, dict):
+                raise GraphLoadError(path, position, "record is not an object")
+            if section == "nodes":
+                builder.add_node(record, path, position)
+            elif section == "edges":
+                builder.add_edge(record, path, position)
+
+def _load_geojson(builder, path, chunk_size):
+    with open(path, encoding="utf-8") as fp:
+        index = 0
+        for section, feature in _JSONStream(fp, path, chunk_size).sections():
+            if section != "features":
+                continue
+            position = f"features[{index}]"
+            index += 1
+            try:
+                geometry = feature["geometry"]
+                properties = feature.get("properties") or {}
+                geometry_type = geometry["type"]
+            except (KeyError, TypeError, AttributeError):
+                raise GraphLoadError(path, position, "malformed feature") from None
+            if not isinstance(properties, dict):
+                raise GraphLoadError(path, position, "malformed feature")
+            if geometry_type == "Point":
+                coordinates = geometry.get("coordinates")
+                if not isinstance(coordinates, list) or len(coordinates) < 2:
+                    raise GraphLoadError(path, position, "point without x/y coordinates")
+                builder.add_node(dict(properties, x=coordinates[0], y=coordinates[1]), path, position)
+            elif geometry_type == "LineString":
+                # Lines may precede the points they join, so resolve them at the end
+                builder.add_edge(properties, path, position, defer=True)
+
+def load_graph(nodes_path, edges_path=None, chunk_size=65536, graph: Optional[GraphDB] = None) -> GraphDB:
+    """
+    Build a GraphDB from files. Nodes need code, name, building, floor, x, y and
+    node_type; edges need from, to and an optional weight (euclidean otherwise).
+    Edges are bidirectional. Without any edges the campus connection rules are used.
+    JSON files hold top-level "nodes"/"edges" arrays (or a bare array of records),
+    GeoJSON files hold Point features for nodes and LineString features for edges.
+    """
+    builder = _GraphBuilder(graph if graph is not None else GraphDB(build_campus=False))
+    for path, kind in ((nodes_path, "nodes"), (edges_path, "edges")):
+        if path is None:
+            continue
+        fmt = _detect_format(path)
+        if fmt == "csv":
+            _load_csv(builder, path, kind)
+        elif fmt == "json":
+            _load_json(builder, path, kind, chunk_size)
+        else:
+            _load_geojson(builder, path, chunk_size)
+    return builder.finish()
@@ -0,0 +1,72 @@
+"""
+Shafts: Migrate stairwell and elevator cliques to per-floor shafts
+Graphs built before shafts linked each stairwell node straight to every
+corridor on every other floor of its building (weight 5 + 10 per floor).
+migrate_shafts() rewires such a graph into the model GraphDB builds now: one
+landing per floor, FLOOR_COST between neighbouring landings, and whatever the
+old edge charged on top of its floors as the step from landing to corridor.
+Every route that used one stairwell keeps its exact cost; trips between two
+upper floors no longer pass through the floor the stairwell node was on.
+Edits go through the GraphDB API, so with a change log attached they are
+logged and replayed on other devices like any other edit.
+
+CLI (from pathfinding/): python -m db.shafts campus.snap [--checkpoint]
+"""
+import argparse
+
+from db.changelog import ChangeLog, checkpoint, open_graph
+from db.graph_db import FLOOR_COST, GraphDB, VERTICAL_TYPES
+
+def migrate_shafts(graph: GraphDB):
+    """Rewire every clique-style stairwell or elevator in graph; returns the number of landings added"""
+    nodes = graph.nodes
+    added = 0
+    for node in list(nodes):
+        if node.node_type not in VERTICAL_TYPES or graph.lookup.get(node.code) != node.id:
+            continue
+        # Edges that jump floors straight off this node; a migrated shaft has none left
+        flights = [edge for edge in graph.adjacency[node.id]
+                   if nodes[edge.to_id].floor != node.floor and nodes[edge.to_id].node_type not in VERTICAL_TYPES]
+        if not flights:
+            continue
+        for edge in flights:
+            graph.remove_edge(node.id, edge.to_id)
+        floors = [node.floor] + [nodes[edge.to_id].floor for edge in flights]
+        landings = {node.floor: node.id}
+        below = None
+        for floor in range(min(floors), max(floors) + 1):
+            landing_id = landings.get(floor)
+            if landing_id is None:
+                landing_id = graph.add_node(f"{node.code}-F{floor}", f"{node.name} Floor {floor}",
+                                            node.building, floor, node.x, node.y, node.node_type)
+                landings[floor] = landing_id
+                added += 1
+            if below is not None:
+                graph.add_edge(below, landing_id, FLOOR_COST, 0)
+            below = landing_id
+        for edge in flights:
+            corridor = nodes[edge.to_id]
+            step = max(0.0, edge.weight - FLOOR_COST * abs(corridor.floor - node.floor))
+            graph.add_edge(landings[corridor.floor], corridor.id, step)
+    return added
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewire stairwell cliques in a snapshot into per-floor shafts")
+    parser.add_argument("snapshot")
+    parser.add_argument("--log", help="change log path (default: SNAPSHOT.changes)")
+    parser.add_argument("--checkpoint", action="store_true", help="fold the migration into the snapshot right away")
+    args = parser.parse_args()
+
+    log = ChangeLog(args.log) if args.log else ChangeLog.beside(args.snapshot)
+    graph = open_graph(args.snapshot, log)
+    if not isinstance(graph, GraphDB):
+        compact, graph = graph, GraphDB.from_graph(graph)
+        compact.close()
+    graph.changelog = log
+    added = migrate_shafts(graph)
+    if args.checkpoint:
+        checkpoint(graph, args.snapshot, log)
+    print(f"{added} landings added, {graph.edge_count()} edges; log at revision {log.seq}")
+
+if __name__ == "__main__":
+    main()
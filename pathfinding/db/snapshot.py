@@ -0,0 +1,105 @@
+"""
+Snapshot: Versioned binary graph file with zero-copy memory-mapped loading
+Layout: fixed header, section table, then 8-byte aligned flat arrays for node
+columns, CSR adjacency, string tables and a code-sorted id index. Opening a
+snapshot maps the file and casts memoryviews over it, so nothing is parsed or
+copied until a query touches it. Version 2 headers also record the change log
+revision folded into the file.
+"""
+import mmap
+import os
+import struct
+import sys
+
+from db.compact import COLUMN_ORDER, COLUMN_TYPES, CompactGraph, build_columns
+
+MAGIC = b"RNAVSNAP"
+VERSION = 2
+_HEADER_V1 = struct.Struct("<8sHBBIII")
+_HEADER = struct.Struct("<8sHBBIIIQ")
+_SECTION = struct.Struct("<QQ")
+_ALIGN = 8
+_LITTLE = 1 if sys.byteorder == "little" else 0
+
+SECTIONS = tuple((name, COLUMN_TYPES[name]) for name in COLUMN_ORDER)
+
+class SnapshotError(ValueError):
+    pass
+
+def save_snapshot(graph, path):
+    columns = build_columns(graph)
+    node_count = len(columns["x"])
+    edge_count = len(columns["targets"])
+    offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+    table = []
+    for name, _ in SECTIONS:
+        offset = -(-offset // _ALIGN) * _ALIGN
+        nbytes = len(columns[name]) * columns[name].itemsize
+        table.append((offset, nbytes))
+        offset += nbytes
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fp:
+        fp.write(_HEADER.pack(MAGIC, VERSION, _LITTLE, 0, node_count, edge_count, len(SECTIONS),
+                              getattr(graph, "revision", 0)))
+        for entry in table:
+            fp.write(_SECTION.pack(*entry))
+        for (name, _), (section_offset, _) in zip(SECTIONS, table):
+            fp.write(b"\0" * (section_offset - fp.tell()))
+            columns[name].tofile(fp)
+        fp.flush()
+        os.fsync(fp.fileno())
+    # Readers never see a half-written snapshot
+    os.replace(tmp_path, path)
+
+class _MappedFile:
+    def __init__(self, path):
+        with open(path, "rb") as fp:
+            self.mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.mm)
+        self.sections = []
+
+    def section(self, offset, nbytes, typecode):
+        if offset + nbytes > len(self.view):
+            raise SnapshotError("section extends past end of file")
+        view = self.view[offset:offset + nbytes].cast(typecode)
+        self.sections.append(view)
+        return view
+
+    def close(self):
+        for view in self.sections:
+            view.release()
+        self.sections = []
+        self.view.release()
+        self.mm.close()
+
+def open_snapshot(path) -> CompactGraph:
+    mapped = _MappedFile(path)
+    try:
+        if len(mapped.view) < _HEADER_V1.size:
+            raise SnapshotError(f"{path}: file too small for a snapshot header")
+        magic, version, little, _, node_count, edge_count, section_count = _HEADER_V1.unpack_from(mapped.view, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path}: not a graph snapshot")
+        if version == 1:
+            header_size, revision = _HEADER_V1.size, 0
+        elif version == VERSION:
+            header_size, revision = _HEADER.size, _HEADER.unpack_from(mapped.view, 0)[-1]
+        else:
+            raise SnapshotError(f"{path}: unsupported snapshot version {version}")
+        if little != _LITTLE:
+            raise SnapshotError(f"{path}: snapshot byte order does not match this platform")
+        if section_count != len(SECTIONS):
+            raise SnapshotError(f"{path}: unexpected section count {section_count}")
+        columns = {}
+        for i, (name, typecode) in enumerate(SECTIONS):
+            offset, nbytes = _SECTION.unpack_from(mapped.view, header_size + i * _SECTION.size)
+            columns[name] = mapped.section(offset, nbytes, typecode)
+        if len(columns["x"]) != node_count or len(columns["targets"]) != edge_count:
+            raise SnapshotError(f"{path}: section sizes do not match header counts")
+    except Exception:
+        mapped.close()
+        raise
+    graph = CompactGraph.from_columns(columns, source=mapped)
+    graph.path = os.fspath(path)
+    graph.revision = revision
+    return graph
@@ -0,0 +1,270 @@
+"""
+Spatial: Grid and KD-tree indexes for nearest-point and radius lookups
+GridIndex adapts its cell size to the point density so each cell holds about
+one point; it suits the evenly spread corridors used while building a graph.
+KDTree splits at medians and stays logarithmic on clustered floors (rooms on
+both sides of an empty corridor strip). SpatialIndex keeps one KDTree per
+(building, floor, node type) so positions from indoor positioning can be
+snapped to the graph without scanning other floors.
+"""
+import math
+import weakref
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LINEAR_SCAN_LIMIT = 16
+KD_LEAF_SIZE = 8
+
+class GridIndex:
+    def __init__(self, points):
+        # points: iterable of (id, x, y); ties on distance resolve to the lowest id
+        self.points: List[Tuple[int, float, float]] = list(points)
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, float, float]]] = {}
+        if not self.points:
+            self.cell_size = 1.0
+            self.bounds = (0, 0, 0, 0)
+            return
+        xs = [p[1] for p in self.points]
+        ys = [p[2] for p in self.points]
+        width = max(xs) - min(xs)
+        height = max(ys) - min(ys)
+        area = max(width * height, width, height, 1.0)
+        self.cell_size = max(math.sqrt(area / len(self.points)), 1e-6)
+        for point in self.points:
+            self.cells.setdefault(self._cell(point[1], point[2]), []).append(point)
+        keys = self.cells.keys()
+        self.bounds = (min(k[0] for k in keys), min(k[1] for k in keys),
+                       max(k[0] for k in keys), max(k[1] for k in keys))
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, x, y):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size)))
+
+    def _ring(self, cx, cy, r):
+        # Cells at Chebyshev distance r from (cx, cy), clipped to the occupied bounds
+        min_x, min_y, max_x, max_y = self.bounds
+        x0, x1 = max(cx - r, min_x), min(cx + r, max_x)
+        y0, y1 = max(cy - r + 1, min_y), min(cy + r - 1, max_y)
+        for gy in (cy - r, cy + r) if r else (cy,):
+            if min_y <= gy <= max_y:
+                for gx in range(x0, x1 + 1):
+                    yield (gx, gy)
+        if r:
+            for gx in (cx - r, cx + r):
+                if min_x <= gx <= max_x:
+                    for gy in range(y0, y1 + 1):
+                        yield (gx, gy)
+
+    def nearest(self, x, y):
+        """Return (distance, id) of the closest point, or None when empty"""
+        if not self.points:
+            return None
+        if len(self.points) <= LINEAR_SCAN_LIMIT:
+            return min((math.sqrt((x - px)**2 + (y - py)**2), point_id) for point_id, px, py in self.points)
+        cx, cy = self._cell(x, y)
+        min_x, min_y, max_x, max_y = self.bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        best = None
+        for r in range(max_ring + 1):
+            for key in self._ring(cx, cy, r):
+                for point_id, px, py in self.cells.get(key, ()):
+                    distance = math.sqrt((x - px)**2 + (y - py)**2)
+                    if best is None or (distance, point_id) < best:
+                        best = (distance, point_id)
+            # Anything beyond ring r is at least r cells away
+            if best is not None and best[0] < r * self.cell_size:
+                break
+        return best
+
+    def within(self, x, y, radius):
+        """(distance, id) of every point within radius, closest first"""
+        if not self.points or radius < 0:
+            return []
+        found = []
+        if len(self.points) <= LINEAR_SCAN_LIMIT:
+            candidates = self.points
+        else:
+            cx0, cy0 = self._cell(x - radius, y - radius)
+            cx1, cy1 = self._cell(x + radius, y + radius)
+            min_x, min_y, max_x, max_y = self.bounds
+            cx0, cy0, cx1, cy1 = max(cx0, min_x), max(cy0, min_y), min(cx1, max_x), min(cy1, max_y)
+            if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+                # The circle covers most of the grid: visiting occupied cells is cheaper
+                candidates = self.points
+            else:
+                cells = self.cells
+                candidates = [point for gx in range(cx0, cx1 + 1) for gy in range(cy0, cy1 + 1)
+                              for point in cells.get((gx, gy), ())]
+        for point_id, px, py in candidates:
+            distance = math.sqrt((x - px)**2 + (y - py)**2)
+            if distance <= radius:
+                found.append((distance, point_id))
+        found.sort()
+        return found
+
+class KDTree:
+    def __init__(self, points):
+        # points: iterable of (id, x, y); ties on distance resolve to the lowest id
+        self.points: List[Tuple[int, float, float]] = list(points)
+        self.root = self._build(self.points)[0] if self.points else None
+
+    def __len__(self):
+        return len(self.points)
+
+    @classmethod
+    def _build(cls, points, region=None):
+        # Inner nodes are (low, high, low_box, high_box) tuples, leaves are lists of points;
+        # boxes are the tight (min_x, min_y, max_x, max_y) of a subtree, region is the cell it splits
+        if len(points) <= KD_LEAF_SIZE or region is None:
+            xs = [p[1] for p in points]
+            ys = [p[2] for p in points]
+            box = (min(xs), min(ys), max(xs), max(ys))
+            if len(points) <= KD_LEAF_SIZE:
+                return list(points), box
+            region = box
+        min_x, min_y, max_x, max_y = region
+        axis = 1 if max_x - min_x >= max_y - min_y else 2
+        points = sorted(points, key=itemgetter(axis))
+        middle = len(points) // 2
+        split = points[middle][axis]
+        if axis == 1:
+            low_region, high_region = (min_x, min_y, split, max_y), (split, min_y, max_x, max_y)
+        else:
+            low_region, high_region = (min_x, min_y, max_x, split), (min_x, split, max_x, max_y)
+        low, low_box = cls._build(points[:middle], low_region)
+        high, high_box = cls._build(points[middle:], high_region)
+        box = (min(low_box[0], high_box[0]), min(low_box[1], high_box[1]),
+               max(low_box[2], high_box[2]), max(low_box[3], high_box[3]))
+        return (low, high, low_box, high_box), box
+
+    @staticmethod
+    def _box_d2(x, y, box):
+        min_x, min_y, max_x, max_y = box
+        dx = min_x - x if x < min_x else (x - max_x if x > max_x else 0.0)
+        dy = min_y - y if y < min_y else (y - max_y if y > max_y else 0.0)
+        return dx * dx + dy * dy
+
+    def nearest(self, x, y):
+        """Return (distance, id) of the closest point, or None when empty"""
+        if self.root is None:
+            return None
+        box_d2 = self._box_d2
+        best_d2, best_id = math.inf, -1
+        # Entries are (squared distance to the subtree's bounding box, subtree)
+        stack = [(0.0, self.root)]
+        while stack:
+            node_d2, node = stack.pop()
+            if node_d2 > best_d2:
+                continue
+            while node.__class__ is tuple:
+                low, high, low_box, high_box = node
+                low_d2, high_d2 = box_d2(x, y, low_box), box_d2(x, y, high_box)
+                # Descend into the closer box first, keep the other for later
+                if low_d2 <= high_d2:
+                    if high_d2 <= best_d2:
+                        stack.append((high_d2, high))
+                    node = low
+                else:
+                    if low_d2 <= best_d2:
+                        stack.append((low_d2, low))
+                    node = high
+            for point_id, px, py in node:
+                d2 = (x - px)**2 + (y - py)**2
+                if d2 < best_d2 or (d2 == best_d2 and point_id < best_id):
+                    best_d2, best_id = d2, point_id
+        return (math.sqrt(best_d2), best_id)
+
+    def within(self, x, y, radius):
+        """(distance, id) of every point within radius, closest first"""
+        if self.root is None or radius < 0:
+            return []
+        box_d2 = self._box_d2
+        r2 = radius * radius
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node.__class__ is tuple:
+                low, high, low_box, high_box = node
+                if box_d2(x, y, low_box) <= r2:
+                    stack.append(low)
+                if box_d2(x, y, high_box) <= r2:
+                    stack.append(high)
+                continue
+            for point_id, px, py in node:
+                d2 = (x - px)**2 + (y - py)**2
+                if d2 <= r2:
+                    found.append((math.sqrt(d2), point_id))
+        found.sort()
+        return found
+
+class SpatialIndex:
+    """One KDTree per (building, floor, node type) over the live nodes of a graph"""
+
+    def __init__(self, graph):
+        self.version = graph.version
+        groups: Dict[Tuple[int, int, str], List[Tuple[int, float, float]]] = {}
+        lookup = graph.lookup
+        closed = getattr(graph, "closed", ())
+        for node in graph.nodes:
+            # Removed nodes keep their slot but drop out of lookup; closed ones cannot be routed from
+            if lookup.get(node.code) == node.id and node.id not in closed:
+                groups.setdefault((node.building, node.floor, node.node_type), []).append((node.id, node.x, node.y))
+        # floor -> building -> node type -> tree, so a query only visits the trees of its floor
+        self.trees: Dict[int, Dict[int, Dict[str, KDTree]]] = {}
+        for (building, floor, node_type), points in groups.items():
+            self.trees.setdefault(floor, {}).setdefault(building, {})[node_type] = KDTree(points)
+
+    def _trees(self, building, floor, types):
+        by_building = self.trees.get(floor)
+        if not by_building:
+            return
+        if building is None:
+            per_type = by_building.values()
+        else:
+            per_type = (by_building[building],) if building in by_building else ()
+        for trees in per_type:
+            if types is None:
+                yield from trees.values()
+            else:
+                for node_type in dict.fromkeys(types):
+                    tree = trees.get(node_type)
+                    if tree is not None:
+                        yield tree
+
+    def nearest(self, x, y, building, floor, types: Optional[Iterable[str]] = None):
+        """(distance, id) of the closest node on the floor, or None; building=None searches all buildings"""
+        best = None
+        for tree in self._trees(building, floor, types):
+            found = tree.nearest(x, y)
+            if found is not None and (best is None or found < best):
+                best = found
+        return best
+
+    def within(self, x, y, radius, building, floor, types: Optional[Iterable[str]] = None):
+        found = []
+        for tree in self._trees(building, floor, types):
+            found.extend(tree.within(x, y, radius))
+        found.sort()
+        return found
+
+_indexes = weakref.WeakKeyDictionary()
+
+def spatial_index(graph):
+    """SpatialIndex for graph, built on first use and rebuilt after graph changes"""
+    index = _indexes.get(graph)
+    if index is None or index.version != graph.version:
+        index = _indexes[graph] = SpatialIndex(graph)
+    return index
+
+def nearest_node(graph, x, y, building, floor, types=None):
+    """Closest live Node to (x, y) on the floor, or None"""
+    found = spatial_index(graph).nearest(x, y, building, floor, types)
+    return graph.get_node(found[1]) if found else None
+
+def nodes_within(graph, x, y, radius, building, floor, types=None):
+    """[(distance, Node)] within radius on the floor, closest first"""
+    return [(distance, graph.get_node(node_id))
+            for distance, node_id in spatial_index(graph).within(x, y, radius, building, floor, types)]
@@ -0,0 +1,72 @@
+"""
+Synthetic campus generator for scale testing
+Produces multi-building, multi-floor layouts in the same record format as the
+built-in campus (code, name, building, floor, x, y, node_type)
+"""
+import csv
+import random
+from typing import Iterator, Tuple
+
+from db.graph_db import GraphDB
+
+BUILDING_SPACING = 150.0
+FLOOR_WIDTH = 100.0
+FLOOR_DEPTH = 60.0
+
+def generate_campus(buildings=4, floors=3, rooms_per_floor=20, stairwells=2,
+                    corridors_per_floor=1, entrances=1, elevators=0, seed=0) -> Iterator[Tuple]:
+    rng = random.Random(seed)
+    yield ("CENTRAL", "Central Corridor", 0, 0, buildings * BUILDING_SPACING / 2, -20.0, "corridor")
+    for b in range(1, buildings + 1):
+        origin = (b - 1) * BUILDING_SPACING
+        for f in range(floors):
+            for c in range(corridors_per_floor):
+                x = origin + FLOOR_WIDTH * (c + 0.5) / corridors_per_floor
+                yield (f"H{b}-C{f}-{c}", f"Corridor {c} Hus {b} Floor {f}", b, f, x, FLOOR_DEPTH / 2, "corridor")
+            for r in range(rooms_per_floor):
+                x = origin + rng.uniform(0.0, FLOOR_WIDTH)
+                y = rng.choice((rng.uniform(0.0, FLOOR_DEPTH / 3), rng.uniform(2 * FLOOR_DEPTH / 3, FLOOR_DEPTH)))
+                yield (f"{b}-{f}-{r + 1:04d}", f"Room {f}{r + 1:03d} Hus {b}", b, f, round(x, 2), round(y, 2), "room")
+        for s in range(stairwells):
+            x = origin + FLOOR_WIDTH * (s + 0.5) / stairwells
+            yield (f"H{b}-S{s + 1}", f"Stairwell {s + 1} Hus {b}", b, 0, x, FLOOR_DEPTH / 2 + 5.0, "stairs")
+        for v in range(elevators):
+            x = origin + FLOOR_WIDTH * (v + 0.5) / elevators
+            yield (f"H{b}-L{v + 1}", f"Elevator {v + 1} Hus {b}", b, 0, x, FLOOR_DEPTH / 2 - 5.0, "elevator")
+        for e in range(entrances):
+            x = origin + FLOOR_WIDTH * (e + 0.5) / entrances
+            yield (f"H{b}-E{e + 1}", f"Entrance {e + 1} Hus {b}", b, 0, x, FLOOR_DEPTH + 20.0, "entrance")
+
+def campus_size(buildings=4, floors=3, rooms_per_floor=20, stairwells=2,
+                corridors_per_floor=1, entrances=1, elevators=0, **_):
+    return 1 + buildings * (floors * (rooms_per_floor + corridors_per_floor) + stairwells + elevators + entrances)
+
+def build_campus(**params) -> GraphDB:
+    graph = GraphDB(build_campus=False)
+    for record in generate_campus(**params):
+        graph.add_node(*record)
+    graph._generate_connections()
+    return graph
+
+def write_campus_csv(path, **params):
+    with open(path, "w", newline="", encoding="utf-8") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(("code", "name", "building", "floor", "x", "y", "node_type"))
+        writer.writerows(generate_campus(**params))
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Write a synthetic campus as a nodes CSV")
+    parser.add_argument("path")
+    parser.add_argument("--buildings", type=int, default=4)
+    parser.add_argument("--floors", type=int, default=3)
+    parser.add_argument("--rooms-per-floor", type=int, default=20)
+    parser.add_argument("--stairwells", type=int, default=2)
+    parser.add_argument("--corridors-per-floor", type=int, default=1)
+    parser.add_argument("--entrances", type=int, default=1)
+    parser.add_argument("--elevators", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = vars(parser.parse_args())
+    path = args.pop("path")
+    write_campus_csv(path, **args)
+    print(f"Wrote {campus_size(**args)} nodes to {path}")
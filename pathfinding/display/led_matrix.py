@@ -1,116 +1,298 @@
 """
 LEDMatrix: Display logic for navigation steps
+Frames live in a packed FrameBuffer, one palette index per pixel in a bytearray.
+Step glyphs and distance labels are rendered once into a module-level glyph
+cache; a step is drawn by copying its glyph and overlaying the label. show()
+diffs the frame against what the backend already shows and hands only the
+changed pixels to backend.write() in one call.
+Backends implement write(changes) with changes a list of (x, y, char):
+TerminalBackend prints the frame (the stand-in for testing), MAX7219Backend
+drives an 8x8 module over SPI and sends only the rows that changed.
 """
 import math
+import sys
 
-class LEDMatrix:
-    def __init__(self):
+BLANK = ' '
+# Palette index 0 is the blank pixel; unknown characters are appended on first use
+PALETTE = [BLANK, '█', '▲', '▼', '◀', '▶', '►', '•', 'm'] + [str(digit) for digit in range(10)]
+_codes = {char: code for code, char in enumerate(PALETTE)}
+
+def pixel_code(char):
+    code = _codes.get(char)
+    if code is None:
+        if len(PALETTE) == 256:
+            raise ValueError(f"Palette full, cannot add {char!r}")
+        code = _codes[char] = len(PALETTE)
+        PALETTE.append(char)
+    return code
+
+class FrameBuffer:
+    def __init__(self, size=8):
+        self.size = size
+        self.pixels = bytearray(size * size)
+
+    def clear(self):
+        self.pixels[:] = bytes(len(self.pixels))
+
+    def set(self, x, y, char):
+        if 0 <= x < self.size and 0 <= y < self.size:
+            self.pixels[y * self.size + x] = pixel_code(char)
+
+    def get(self, x, y):
+        return PALETTE[self.pixels[y * self.size + x]]
+
+    def load(self, image):
+        """Replace every pixel with a pre-rendered image of the same size"""
+        self.pixels[:] = image
+
+    def overlay(self, cells):
+        """Write (index, code) pairs over the current frame"""
+        pixels = self.pixels
+        for index, code in cells:
+            pixels[index] = code
+
+    def diff(self, other):
+        """(x, y, char) for every pixel that differs from other"""
+        if self.pixels == other.pixels:
+            return []
+        size = self.size
+        return [(i % size, i // size, PALETTE[new])
+                for i, (new, old) in enumerate(zip(self.pixels, other.pixels)) if new != old]
+
+    def rows(self):
+        size = self.size
+        return ["".join(PALETTE[code] for code in self.pixels[y * size:(y + 1) * size]) for y in range(size)]
+
+# Glyph painters draw onto a blank FrameBuffer; their output is cached per size
+def _draw_straight(frame):
+    center = frame.size // 2
+    frame.set(center, center-2, '▲')
+
+def _draw_left(frame):
+    center = frame.size // 2
+    frame.set(center-2, center, '◀')
+
+def _draw_right(frame):
+    center = frame.size // 2
+    frame.set(center+2, center, '▶')
+
+def _draw_stairs_up(frame):
+    # A stair-step pattern up and an arrow
+    center = frame.size // 2
+    for i in range(4):
+        frame.set(center-2+i, center+1-i, '█')
+    frame.set(center+2, center-3, '▲')
+
+def _draw_stairs_down(frame):
+    # A stair-step pattern down and an arrow
+    center = frame.size // 2
+    for i in range(4):
+        frame.set(center-2+i, center-2+i, '█')
+    frame.set(center+2, center+3, '▼')
+
+def _draw_dot(frame):
+    center = frame.size // 2
+    frame.set(center, center, '•')
+
+def _draw_straight_arrow(frame):
+    center = frame.size // 2
+    for y in range(2, 6):
+        frame.set(center, y, '█')
+    frame.set(center, 1, '▲')
+
+def _draw_left_turn(frame):
+    center = frame.size // 2
+    for x in range(1, center+1):
+        frame.set(x, center, '█')
+    for y in range(center, 6):
+        frame.set(1, y, '█')
+    frame.set(0, center, '◀')
+
+def _draw_right_turn(frame):
+    center = frame.size // 2
+    for x in range(center, frame.size-1):
+        frame.set(x, center, '█')
+    for y in range(center, 6):
+        frame.set(frame.size-2, y, '█')
+    frame.set(frame.size-1, center, '▶')
+
+def _draw_stairs_up_arrow(frame):
+    for i in range(4):
+        frame.set(i+2, 6-i, '█')
+    frame.set(frame.size//2, 1, '▲')
+
+def _draw_stairs_down_arrow(frame):
+    for i in range(4):
+        frame.set(i+2, 1+i, '█')
+    frame.set(frame.size//2, frame.size-2, '▼')
+
+def _draw_line(frame, x0, y0, x1, y1):
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    x, y = x0, y0
+    while True:
+        frame.set(x, y, '█')
+        if x == x1 and y == y1:
+            break
+        e2 = 2 * err
+        if e2 > -dy:
+            err -= dy
+            x += sx
+        if e2 < dx:
+            err += dx
+            y += sy
+
+def _draw_general_direction(frame, bearing):
+    center = frame.size // 2
+    rad = math.radians(bearing)
+    end_x = int(center + math.sin(rad) * 3)
+    end_y = int(center - math.cos(rad) * 3)
+    _draw_line(frame, center, center, end_x, end_y)
+    frame.set(end_x, end_y, '►')
+
+GLYPHS = {
+    # What display_step shows: a single arrow head for clarity
+    "straight": _draw_straight,
+    "left": _draw_left,
+    "right": _draw_right,
+    "stairs_up": _draw_stairs_up,
+    "stairs_down": _draw_stairs_down,
+    "dot": _draw_dot,
+    # Full-size arrows
+    "straight_arrow": _draw_straight_arrow,
+    "left_turn": _draw_left_turn,
+    "right_turn": _draw_right_turn,
+    "stairs_up_arrow": _draw_stairs_up_arrow,
+    "stairs_down_arrow": _draw_stairs_down_arrow,
+}
+
+_glyphs = {}
+_labels = {}
+
+def glyph(name, size=8):
+    """Pre-rendered image (bytes, size * size) of a named glyph, or of "bearing:<degrees>" """
+    key = (name, size)
+    image = _glyphs.get(key)
+    if image is None:
+        frame = FrameBuffer(size)
+        if name.startswith("bearing:"):
+            _draw_general_direction(frame, int(name[8:]))
+        else:
+            GLYPHS[name](frame)
+        image = _glyphs[key] = bytes(frame.pixels)
+    return image
+
+def bearing_glyph(bearing, size=8):
+    return glyph(f"bearing:{round(bearing) % 360}", size)
+
+def label(text, size=8):
+    """(index, code) cells that centre text on the bottom row"""
+    key = (text, size)
+    cells = _labels.get(key)
+    if cells is None:
+        start = max(0, (size - len(text)) // 2)
+        row = (size - 1) * size
+        cells = _labels[key] = tuple((row + start + i, pixel_code(char))
+                                     for i, char in enumerate(text) if start + i < size)
+    return cells
+
+class TerminalBackend:
+    """Prints the matrix as a box of characters; redraws on every write, even an empty one"""
+
+    def __init__(self, size=8, stream=None):
+        self.size = size
+        self.stream = stream
+        self.frame = FrameBuffer(size)
+        # Pixels received over all writes, to compare against full-frame updates
+        self.writes = 0
+        self.pixels_written = 0
+
+    def write(self, changes):
+        for x, y, char in changes:
+            self.frame.set(x, y, char)
+        self.writes += 1
+        self.pixels_written += len(changes)
+        stream = self.stream or sys.stdout
+        lines = ["┌" + "─" * self.size + "┐"]
+        lines.extend("│" + row + "│" for row in self.frame.rows())
+        lines.append("└" + "─" * self.size + "┘")
+        stream.write("\n".join(lines) + "\n")
+
+class MAX7219Backend:
+    """
+    One 8x8 MAX7219 module over SPI (spidev). Lit pixels are any non-blank
+    character. Each row is a digit register, so a write sends only dirty rows.
+    """
+    DECODE_MODE, INTENSITY, SCAN_LIMIT, SHUTDOWN, DISPLAY_TEST = 0x09, 0x0A, 0x0B, 0x0C, 0x0F
+
+    def __init__(self, bus=0, device=0, intensity=4, spi=None):
+        if spi is None:
+            import spidev
+            spi = spidev.SpiDev()
+            spi.open(bus, device)
+            spi.max_speed_hz = 1000000
+        self.spi = spi
         self.size = 8
-        self.clear()
+        self.rows = bytearray(8)
+        for register, value in ((self.DISPLAY_TEST, 0), (self.SCAN_LIMIT, 7), (self.DECODE_MODE, 0),
+                                (self.INTENSITY, intensity), (self.SHUTDOWN, 1)):
+            self.spi.xfer2([register, value])
+        for y in range(8):
+            self.spi.xfer2([y + 1, 0])
+
+    def write(self, changes):
+        dirty = set()
+        for x, y, char in changes:
+            bit = 0x80 >> x
+            value = self.rows[y] | bit if char != BLANK else self.rows[y] & ~bit
+            if value != self.rows[y]:
+                self.rows[y] = value
+                dirty.add(y)
+        for y in sorted(dirty):
+            self.spi.xfer2([y + 1, self.rows[y]])
+
+    def close(self):
+        self.spi.close()
+
+BACKENDS = {"terminal": TerminalBackend, "max7219": MAX7219Backend}
+
+class LEDMatrix:
+    def __init__(self, backend=None, size=8):
+        self.size = size
+        self.backend = backend if backend is not None else TerminalBackend(size)
+        self.frame = FrameBuffer(size)
+        # What the backend currently shows; show() sends the difference
+        self.shown = FrameBuffer(size)
 
     def clear(self):
-        self.matrix = [[' ' for _ in range(self.size)] for _ in range(self.size)]
+        self.frame.clear()
 
     def display_step(self, instruction):
-        self.clear()
+        self.frame.load(glyph(self._glyph_name(instruction), self.size))
+        self._add_distance(instruction["distance"])
+        self.show()
+
+    def _glyph_name(self, instruction):
         turn_direction = instruction["turn_direction"]
-        distance = instruction["distance"]
-        # Only show a single arrow head for clarity
-        center = self.size // 2
-        if turn_direction == "straight":
-            self.matrix[center-2][center] = '▲'
-        elif turn_direction == "left":
-            self.matrix[center][center-2] = '◀'
-        elif turn_direction == "right":
-            self.matrix[center][center+2] = '▶'
-        elif "stairs up" in instruction["instruction"].lower():
-            # Draw a stair-step pattern up and an arrow
-            for i in range(4):
-                self.matrix[center+1-i][center-2+i] = '█'
-            self.matrix[center-3][center+2] = '▲'
-        elif "stairs down" in instruction["instruction"].lower():
-            # Draw a stair-step pattern down and an arrow
-            for i in range(4):
-                self.matrix[center-2+i][center-2+i] = '█'
-            self.matrix[center+3][center+2] = '▼'
-        else:
-            # Default: show a dot in the center
-            self.matrix[center][center] = '•'
-        self._add_distance(distance)
-        self._print()
-
-    def _draw_straight_arrow(self):
-        center = self.size // 2
-        for y in range(2, 6):
-            self.matrix[y][center] = '█'
-        self.matrix[1][center] = '▲'
-
-    def _draw_left_turn(self):
-        center = self.size // 2
-        for x in range(1, center+1):
-            self.matrix[center][x] = '█'
-        for y in range(center, 6):
-            self.matrix[y][1] = '█'
-        self.matrix[center][0] = '◀'
-
-    def _draw_right_turn(self):
-        center = self.size // 2
-        for x in range(center, self.size-1):
-            self.matrix[center][x] = '█'
-        for y in range(center, 6):
-            self.matrix[y][self.size-2] = '█'
-        self.matrix[center][self.size-1] = '▶'
-
-    def _draw_stairs_up(self):
-        for i in range(4):
-            self.matrix[6-i][i+2] = '█'
-        self.matrix[1][self.size//2] = '▲'
-
-    def _draw_stairs_down(self):
-        for i in range(4):
-            self.matrix[1+i][i+2] = '█'
-        self.matrix[self.size-2][self.size//2] = '▼'
-
-    def _draw_general_direction(self, bearing):
-        center = self.size // 2
-        rad = math.radians(bearing)
-        dx = math.sin(rad) * 3
-        dy = math.cos(rad) * 3
-        end_x = int(center + dx)
-        end_y = int(center - dy)
-        self._draw_line(center, center, end_x, end_y)
-        if 0 <= end_x < self.size and 0 <= end_y < self.size:
-            self.matrix[end_y][end_x] = '►'
-
-    def _draw_line(self, x0, y0, x1, y1):
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
-        err = dx - dy
-        x, y = x0, y0
-        while True:
-            if 0 <= x < self.size and 0 <= y < self.size:
-                self.matrix[y][x] = '█'
-            if x == x1 and y == y1:
-                break
-            e2 = 2 * err
-            if e2 > -dy:
-                err -= dy
-                x += sx
-            if e2 < dx:
-                err += dx
-                y += sy
+        if turn_direction in ("straight", "left", "right"):
+            return turn_direction
+        text = instruction["instruction"].lower()
+        if "stairs up" in text:
+            return "stairs_up"
+        if "stairs down" in text:
+            return "stairs_down"
+        # Default: a dot in the center
+        return "dot"
 
     def _add_distance(self, distance):
-        dist_str = f"{distance}m"
-        start = max(0, (self.size - len(dist_str)) // 2)
-        for i, char in enumerate(dist_str):
-            if start + i < self.size:
-                self.matrix[self.size-1][start + i] = char
-
-    def _print(self):
-        print("┌" + "─" * self.size + "┐")
-        for row in self.matrix:
-            print("│" + "".join(row) + "│")
-        print("└" + "─" * self.size + "┘")
+        self.frame.overlay(label(f"{distance}m", self.size))
+
+    def show(self):
+        """Send pixels changed since the last show() as one write; returns how many"""
+        changes = self.frame.diff(self.shown)
+        self.shown.load(self.frame.pixels)
+        self.backend.write(changes)
+        return len(changes)
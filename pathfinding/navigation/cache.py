@@ -0,0 +1,112 @@
+"""
+RouteCache: Bounded cache of route results for repeated kiosk queries
+Entries are keyed by (start_code, end_code, options) and evicted least recently
+used first, after a TTL, or when the estimated size exceeds the memory cap.
+The whole cache is dropped as soon as the graph version changes, so a cached
+route never outlives the graph it was computed on.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from algorithms.route import Route
+
+def estimate_size(result):
+    """Rough resident size of a route result in bytes (shared Node objects excluded)"""
+    if isinstance(result, Route):
+        return sys.getsizeof(result) + result.nbytes()
+    if isinstance(result, list):
+        # Alternative routes
+        return sys.getsizeof(result) + sum(estimate_size(route) for route in result)
+    size = sys.getsizeof(result)
+    for step in result.get("instructions", ()):
+        size += sys.getsizeof(step) + sys.getsizeof(step["instruction"])
+    return size + sys.getsizeof(result.get("error", ""))
+
+class RouteCache:
+    def __init__(self, graph, max_entries=256, max_bytes=2 * 1024 * 1024, ttl=None, clock=time.monotonic):
+        self.graph = graph
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._version = graph.version
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.graph.version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = self.graph.version
+            self.invalidations += 1
+
+    def get(self, start_code, end_code, options=()):
+        key = (start_code, end_code, options)
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and self._clock() - entry[1] > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, start_code, end_code, result, options=(), version=None):
+        """Store a result; version is the graph version it was computed on (defaults to current)"""
+        key = (start_code, end_code, options)
+        size = estimate_size(result)
+        with self._lock:
+            self._check_version()
+            if (version is not None and version != self._version) or size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, self._clock(), size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def route(self, start_code, end_code, search, options=()):
+        """Cached search(graph, start_code, end_code); results are shared, treat them as read-only"""
+        result = self.get(start_code, end_code, options)
+        if result is None:
+            # Search a fixed view so edits made meanwhile cannot mix into the result
+            view = self.graph.view()
+            result = search(view, start_code, end_code)
+            self.put(start_code, end_code, result, options, view.version)
+        return result
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,57 @@
+"""
+RoomCatalogue: The per-building room list, saved beside a snapshot
+"List rooms" at startup reads this small JSON file instead of opening the
+graph. The file records the size and mtime of the snapshot and the size of its
+change log as they were before the graph was loaded; once either has moved on
+the catalogue is ignored until the next load writes it again. Only the standard
+library is imported, so reading it costs nothing on the startup path.
+"""
+import json
+import os
+
+class RoomCatalogue:
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.path = f"{snapshot_path}.rooms"
+        # Same name as ChangeLog.beside(snapshot_path)
+        self.changes_path = f"{snapshot_path}.changes"
+
+    def stamp(self):
+        """What the catalogue must match to be current, or None without a snapshot"""
+        try:
+            snapshot = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        try:
+            changes = os.stat(self.changes_path).st_size
+        except FileNotFoundError:
+            changes = 0
+        return [snapshot.st_size, snapshot.st_mtime_ns, changes]
+
+    def load(self):
+        """{building: [(code, name, floor)]} if the catalogue is current, else None"""
+        stamp = self.stamp()
+        if stamp is None:
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                document = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if document.get("stamp") != stamp:
+            return None
+        return {building: [tuple(room) for room in rooms] for building, rooms in document["buildings"]}
+
+    def save(self, stamp, by_building):
+        """Write the listing of a graph loaded when the files matched stamp"""
+        if stamp is None:
+            return
+        document = {"stamp": stamp, "buildings": [[building, rooms] for building, rooms in by_building.items()]}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fp:
+                json.dump(document, fp, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as exc:
+            # A read-only card only costs the next start a graph load
+            print(f"Warning: room catalogue not saved: {exc}")
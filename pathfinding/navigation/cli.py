@@ -1,63 +1,314 @@
 """
 Navigation CLI: User interface for pathfinding
+The menu comes up before the graph is touched. "List rooms" is served from the
+room catalogue beside the snapshot; the graph is built or opened, with the
+modules it needs, in a background thread once the user picks "Navigate", so it
+loads while they type the room names.
 """
-from db.graph_db import GraphDB
-from display.led_matrix import LEDMatrix
-from algorithms.astar import find_path_bidirectional_astar
+import argparse
+import threading
+
+from display.led_matrix import BACKENDS, LEDMatrix
+from navigation.catalogue import RoomCatalogue
 
 class NavigationSystem:
-    def __init__(self):
-        print("Initializing navigation system...")
-        self.graph = GraphDB()
-        self.display = LEDMatrix()
-        print(f"Ready. {len(self.graph.nodes)} nodes, {sum(len(adj) for adj in self.graph.adjacency)} connections")
+    def __init__(self, snapshot_path=None, kiosk=None, metrics=None, display="terminal", profile=None):
+        self.snapshot_path = snapshot_path
+        self.kiosk = kiosk
+        self.metrics = metrics
+        self.profile = profile
+        self.catalogue = RoomCatalogue(snapshot_path) if snapshot_path else None
+        self._display_backend = display
+        self._display = None
+        self._service = None
+        self._loader = None
+        self._load_error = None
+        print("Ready.")
+
+    @property
+    def display(self):
+        # The backend may open SPI, so it is only set up for the first step shown
+        if self._display is None:
+            self._display = LEDMatrix(BACKENDS[self._display_backend]())
+        return self._display
+
+    @property
+    def service(self):
+        """The RoutingService, waiting for the background load (or loading now)"""
+        if self._service is None:
+            self.start_loading()
+            self._loader.join()
+            if self._service is None:
+                raise self._load_error
+            print(f"Map loaded: {self.graph.node_count()} nodes, {self.graph.edge_count()} connections")
+        return self._service
+
+    @property
+    def graph(self):
+        return self.service.graph
+
+    def start_loading(self):
+        if self._loader is None:
+            self._loader = threading.Thread(target=self._load, name="graph-loader", daemon=True)
+            self._loader.start()
+
+    def _load(self):
+        try:
+            from navigation.service import RoutingService
+            stamp = self.catalogue.stamp() if self.catalogue else None
+            service = RoutingService(self.snapshot_path, self.kiosk, self.metrics)
+            if self.catalogue and stamp is None:
+                # First start: the service has just written the snapshot
+                stamp = self.catalogue.stamp()
+            if self.catalogue and self.catalogue.load() is None:
+                self.catalogue.save(stamp, service.rooms())
+            self._service = service
+        except Exception as exc:
+            # Raised again in the foreground by the service property
+            self._load_error = exc
+
     def run(self):
         while True:
             print("\n1. Navigate")
             print("2. List rooms")
-            print("3. Exit")
+            print("3. Visit several rooms")
+            print("4. Exit")
             choice = input("Choose: ").strip()
             if choice == "1":
                 self._navigate()
             elif choice == "2":
                 self._list_rooms()
             elif choice == "3":
+                self._visit()
+            elif choice == "4":
                 break
+    def _ask_start(self):
+        """Start code the user typed or picked, or None"""
+        if self._service is None:
+            # Opened in the background while the room names are typed
+            self.start_loading()
+        else:
+            self.service.sync_changes()
+        start = input("Start room (or position x,y,floor[,building]): ").strip()
+        if not start:
+            print("Invalid input")
+            return None
+        return self._snap_position(start) if "," in start else self._pick_room(start)
+
     def _navigate(self):
-        start = input("Start room: ").strip()
+        start = self._ask_start()
+        if start is None:
+            return
         end = input("End room: ").strip()
-        if not start or not end:
+        if not end:
+            print("Invalid input")
+            return
+        end = self._pick_room(end)
+        if end is None:
+            return
+        result, stats = self.service.route(start, end, self.profile)
+        try:
+            self._show_route(result)
+        finally:
+            # Recorded after the walk, so instruction generation is included
+            self.service.record(stats)
+
+    def _visit(self):
+        start = self._ask_start()
+        if start is None:
+            return
+        stops = []
+        for text in input("Rooms to visit, separated by commas: ").split(","):
+            if not text.strip():
+                continue
+            code = self._pick_room(text.strip())
+            if code is None:
+                return
+            stops.append(code)
+        if not stops:
             print("Invalid input")
             return
-        result = find_path_bidirectional_astar(self.graph, start, end)
+        end = start if input("Return to the start afterwards? (y/N): ").strip().lower() == 'y' else None
+        result = self.service.visit(start, stops, end, self.profile)
+        if result["success"]:
+            print(f"\nVisiting {len(result.stops)} rooms in this order:")
+            for i, node_id in enumerate(result.stops, 1):
+                node = self.graph.get_node(node_id)
+                print(f"  {i}. {node.name} ({node.code})")
+        self._show_route(result, alternatives=False)
+
+    def _show_route(self, result, alternatives=True):
         if not result["success"]:
             print(f"Error: {result['error']}")
             return
         print(f"\nRoute: {result['start_room'].name} → {result['end_room'].name}")
         print(f"Distance: {result['total_distance']}m")
         print(f"Time: {result['total_time']}s")
-        print(f"Steps: {len(result['instructions'])}")
-        if input("\nStart navigation? (y/N): ").lower() == 'y':
-            self._step_navigation(result["instructions"])
-    def _step_navigation(self, instructions):
-        for i, instruction in enumerate(instructions):
-            print(f"\nStep {i+1}/{len(instructions)}")
+        print(f"Steps: {result.step_count}")
+        prompt = "\nStart navigation? (y/N, a for alternatives): " if alternatives else "\nStart navigation? (y/N): "
+        answer = input(prompt).strip().lower()
+        if answer == 'a' and alternatives:
+            result = self._pick_alternative(result)
+            if result is not None:
+                self._step_navigation(result)
+        elif answer == 'y':
+            self._step_navigation(result)
+
+    def _pick_alternative(self, result):
+        """The route the user picks among up to three different ones, or None"""
+        routes = self.service.alternatives(result["start_room"].code, result["end_room"].code, 3, self.profile)
+        if len(routes) < 2:
+            print("No other route within reach, using this one")
+            return result
+        shortest = set(routes[0].path)
+        for i, route in enumerate(routes, 1):
+            # Named after where it first leaves the shortest route
+            via = next((node_id for node_id in route.path if node_id not in shortest), None)
+            via = f", via {self.graph.get_node(via).name}" if via is not None else ""
+            print(f"  {i}. {route.total_distance}m, {route.total_time}s, {route.step_count} steps{via}")
+        choice = input(f"Which one? (1-{len(routes)}): ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(routes):
+            print("Invalid choice")
+            return None
+        return routes[int(choice) - 1]
+
+    def _pick_room(self, text):
+        """Code for what the user typed: an exact code, or a choice among search matches"""
+        if text in self.graph.lookup:
+            return text
+        matches = self.service.search(text, 5)
+        if not matches:
+            print(f"No room matches '{text}'")
+            return None
+        # Take the best match when nothing else comes close
+        if len(matches) == 1 or matches[0][0] - matches[1][0] >= 0.1:
+            node = matches[0][1]
+            print(f"Using {node.name} ({node.code})")
+            return node.code
+        for i, (_, node) in enumerate(matches, 1):
+            print(f"  {i}. {node.name} ({node.code}, Building {node.building} Floor {node.floor})")
+        choice = input(f"Which one? (1-{len(matches)}): ").strip()
+        if not choice.isdigit() or not 1 <= int(choice) <= len(matches):
+            print("Invalid choice")
+            return None
+        return matches[int(choice) - 1][1].code
+
+    def _snap_position(self, text):
+        """Code of the walkable node nearest to an "x,y,floor[,building]" position"""
+        try:
+            fields = [float(field) for field in text.split(",")]
+            x, y, floor = fields[0], fields[1], int(fields[2])
+            building = int(fields[3]) if len(fields) > 3 else None
+        except (ValueError, IndexError):
+            print("Invalid position")
+            return None
+        node = self.graph.nearest_node(x, y, building, floor, types=("room", "corridor", "entrance"))
+        if node is None:
+            print("No node on that floor")
+            return None
+        print(f"Nearest: {node.name} ({node.code})")
+        return node.code
+
+    def _step_navigation(self, route):
+        planner = planner_graph = None
+        # Steps are generated one at a time as the user walks the route
+        steps = route.steps()
+        i = 0
+        while True:
+            instruction = next(steps, None)
+            if instruction is None:
+                break
+            remaining = route.step_count - instruction["step"]
+            print(f"\nStep {i+1}/{i + 1 + remaining}")
             print(f"Instruction: {instruction['instruction']}")
             print(f"Distance: {instruction['distance']}m")
+            if instruction.get("stop"):
+                print(f"Stop {instruction['stop']}/{len(route.stops)}: {instruction['to_node'].name}")
             self.display.display_step(instruction)
-            if input("\nPress ENTER (q to quit): ").lower() == 'q':
+            answer = input("\nPress ENTER (q to quit, or the code where you are to re-route): ").strip()
+            if answer.lower() == 'q':
+                break
+            i += 1
+            here = instruction["to_node"].id
+            if answer:
+                if answer in self.graph.lookup:
+                    here = self.graph.lookup[answer]
+                else:
+                    print("Unknown location, continuing")
+                    answer = ""
+            # Closures and reweights logged by staff while the user walks
+            changes = self.service.sync_changes()
+            if not answer and not changes:
+                continue
+            if hasattr(route, "stops_after"):
+                # A visit is planned again over the stops still ahead
+                end = route.graph.get_node(route.path[-1]).code if route.fixed_end else None
+                rerouted = self.service.visit(self.graph.get_node(here).code,
+                                              route.stops_after(instruction["step"] - 1), end, self.profile)
+            else:
+                if planner is not None and (planner_graph is not self.graph
+                                            or not all([planner.apply_record(record) for record in changes])):
+                    planner = None
+                if planner is None:
+                    from algorithms.dstar_lite import DStarLite
+                    # Kept across re-routes so each one only repairs what changed. It searches a
+                    # view, so edits reach it through apply_record rather than under its feet.
+                    planner = DStarLite(self.graph.view(), here, route.path[-1], self.profile)
+                    planner_graph = self.graph
+                else:
+                    planner.move_to(here)
+                rerouted = planner.route()
+            if not rerouted["success"]:
+                print("No route from here")
                 break
+            if not answer:
+                if list(rerouted.path) == list(route.path[len(route.path) - len(rerouted.path):]):
+                    # The change is not on the way ahead
+                    continue
+                print("The map changed on your route")
+            print(f"Re-routed: {rerouted['total_distance']}m to go")
+            route, steps = rerouted, rerouted.steps()
         print("\nNavigation complete!")
+
     def _list_rooms(self):
-        rooms = [(n.code, n.name, n.building, n.floor) for n in self.graph.nodes if n.node_type == "room"]
-        for building in sorted(set(r[2] for r in rooms)):
+        listing = None
+        if self._service is None and self.catalogue:
+            listing = self.catalogue.load()
+        if listing is None:
+            # Grouped and sorted once per graph version by the search index
+            listing = self.service.rooms()
+        for building, rooms in listing.items():
             print(f"\nBuilding {building}:")
-            building_rooms = [r for r in rooms if r[2] == building]
-            for code, name, _, floor in sorted(building_rooms):
+            for code, name, floor in rooms:
                 print(f"  {code}: {name} (Floor {floor})")
 
 def main():
-    nav = NavigationSystem()
+    parser = argparse.ArgumentParser(description="Indoor navigation CLI")
+    parser.add_argument("--snapshot", help="graph snapshot to load, written from the built-in campus if missing")
+    parser.add_argument("--kiosk", help="node code this device stands at, e.g. H10-E1")
+    parser.add_argument("--metrics-prom", metavar="PATH",
+                        help="keep search metrics in this Prometheus text file (node_exporter textfile collector)")
+    parser.add_argument("--metrics-jsonl", metavar="PATH", help="append one JSON line of search metrics per query")
+    parser.add_argument("--display", choices=sorted(BACKENDS), default="terminal",
+                        help="where step glyphs are drawn: printed here, or an 8x8 MAX7219 module on SPI")
+    parser.add_argument("--profile", default="default",
+                        help="routing profile (default, accessible, fastest, fewest_floor_changes), "
+                             "e.g. accessible for stair-free routes")
+    args = parser.parse_args()
+    if args.profile != "default":
+        from algorithms.profiles import get_profile
+        try:
+            get_profile(args.profile)
+        except ValueError as exc:
+            parser.error(str(exc))
+    metrics = None
+    if args.metrics_prom or args.metrics_jsonl:
+        from algorithms.stats import MetricsRecorder
+        metrics = MetricsRecorder(args.metrics_prom, args.metrics_jsonl)
+    nav = NavigationSystem(args.snapshot, args.kiosk, metrics, args.display, args.profile)
+    # A kiosk needs its tree anyway, so the graph is loaded before the menu to check the code
+    if args.kiosk and args.kiosk not in nav.graph.lookup:
+        parser.error(f"--kiosk {args.kiosk} is not a node of the graph")
     nav.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""
+RoomSearch: Ranked fuzzy lookup of rooms by code or name
+Codes and name words sit in one sorted key array, so every prefix is a
+contiguous range found by binary search (a flattened prefix trie). Within a
+word the array is ordered by name length, so the first k hits are the best k.
+Misspelt words are corrected against the vocabulary through a trigram index,
+which stays small however many rooms share a word. The index is built once
+per graph version, together with the per-building room listing the CLI prints.
+"""
+import re
+import weakref
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Tuple
+
+SEARCH_TYPES = ("room", "entrance")
+# Node checks a query may spend on one key range
+SCAN_LIMIT = 2000
+# Least trigram similarity for a vocabulary word to stand in for a misspelt one
+MIN_SIMILARITY = 0.3
+_WORD = re.compile(r"[a-z0-9]+")
+
+def normalize(text):
+    return _WORD.findall(text.lower())
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class RoomSearch:
+    def __init__(self, graph, types=SEARCH_TYPES):
+        self.graph = graph
+        self.version = graph.version
+        lookup = graph.lookup
+        entries: List[Tuple[str, int, int]] = []
+        self.words: Dict[int, Tuple[str, ...]] = {}
+        self.codes: Dict[str, int] = {}
+        self.by_building: Dict[int, List[Tuple[str, str, int]]] = {}
+        for node in graph.nodes:
+            if node.node_type not in types or lookup.get(node.code) != node.id:
+                continue
+            code = node.code.lower()
+            # Codes are one key ("1-2-0003"), so their parts do not flood number searches
+            words = (code,) + tuple(normalize(node.name))
+            self.words[node.id] = words
+            self.codes[code] = node.id
+            for word in set(words):
+                entries.append((word, len(words), node.id))
+            if node.node_type == "room":
+                self.by_building.setdefault(node.building, []).append((node.code, node.name, node.floor))
+        entries.sort()
+        self.keys = [word for word, _, _ in entries]
+        self.key_ids = [node_id for _, _, node_id in entries]
+        self.vocabulary: Dict[str, List[str]] = {}
+        for word in dict.fromkeys(self.keys):
+            for gram in trigrams(word):
+                self.vocabulary.setdefault(gram, []).append(word)
+        self.by_building = {building: sorted(rooms) for building, rooms in sorted(self.by_building.items())}
+
+    def _range(self, word):
+        return bisect_left(self.keys, word), bisect_left(self.keys, word + "\uffff")
+
+    def _correct(self, word):
+        """(vocabulary word, similarity) closest to a word nothing starts with, or None"""
+        grams = trigrams(word)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for candidate in self.vocabulary.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+        best, best_key = None, None
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(candidate) + 1 - count)
+            key = (similarity, -len(candidate), candidate)
+            if similarity >= MIN_SIMILARITY and (best_key is None or key > best_key):
+                best, best_key = (candidate, similarity), key
+        return best
+
+    def search(self, query, k=5):
+        """Up to k (score, Node) pairs, best first; score 1.0 is an exact code"""
+        raw = query.strip().lower()
+        words = normalize(raw)
+        if not words:
+            return []
+        results: Dict[int, float] = {}
+        exact = self.codes.get(raw)
+        if exact is not None:
+            results[exact] = 1.0
+        if len(words) > 1 and self._range(raw)[0] != self._range(raw)[1]:
+            # Part of a code such as "1-2-00": match it whole rather than word by word
+            words = [raw]
+        confidence = 1.0
+        known = []
+        for word in words:
+            if self._range(word)[0] == self._range(word)[1]:
+                corrected = self._correct(word)
+                if corrected is None:
+                    # Nothing like it anywhere: search without it, at a lower score
+                    confidence *= 0.5
+                    continue
+                word, similarity = corrected
+                confidence = min(confidence, similarity)
+            known.append(word)
+        if not known:
+            return self._ranked(results, k)
+        # Rooms containing every word exactly are found from the rarest exact word;
+        # prefix matches only fill up what is left from the rarest prefix range
+        keys = self.keys
+        exact_ranges = [(bisect_right(keys, word) - bisect_left(keys, word), bisect_left(keys, word), word) for word in known]
+        count, start, rarest = min(exact_ranges)
+        if count and self._scan(start, start + count, rarest, known, confidence, results, k, exact=True) >= k:
+            return self._ranked(results, k)
+        prefix_ranges = [(end - start, start, end, word) for word in known for start, end in (self._range(word),)]
+        _, start, end, rarest = min(prefix_ranges)
+        self._scan(start, end, rarest, known, confidence, results, k)
+        return self._ranked(results, k)
+
+    def _scan(self, start, end, rarest, words, confidence, results, k, exact=False):
+        """
+        Score nodes in keys[start:end] that match every word. Keys are ordered by
+        name length, so the scan stops after k hits (with exact=True, k hits that
+        contain every word whole). Returns the number of such hits.
+        """
+        others = [word for word in words if word != rarest]
+        node_words, key_ids = self.words, self.key_ids
+        hits = 0
+        for i in range(start, min(end, start + SCAN_LIMIT)):
+            node_id = key_ids[i]
+            mine = node_words[node_id]
+            if node_id in results or not all(any(w.startswith(word) for w in mine) for word in others):
+                continue
+            # Whole-word hits rank above partial prefixes, short names above long ones
+            whole = sum(1 for word in words if word in mine)
+            results[node_id] = confidence * (0.5 + 0.4 * whole / len(words) - 0.001 * len(mine))
+            if whole == len(words) or not exact:
+                hits += 1
+                if hits >= k:
+                    break
+        return hits
+
+    def _ranked(self, results, k):
+        best = sorted(results.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(round(score, 3), self.graph.get_node(node_id)) for node_id, score in best]
+
+_indexes = weakref.WeakKeyDictionary()
+
+def room_search(graph):
+    """RoomSearch for graph, built on first use and rebuilt after graph changes"""
+    index = _indexes.get(graph)
+    if index is None or index.version != graph.version:
+        index = _indexes[graph] = RoomSearch(graph)
+    return index
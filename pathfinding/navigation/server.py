@@ -0,0 +1,387 @@
+"""
+Routing server: asyncio HTTP/1.1 API over TCP and/or a Unix socket
+The graph is loaded once into a RoutingService. Searches run on a bounded
+thread pool so the event loop keeps serving cheap requests and slow clients.
+Backpressure is two-level: each client (IP address, or connection on the Unix
+socket) may have only a few requests in flight and gets 429 beyond that, and
+when the shared queue is full every client gets 503. A connection handles its
+requests one at a time and waits for each response to drain before reading
+the next, so a client that stops reading stalls only itself.
+
+Endpoints (GET, JSON responses):
+  /route?from=CODE&to=CODE[&steps=0][&profile=NAME]
+                                      route with its instruction steps
+  /alternatives?from=CODE&to=CODE[&k=3][&steps=0][&profile=NAME]
+                                      up to k different routes, shortest first
+  /visit?from=CODE&stops=CODE,CODE,...[&to=CODE][&steps=0][&profile=NAME]
+                                      one route through every stop, in a short order
+  /search?q=TEXT[&k=5]                ranked room matches
+  /rooms[?building=N]                 rooms per building
+  /health                             graph size, revision and queue state
+  /metrics                            Prometheus text, when --metrics is on
+
+Run from pathfinding/: python -m navigation.server --snapshot campus.snap --port 8080 --unix /run/raspinav.sock
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from algorithms.profiles import PROFILES
+from algorithms.stats import MetricsRecorder
+from navigation.service import RoutingService
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 64
+MAX_ALTERNATIVES = 5
+MAX_STOPS = 100
+IDLE_TIMEOUT = 30.0
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           429: "Too Many Requests", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+def node_json(node):
+    return {"code": node.code, "name": node.name, "building": node.building, "floor": node.floor,
+            "type": node.node_type}
+
+def route_json(result, steps=True):
+    if not result["success"]:
+        return {"success": False, "error": result["error"]}
+    body = {
+        "success": True,
+        "start": node_json(result["start_room"]),
+        "end": node_json(result["end_room"]),
+        "total_distance": result["total_distance"],
+        "total_time": result["total_time"],
+        "step_count": result.step_count,
+    }
+    if steps:
+        body["steps"] = [{
+            "step": step["step"],
+            "from": step["from_node"].code,
+            "to": step["to_node"].code,
+            "distance": step["distance"],
+            "bearing": step["bearing"],
+            "turn_direction": step["turn_direction"],
+            "instruction": step["instruction"],
+            "time": step["time"],
+        } for step in result.steps()]
+    return body
+
+class RoutingServer:
+    def __init__(self, service: RoutingService, workers=2, queue_limit=32, client_limit=4, sync_interval=1.0):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="route")
+        # Jobs submitted to the executor and not finished yet, over all clients
+        self.queue_limit = queue_limit
+        self.pending = 0
+        # Requests in flight per client key
+        self.client_limit = client_limit
+        self.in_flight = {}
+        self.sync_interval = sync_interval
+        self.servers = []
+        self._sync_task = None
+        self.started = time.monotonic()
+        self.requests = 0
+        self.rejected = 0
+        self._next_connection = 0
+
+    async def start(self, host=None, port=None, unix_path=None):
+        if port is not None:
+            self.servers.append(await asyncio.start_server(self._connection, host, port, limit=MAX_REQUEST_LINE))
+        if unix_path is not None:
+            if os.path.exists(unix_path):
+                # Left behind by a previous run; a live server would still hold it open
+                os.unlink(unix_path)
+            self.servers.append(await asyncio.start_unix_server(self._connection, unix_path, limit=MAX_REQUEST_LINE))
+        if not self.servers:
+            raise ValueError("nothing to listen on: give a port and/or a unix socket path")
+        if self.service.changes is not None and self.sync_interval:
+            self._sync_task = asyncio.ensure_future(self._sync_loop())
+
+    def addresses(self):
+        return [sock.getsockname() for server in self.servers for sock in server.sockets]
+
+    async def serve_forever(self):
+        await asyncio.gather(*(server.serve_forever() for server in self.servers))
+
+    async def close(self):
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _sync_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            # Replaying edits can take a while on a large graph, so keep it off the loop
+            await loop.run_in_executor(self.executor, self.service.sync_changes)
+
+    async def _run(self, client, function, *args):
+        """Run a CPU-bound call on the executor, or refuse it when the client or server is saturated"""
+        if self.in_flight.get(client, 0) >= self.client_limit:
+            self.rejected += 1
+            raise HTTPError(429, "too many requests in flight for this client", retry_after=1)
+        if self.pending >= self.queue_limit:
+            self.rejected += 1
+            raise HTTPError(503, "server busy", retry_after=1)
+        self.in_flight[client] = self.in_flight.get(client, 0) + 1
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.pending -= 1
+            if self.in_flight[client] == 1:
+                del self.in_flight[client]
+            else:
+                self.in_flight[client] -= 1
+
+    async def _connection(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        if isinstance(peer, tuple):
+            client = peer[0]
+        else:
+            # Unix socket peers have no address; each connection is its own client
+            self._next_connection += 1
+            client = f"unix:{self._next_connection}"
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as exc:
+                    await self._respond(writer, exc.status, {"error": str(exc)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, body = await self._dispatch(client, method, target)
+                    extra = None
+                except HTTPError as exc:
+                    status, body = exc.status, {"error": str(exc)}
+                    extra = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+                except Exception as exc:
+                    print(f"Error handling {method} {target}: {exc!r}")
+                    status, body, extra = 500, {"error": "internal error"}, None
+                self.requests += 1
+                await self._respond(writer, status, body, keep_alive, extra)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader):
+        try:
+            line = await reader.readline()
+        except (asyncio.LimitOverrunError, ValueError):
+            raise HTTPError(400, "request line too long") from None
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "malformed request line") from None
+        if not version.startswith("HTTP/1."):
+            raise HTTPError(400, f"unsupported protocol {version}")
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HTTPError(431, "header line too long") from None
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, "too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if version == "HTTP/1.0" and headers.get("connection", "").lower() != "keep-alive":
+            headers["connection"] = "close"
+        # Bodies are not used by any endpoint, but must be consumed to keep the stream in step
+        length = headers.get("content-length", "0")
+        if not length.isdigit() or int(length) > MAX_REQUEST_LINE:
+            raise HTTPError(400, "bad or oversized request body")
+        if int(length):
+            await reader.readexactly(int(length))
+        return method, target, headers
+
+    async def _respond(self, writer, status, body, keep_alive=True, extra=None):
+        if isinstance(body, str):
+            payload, content_type = body.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            payload, content_type = json.dumps(body, separators=(",", ":")).encode("utf-8"), "application/json"
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}",
+                f"Content-Type: {content_type}",
+                f"Content-Length: {len(payload)}",
+                "Access-Control-Allow-Origin: *",
+                f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        for name, value in (extra or {}).items():
+            head.append(f"{name}: {value}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+    async def _dispatch(self, client, method, target):
+        if method != "GET":
+            raise HTTPError(405, "only GET is supported")
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path == "/route":
+            start, end, steps, profile = _route_params(query)
+            return 200, await self._run(client, self._route, start, end, steps, profile)
+        if url.path == "/alternatives":
+            start, end, steps, profile = _route_params(query)
+            k = _int_param(query, "k", 3, 1, MAX_ALTERNATIVES)
+            return 200, await self._run(client, self._alternatives, start, end, k, steps, profile)
+        if url.path == "/visit":
+            start, end, steps, profile = _route_params(query, end_required=False)
+            stops = [stop for stop in query.get("stops", "").split(",") if stop]
+            if not stops:
+                raise HTTPError(400, "from and stops are required")
+            if len(stops) > MAX_STOPS:
+                raise HTTPError(400, f"at most {MAX_STOPS} stops")
+            return 200, await self._run(client, self._visit, start, stops, end, steps, profile)
+        if url.path == "/search":
+            text = query.get("q", "").strip()
+            if not text:
+                raise HTTPError(400, "q is required")
+            k = _int_param(query, "k", 5, 1, 50)
+            matches = await self._run(client, self.service.search, text, k)
+            return 200, {"matches": [{"score": score, **node_json(node)} for score, node in matches]}
+        if url.path == "/rooms":
+            rooms = await self._run(client, self.service.rooms)
+            if "building" in query:
+                building = _int_param(query, "building", 0)
+                rooms = {building: rooms[building]} if building in rooms else {}
+            return 200, {"buildings": {str(building): [{"code": code, "name": name, "floor": floor}
+                                                       for code, name, floor in entries]
+                                       for building, entries in rooms.items()}}
+        if url.path == "/health":
+            graph = self.service.graph
+            return 200, {
+                "nodes": graph.node_count(),
+                "edges": graph.edge_count(),
+                "revision": graph.revision,
+                "uptime": round(time.monotonic() - self.started, 1),
+                "pending": self.pending,
+                "clients": len(self.in_flight),
+                "requests": self.requests,
+                "rejected": self.rejected,
+                "cache": self.service.routes.stats(),
+            }
+        if url.path == "/metrics" and self.service.metrics is not None:
+            return 200, self.service.metrics.prometheus()
+        raise HTTPError(404, f"no such endpoint {url.path}")
+
+    def _resolve(self, text):
+        """Node code for a code or the best search match, else the text unchanged"""
+        if text not in self.service.graph.lookup:
+            matches = self.service.search(text, 1)
+            if matches:
+                return matches[0][1].code
+        return text
+
+    def _route(self, start, end, steps, profile):
+        """Executor side of /route: resolve names, search and serialize"""
+        service = self.service
+        result, stats = service.route(self._resolve(start), self._resolve(end), profile)
+        try:
+            return {**route_json(result, steps), "profile": profile}
+        finally:
+            service.record(stats)
+
+    def _alternatives(self, start, end, k, steps, profile):
+        """Executor side of /alternatives"""
+        routes = self.service.alternatives(self._resolve(start), self._resolve(end), k, profile)
+        if not routes[0]["success"]:
+            return {"success": False, "error": routes[0]["error"], "profile": profile}
+        return {"success": True, "routes": [route_json(route, steps) for route in routes], "profile": profile}
+
+    def _visit(self, start, stops, end, steps, profile):
+        """Executor side of /visit: the route, the stops in visiting order and where each is reached"""
+        stops = [self._resolve(stop) for stop in stops]
+        result = self.service.visit(self._resolve(start), stops, end and self._resolve(end), profile)
+        body = {**route_json(result, steps), "profile": profile}
+        if result["success"]:
+            body["stops"] = [result.graph.get_node(node_id).code for node_id in result.stops]
+            if steps:
+                for step, number in result.stop_steps.items():
+                    body["steps"][step]["stop"] = number
+        return body
+
+def _route_params(query, end_required=True):
+    """(from, to, steps, profile) shared by the route queries; to is None when optional and missing"""
+    start, end = query.get("from"), query.get("to")
+    if not start or (end_required and not end):
+        raise HTTPError(400, "from and to are required" if end_required else "from and stops are required")
+    steps = query.get("steps", "1") not in ("0", "false", "no")
+    profile = query.get("profile", "default")
+    if profile not in PROFILES:
+        raise HTTPError(400, f"profile must be one of {', '.join(PROFILES)}")
+    return start, end, steps, profile
+
+def _int_param(query, name, default, low=None, high=None):
+    try:
+        value = int(query.get(name, default))
+    except ValueError:
+        raise HTTPError(400, f"{name} must be an integer") from None
+    if low is not None:
+        value = max(low, min(high, value))
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Routing server: HTTP API over TCP and/or a Unix socket")
+    parser.add_argument("--snapshot", help="graph snapshot to load, written from the built-in campus if missing")
+    parser.add_argument("--kiosk", help="node code to precompute a shortest-path tree for")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="TCP port to listen on")
+    parser.add_argument("--unix", metavar="PATH", help="Unix socket path to listen on")
+    parser.add_argument("--workers", type=int, default=2, help="search threads")
+    parser.add_argument("--queue-limit", type=int, default=32, help="searches queued or running before 503")
+    parser.add_argument("--client-limit", type=int, default=4, help="requests in flight per client before 429")
+    parser.add_argument("--metrics", action="store_true", help="collect search stats and serve /metrics")
+    args = parser.parse_args()
+    if args.port is None and args.unix is None:
+        args.port = 8080
+
+    metrics = MetricsRecorder() if args.metrics else None
+    service = RoutingService(args.snapshot, args.kiosk, metrics)
+    if args.kiosk and args.kiosk not in service.graph.lookup:
+        parser.error(f"--kiosk {args.kiosk} is not a node of the graph")
+    server = RoutingServer(service, args.workers, args.queue_limit, args.client_limit)
+
+    async def serve():
+        await server.start(args.host, args.port, args.unix)
+        print(f"Serving {service.graph.node_count()} nodes on {', '.join(map(str, server.addresses()))}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+RoutingService: One loaded graph with its route cache, kiosk trees and change log
+Shared by the interactive CLI and the routing server. The graph is loaded once;
+change log records are folded in by sync_changes(), which swaps in the updated
+graph and a fresh cache. Searches run on graph views, so a route() already in
+progress on another thread keeps a consistent graph.
+"""
+import os
+import threading
+
+from db.changelog import ChangeLog, ChangeLogError, StaleGraphError, open_graph, replay
+from db.graph_db import GraphDB
+from algorithms.alternatives import find_alternative_routes
+from algorithms.astar import find_path_bidirectional_astar
+from algorithms.multistop import find_multi_stop_route
+from algorithms.profiles import get_profile
+from algorithms.spt import TreeStore
+from algorithms.stats import SearchStats
+from navigation.cache import RouteCache
+from navigation.search import room_search
+
+class RoutingService:
+    def __init__(self, snapshot_path=None, kiosk=None, metrics=None):
+        self.snapshot_path = snapshot_path
+        self.kiosk = kiosk
+        # Optional MetricsRecorder; searches are only instrumented when one is set
+        self.metrics = metrics
+        # Live edits from facilities staff (python -m db.changelog SNAPSHOT ...)
+        self.changes = ChangeLog.beside(snapshot_path) if snapshot_path else None
+        self._sync_lock = threading.Lock()
+        # Records of a batch that failed to apply, kept for the next attempt
+        self._unapplied = []
+        if snapshot_path and os.path.exists(snapshot_path):
+            graph = open_graph(snapshot_path, self.changes)
+        else:
+            graph = GraphDB()
+            if snapshot_path:
+                graph.save(snapshot_path)
+        self.use_graph(graph)
+
+    def use_graph(self, graph):
+        trees = None
+        if self.kiosk and self.kiosk not in graph.lookup:
+            # Removed or renamed by a live edit: keep serving, just without the tree
+            print(f"Warning: kiosk {self.kiosk} is not on the map, its routes are searched instead")
+        elif self.kiosk:
+            # Routes from (or to) the kiosk node are read off a precomputed tree
+            trees = TreeStore(graph, f"{self.snapshot_path}.trees" if self.snapshot_path else None)
+            trees.tree(self.kiosk)
+        self.trees = trees
+        self.routes = RouteCache(graph)
+        self.graph = graph
+
+    def sync_changes(self):
+        """Apply change log records appended since the last call; returns the records applied"""
+        if self.changes is None:
+            return []
+        with self._sync_lock:
+            try:
+                new = self.changes.read()
+                if not new:
+                    # A batch that failed is only tried again once more records arrive
+                    return []
+                records = self._unapplied + new
+                pending = [record for record in records if record["seq"] > self.graph.revision]
+                if not pending:
+                    self._unapplied = []
+                    return []
+                graph = self.graph
+                if not isinstance(graph, GraphDB):
+                    graph = GraphDB.from_graph(graph)
+                try:
+                    replay(graph, records)
+                except StaleGraphError:
+                    # Checkpointed past us: the new snapshot already holds what we missed
+                    self.changes = ChangeLog.beside(self.snapshot_path)
+                    graph = open_graph(self.snapshot_path, self.changes)
+                except ChangeLogError:
+                    # replay() left the graph untouched; read() will not return these again
+                    self._unapplied = pending
+                    raise
+            except ChangeLogError as exc:
+                print(f"Warning: change log not applied: {exc}")
+                return []
+            self._unapplied = []
+            self.use_graph(graph)
+            print(f"Map updated to revision {graph.revision}")
+            return pending
+
+    def route(self, start, end, profile=None):
+        """
+        (route result, SearchStats or None). Stats are only collected with metrics
+        set and when a search actually ran; record them once the steps were used.
+        profile: routing profile name (ValueError if unknown), default profile if None.
+        """
+        profile = get_profile(profile)
+        stats = [None]
+        # Kiosk trees hold default-profile distances
+        trees = self.trees if profile.is_default else None
+
+        def search(graph, start, end):
+            # graph is the view RouteCache searches; the trees must be of its version
+            if trees is not None and (trees.loaded(start, graph) or trees.loaded(end, graph)):
+                return trees.find_path(start, end, graph)
+            if self.metrics is not None:
+                stats[0] = SearchStats()
+            return find_path_bidirectional_astar(graph, start, end, stats=stats[0], profile=profile)
+
+        options = () if profile.is_default else (profile.name,)
+        return self.routes.route(start, end, search, options), stats[0]
+
+    def alternatives(self, start, end, k=3, profile=None):
+        """Up to k route results, shortest first, see algorithms.alternatives; cached like route()"""
+        profile = get_profile(profile)
+
+        def search(graph, start, end):
+            return find_alternative_routes(graph, start, end, k, profile=profile)
+
+        options = ("alternatives", k) if profile.is_default else ("alternatives", k, profile.name)
+        return self.routes.route(start, end, search, options)
+
+    def visit(self, start, stops, end=None, profile=None):
+        """Route from start through every code in stops, see algorithms.multistop; cached like route()"""
+        profile = get_profile(profile)
+
+        # Kiosk trees hold default-profile distances
+        trees = self.trees if profile.is_default else None
+
+        # The stops belong in the options: the cache keys on real start and end codes
+        stops = tuple(stops)
+        options = ("visit", stops) if profile.is_default else ("visit", stops, profile.name)
+        routes = self.routes
+        result = routes.get(start, end, options)
+        if result is None:
+            view = routes.graph.view()
+            result = find_multi_stop_route(view, start, stops, end, profile=profile, trees=trees)
+            routes.put(start, end, result, options, view.version)
+        return result
+
+    def record(self, stats):
+        if stats is not None and self.metrics is not None:
+            self.metrics.record(stats)
+            self.metrics.flush()
+
+    def search(self, text, k=5):
+        """Up to k (score, Node) matches for a room code or name"""
+        return room_search(self.graph).search(text, k)
+
+    def rooms(self):
+        """{building: [(code, name, floor)]}, sorted"""
+        return room_search(self.graph).by_building
@@ -0,0 +1,8 @@
+"""
+Tests import the modules from pathfinding/, like the benchmarks do.
+Run from the repository root: python -m pytest pathfinding/tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,134 @@
+"""
+ChangeLog: a snapshot plus its log reopens as the edited graph, before and
+after a checkpoint
+"""
+import pytest
+
+from db.changelog import ChangeLog, ChangeLogError, StaleGraphError, checkpoint, open_graph, replay
+from db.graph_db import GraphDB
+from db.synthetic import build_campus
+from navigation.service import RoutingService
+
+def contents(graph):
+    """({code: {neighbour code: weight}}, revision) for comparing graphs of any kind"""
+    nodes = {graph.get_node(node_id).code: {graph.get_node(edge.to_id).code: round(edge.weight, 6)
+                                            for edge in graph.neighbors(node_id)}
+             for node_id in range(graph.node_count())}
+    return nodes, graph.revision
+
+@pytest.fixture
+def edited(tmp_path):
+    """(graph with a log attached and a few edits made, snapshot path, log)"""
+    snapshot = tmp_path / "campus.snap"
+    graph = build_campus(buildings=2, floors=2, rooms_per_floor=6)
+    graph.save(snapshot)
+    graph.changelog = log = ChangeLog.beside(snapshot, sync=False)
+    lookup = graph.lookup
+    graph.set_edge_weight(lookup["H1-C0-0"], lookup["1-0-0001"], 42.0)
+    graph.close_node(lookup["H1-S1"])
+    graph.remove_edge(lookup["H2-C1-0"], lookup["2-1-0002"])
+    lab = graph.add_node("LAB", "Lab", 2, 1, 30.0, 10.0, "room")
+    graph.add_edge(lookup["H2-C1-0"], lab, 7.5)
+    graph.close_node(lookup["H2-S1"])
+    graph.reopen_node(lookup["H2-S1"])
+    return graph, snapshot, log
+
+def test_replay_rebuilds_the_edited_graph(edited):
+    graph, snapshot, log = edited
+    reopened = open_graph(snapshot)
+    assert reopened.revision == log.seq == 7
+    assert contents(reopened) == contents(graph)
+    assert set(reopened.closed) == {graph.lookup["H1-S1"]}
+
+def test_replay_only_applies_newer_records(edited):
+    graph, snapshot, log = edited
+    follower = open_graph(snapshot)
+    graph.set_edge_weight(graph.lookup["H1-C0-0"], graph.lookup["1-0-0001"], 9.0)
+    assert replay(follower, ChangeLog.beside(snapshot).read()) == 1
+    assert contents(follower) == contents(graph)
+
+def test_torn_last_line_is_ignored(edited):
+    graph, snapshot, log = edited
+    with open(log.path, "ab") as fp:
+        fp.write(b'{"seq":8,"op":"close_no')
+    assert contents(open_graph(snapshot)) == contents(graph)
+    # The next append replaces the torn tail
+    graph.close_node(graph.lookup["H2-S2"])
+    assert contents(open_graph(snapshot)) == contents(graph)
+
+def test_checkpoint_keeps_closures_and_revision(edited):
+    graph, snapshot, log = edited
+    stale = open_graph(snapshot)
+    stale.revision = 3
+    checkpoint(graph, snapshot, log)
+    records = ChangeLog.beside(snapshot).read()
+    assert records[0] == {"seq": 7, "op": "checkpoint"}
+    assert [record["op"] for record in records[1:]] == ["close_node"]
+    # The snapshot itself holds the open graph; its closure comes back from the log
+    assert GraphDB.open(snapshot).revision == 7
+    reopened = open_graph(snapshot)
+    assert contents(reopened) == contents(graph)
+    assert set(reopened.closed) == {graph.lookup["H1-S1"]}
+    with pytest.raises(StaleGraphError):
+        replay(stale, records)
+
+def test_checkpoint_interrupted_keeps_closures(edited, monkeypatch):
+    graph, snapshot, log = edited
+    def crash(*args):
+        raise OSError("power cut")
+    # Dies with the new snapshot written and the old log still in place
+    monkeypatch.setattr(log, "restart", crash)
+    with pytest.raises(OSError):
+        checkpoint(graph, snapshot, log)
+    assert GraphDB.open(snapshot).revision == 7
+    reopened = open_graph(snapshot)
+    assert contents(reopened)[0] == contents(graph)[0]
+    assert set(reopened.closed) == {graph.lookup["H1-S1"]}
+
+def test_rejected_edits_are_not_logged(edited):
+    graph, snapshot, log = edited
+    lookup = graph.lookup
+    with pytest.raises(ValueError):
+        graph.add_edge(lookup["H1-C0-0"], lookup["1-0-0002"], -1.0)
+    with pytest.raises(ValueError):
+        graph.set_edge_weight(lookup["H1-C0-0"], lookup["1-0-0001"], float("nan"))
+    # Each of these used to be logged, replayed everywhere and then break save()
+    for fields in (("Z1", "Zed", 1, 0, 0.0, 0.0, "lab"), ("Z1", "Zed", 1, 0, float("nan"), 0.0, "room"),
+                   ("Z1", "Zed", "1", 0, 0.0, 0.0, "room"), ("", "Zed", 1, 0, 0.0, 0.0, "room"),
+                   ("Z1", "Zed", 1, 2**40, 0.0, 0.0, "room")):
+        with pytest.raises(ValueError):
+            graph.add_node(*fields)
+    assert log.seq == 7
+    assert "Z1" not in graph.lookup
+    assert contents(open_graph(snapshot)) == contents(graph)
+    # Nothing unsaveable got in either
+    graph.save(snapshot)
+
+def test_failed_replay_leaves_the_graph_untouched(edited):
+    graph, snapshot, log = edited
+    follower = open_graph(snapshot)
+    before, closed = contents(follower), set(follower.closed)
+    graph.close_node(graph.lookup["H2-S2"])
+    # Written by some other tool: refers to a node nobody has
+    log.append("close_node", {"node": "NOWHERE"})
+    with pytest.raises(ChangeLogError):
+        replay(follower, ChangeLog.beside(snapshot).read())
+    assert contents(follower) == before
+    assert set(follower.closed) == closed
+
+def test_service_retries_a_failed_batch_with_later_records(edited, capsys):
+    graph, snapshot, log = edited
+    service = RoutingService(str(snapshot))
+    stairs = service.graph.lookup["H2-S2"]
+    log.append("close_node", {"node": "NOWHERE"})
+    assert service.sync_changes() == []
+    assert "not applied" in capsys.readouterr().out
+    # Nothing new: no second attempt, no second warning
+    assert service.sync_changes() == []
+    assert capsys.readouterr().out == ""
+    assert service.graph.revision == 7
+    # Later records are tried together with the failed ones, so nothing is applied past the bad record
+    log.append("close_node", {"node": "H2-S2"})
+    assert service.sync_changes() == []
+    assert stairs not in service.graph.closed
+    assert service.graph.revision == 7
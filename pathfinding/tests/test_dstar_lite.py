@@ -0,0 +1,109 @@
+"""
+D* Lite: after random moves, reweights and closures the planner's route costs
+what Dijkstra finds on a copy of the graph with the same edits applied
+"""
+import random
+
+import pytest
+
+from algorithms.alt import shortest_distances
+from algorithms.dstar_lite import DStarLite
+from db.changelog import ChangeLog
+from db.graph_db import GraphDB
+from db.synthetic import build_campus
+
+INF = float("inf")
+
+def campus(seed):
+    return build_campus(buildings=2, floors=3, rooms_per_floor=8, corridors_per_floor=2, seed=seed)
+
+def route_cost(result):
+    return sum(edge.weight for edge in result.edges) if result["success"] else INF
+
+def assert_optimal(planner, reference):
+    expected = shortest_distances(reference, planner.start_id)[planner.goal_id]
+    assert route_cost(planner.route()) == pytest.approx(expected)
+
+def random_edge(rng, graph, avoid):
+    while True:
+        from_id = rng.randrange(graph.node_count())
+        edges = [edge for edge in graph.neighbors(from_id) if edge.to_id not in avoid]
+        if from_id not in avoid and edges:
+            return from_id, rng.choice(edges)
+
+def step(rng, planner, reference):
+    """Walk one edge: usually along the planned route, sometimes a wrong turn"""
+    found = planner.path()
+    if found is not None and len(found[0]) > 1 and rng.random() < 0.7:
+        return found[0][1]
+    options = [edge.to_id for edge in reference.neighbors(planner.start_id)]
+    return rng.choice(options) if options else planner.start_id
+
+@pytest.mark.parametrize("seed", range(8))
+def test_moves_reweights_and_closures_match_dijkstra(seed):
+    rng = random.Random(seed)
+    graph = campus(seed)
+    reference = GraphDB.from_graph(graph)
+    rooms = [node.id for node in graph.nodes if node.node_type == "room"]
+    start_id, goal_id = rng.sample(rooms, 2)
+    planner = DStarLite(graph, start_id, goal_id)
+    assert_optimal(planner, reference)
+    closed = set()
+    for _ in range(60):
+        action = rng.random()
+        if action < 0.4:
+            planner.move_to(step(rng, planner, reference))
+        elif action < 0.7:
+            from_id, edge = random_edge(rng, graph, closed)
+            # Cheaper edges too, which make the planner restart with a smaller heuristic scale
+            weight = edge.weight * rng.uniform(0.5, 3.0)
+            planner.update_edge(from_id, edge.to_id, weight)
+            reference.set_edge_weight(from_id, edge.to_id, weight)
+        elif action < 0.85:
+            node_id = rng.choice([node_id for node_id in range(graph.node_count())
+                                  if node_id not in (planner.start_id, goal_id)])
+            planner.block_node(node_id)
+            reference.close_node(node_id)
+            closed.add(node_id)
+        elif closed:
+            node_id = closed.pop()
+            planner.unblock_node(node_id)
+            reference.reopen_node(node_id)
+        assert_optimal(planner, reference)
+
+def test_change_log_records_match_dijkstra(tmp_path):
+    rng = random.Random(7)
+    graph = campus(7)
+    reference = GraphDB.from_graph(graph)
+    reference.changelog = log = ChangeLog(tmp_path / "campus.changes", sync=False)
+    follower = ChangeLog(log.path)
+    rooms = [node.id for node in graph.nodes if node.node_type == "room"]
+    start_id, goal_id = rng.sample(rooms, 2)
+    planner = DStarLite(graph, start_id, goal_id)
+    closed = set()
+    for _ in range(30):
+        action = rng.random()
+        if action < 0.4:
+            from_id, edge = random_edge(rng, reference, closed)
+            reference.set_edge_weight(from_id, edge.to_id, edge.weight * rng.uniform(0.5, 3.0))
+        elif action < 0.6:
+            from_id, edge = random_edge(rng, reference, closed)
+            reference.remove_edge(from_id, edge.to_id)
+        elif action < 0.85 or not closed:
+            node_id = rng.choice([node_id for node_id in range(graph.node_count())
+                                  if node_id not in (start_id, goal_id) and node_id not in closed])
+            reference.close_node(node_id)
+            closed.add(node_id)
+        else:
+            reference.reopen_node(closed.pop())
+        for record in follower.read():
+            assert planner.apply_record(record)
+        assert_optimal(planner, reference)
+
+def test_new_edges_are_not_mirrored():
+    graph = campus(0)
+    planner = DStarLite(graph, 0, 1)
+    record = {"seq": 1, "op": "add_edge", "from": graph.nodes[0].code, "to": graph.nodes[1].code,
+              "weight": 1.0, "bearing": 0.0}
+    assert not planner.apply_record(record)
+    assert not planner.apply_record({"seq": 2, "op": "close_node", "node": "NOT-A-NODE"})
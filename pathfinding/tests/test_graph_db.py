@@ -0,0 +1,31 @@
+"""
+GraphDB views: a view shows the graph as it was when taken, closures included
+"""
+from db.graph_db import GraphDB
+
+def test_view_leaves_out_closed_nodes():
+    graph = GraphDB()
+    corridor = graph.get_node(graph.lookup["H10-C1"])
+    where = (corridor.x, corridor.y, corridor.building, corridor.floor)
+    graph.close_node(corridor.id)
+    view = graph.view()
+    assert graph.nearest_node(*where).code != "H10-C1"
+    assert view.nearest_node(*where).code == graph.nearest_node(*where).code
+    assert corridor.id not in [node.id for _, node in view.nodes_within(*where[:2], 20.0, *where[2:])]
+    # Reopening changes the graph, not the view taken before
+    graph.reopen_node(corridor.id)
+    assert corridor.id in view.closed
+    assert graph.view().nearest_node(*where).code == "H10-C1"
+
+def test_new_edges_leave_views_alone():
+    graph = GraphDB(build_campus=False)
+    for code in ("A", "B", "C"):
+        graph.add_node(code, code, 1, 0, 0.0, float(len(graph.nodes)), "corridor")
+    # No view yet: appended in place
+    first = graph.adjacency[0]
+    graph.add_edge(0, 1)
+    assert graph.adjacency[0] is first
+    view = graph.view()
+    graph.add_edge(0, 2)
+    assert [edge.to_id for edge in view.neighbors(0)] == [1]
+    assert [edge.to_id for edge in graph.neighbors(0)] == [1, 2]
@@ -0,0 +1,37 @@
+"""
+Loader: bad records fail with a GraphLoadError that names the file and record
+"""
+import json
+
+import pytest
+
+from db.loader import GraphLoadError, load_graph
+
+NODES = "code,name,building,floor,x,y,node_type\nA,A,1,0,0,0,corridor\nB,B,1,0,3,4,room\n"
+
+def point(code, coordinates):
+    return {"type": "Feature", "geometry": {"type": "Point", "coordinates": coordinates},
+            "properties": {"code": code, "building": 1, "floor": 0, "node_type": "room"}}
+
+@pytest.mark.parametrize("weight", ["-1", "nan", "inf"])
+def test_bad_edge_weights_are_rejected(tmp_path, weight):
+    nodes, edges = tmp_path / "nodes.csv", tmp_path / "edges.csv"
+    nodes.write_text(NODES)
+    edges.write_text(f"from,to,weight\nA,B,{weight}\n")
+    with pytest.raises(GraphLoadError, match=r"edges\.csv:2: edge weight"):
+        load_graph(str(nodes), str(edges))
+
+@pytest.mark.parametrize("coordinates", [12, "12", None, [1.0], [float("nan"), 0.0]])
+def test_bad_point_coordinates_are_rejected(tmp_path, coordinates):
+    path = tmp_path / "campus.geojson"
+    features = [point("A", [0.0, 0.0]), point("B", coordinates)]
+    # json.dumps writes NaN as a bare token, which the loader's decoder accepts
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    with pytest.raises(GraphLoadError, match=r"features\[1\]"):
+        load_graph(str(path))
+
+def test_out_of_range_floor_is_a_load_error(tmp_path):
+    nodes = tmp_path / "nodes.csv"
+    nodes.write_text(NODES + f"C,C,1,{2**40},0,0,room\n")
+    with pytest.raises(GraphLoadError, match=r"nodes\.csv:4: node floor"):
+        load_graph(str(nodes))